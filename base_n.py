@@ -0,0 +1,153 @@
+"""BASE-N mode: 32-bit two's-complement integer arithmetic and logic"""
+import ast
+import re
+from functools import lru_cache
+
+import numpy as np
+
+BASES = {"DEC": 10, "HEX": 16, "BIN": 2, "OCT": 8}
+WORD_BITS = 32
+_MASK = (1 << WORD_BITS) - 1
+_SIGN = 1 << (WORD_BITS - 1)
+
+# Fixed display width per base for the unsigned two's-complement view
+_DIGITS = {16: 8, 2: 32, 8: 11}
+
+_TOKEN_SOURCE = r"""
+    (?P<prefixed>{prefixes})
+  | (?P<word>xnor|xor|and|or|not|neg)
+  | (?P<digits>[0-9A-Fa-f]+)
+  | (?P<space>\s+)
+  | (?P<op><<|>>|.)
+"""
+_TOKEN_PATTERN = re.compile(_TOKEN_SOURCE.format(prefixes=r"0[xX][0-9A-Fa-f]+|0[bB][01]+|0[oO][0-7]+"), re.VERBOSE)
+# In HEX, 0B1 is the hex number B1 typed after a 0, not a binary literal
+_HEX_TOKEN_PATTERN = re.compile(_TOKEN_SOURCE.format(prefixes=r"0[xX][0-9A-Fa-f]+"), re.VERBOSE)
+
+# Logic words mapped to Python operators; xnor borrows @ and is rewritten
+_WORDS = {"and": "&", "or": "|", "xor": "^", "xnor": "@", "not": "~", "neg": "-"}
+_SYMBOLS = {"×": "*", "÷": "/", "−": "-"}
+
+
+def wrap(value):
+    """Reduce an integer to the signed 32-bit two's-complement range"""
+    value &= _MASK
+    return value - (1 << WORD_BITS) if value & _SIGN else value
+
+
+def _divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("Math ERROR")
+    # Integer division truncates toward zero, as on the calculator
+    quotient = abs(a) // abs(b)
+    return wrap(quotient if (a < 0) == (b < 0) else -quotient)
+
+
+def _xnor(a, b):
+    return wrap(~(a ^ b))
+
+
+def translate(text, base):
+    """Translate BASE-N input into Python source with decimal integer literals"""
+    parts = []
+    pattern = _HEX_TOKEN_PATTERN if base == 16 else _TOKEN_PATTERN
+    for match in pattern.finditer(text):
+        kind, value = match.lastgroup, match.group()
+        if kind == "space":
+            continue
+        if kind == "prefixed":
+            parts.append(str(int(value, 0)))
+        elif kind == "word":
+            parts.append(_WORDS[value])
+        elif kind == "digits":
+            try:
+                parts.append(str(int(value, base)))
+            except ValueError:
+                raise SyntaxError(f"{value} is not a valid base-{base} number") from None
+        elif value == "^":
+            # Python's ^ is XOR, which BASE-N spells xor; the power key has no BASE-N meaning
+            raise SyntaxError("^ is not available in BASE-N mode")
+        else:
+            parts.append(_SYMBOLS.get(value, value))
+    return " ".join(parts)
+
+
+class _WordSizeRewriter(ast.NodeTransformer):
+    """Wrap every operation in wrap() so intermediates stay 32-bit"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return ast.Call(func=ast.Name(id="div", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        if isinstance(node.op, ast.MatMult):
+            return ast.Call(func=ast.Name(id="xnor", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        if not isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.BitAnd, ast.BitOr,
+                                    ast.BitXor, ast.LShift, ast.RShift)):
+            raise SyntaxError(f"{type(node.op).__name__} is not available in BASE-N mode")
+        if isinstance(node.op, (ast.LShift, ast.RShift)):
+            # Shift counts beyond the word size behave like shifting the word out
+            node.right = ast.Call(func=ast.Name(id="shift", ctx=ast.Load()), args=[node.right], keywords=[])
+        return ast.Call(func=ast.Name(id="wrap", ctx=ast.Load()), args=[node], keywords=[])
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        return ast.Call(func=ast.Name(id="wrap", ctx=ast.Load()), args=[node], keywords=[])
+
+    def generic_visit(self, node):
+        if not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Load,
+                                 ast.Call, ast.Name, ast.operator, ast.unaryop)):
+            raise SyntaxError(f"{type(node).__name__} is not available in BASE-N mode")
+        return super().generic_visit(node)
+
+
+@lru_cache(maxsize=256)
+def compile_base_n(text, base):
+    """Compile BASE-N input once per (text, base)"""
+    tree = ast.parse(translate(text, base), mode="eval")
+    tree = ast.fix_missing_locations(_WordSizeRewriter().visit(tree))
+    return compile(tree, "<base-n>", "eval")
+
+
+_NAMESPACE = {
+    "__builtins__": {},
+    "wrap": wrap,
+    "div": _divide,
+    "xnor": _xnor,
+    "shift": lambda count: min(count, WORD_BITS) if count >= 0 else 0,
+}
+
+
+def evaluate(text, base=10):
+    """Evaluate BASE-N input with pure integer arithmetic"""
+    return wrap(eval(compile_base_n(text, base), _NAMESPACE))
+
+
+def format_base(value, base=10):
+    """Render a 32-bit value: signed in DEC, zero-padded two's complement otherwise"""
+    value = wrap(value)
+    if base == 10:
+        return str(value)
+    unsigned = value & _MASK
+    digits = format(unsigned, {16: "X", 2: "b", 8: "o"}[base])
+    return digits.zfill(_DIGITS[base])
+
+
+_DIGIT_CHARS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+def convert_batch(values, base=16):
+    """Convert many integers to base-N strings in one vectorized pass
+
+    Values are reduced to 32-bit two's complement first, exactly like
+    format_base; the result is a NumPy array of fixed-width strings.
+    """
+    words = np.asarray(values, dtype=np.int64).astype(np.uint32)
+    if base == 10:
+        return words.view(np.int32).astype(str)
+    bits = {16: 4, 8: 3, 2: 1}[base]
+    width = _DIGITS[base]
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint32) * bits
+    digits = (words[:, None] >> shifts) & np.uint32(base - 1)
+    # Build ASCII bytes per digit, then view each row as one fixed-width string
+    chars = np.ascontiguousarray(_DIGIT_CHARS[digits])
+    return chars.view(f"S{width}").reshape(-1).astype(f"U{width}")
@@ -0,0 +1 @@
+"""Benchmarks for the calculator engine; run each module with python -m benchmarks.<name>"""
@@ -0,0 +1,534 @@
+"""Differential accuracy of evaluate() against a high-precision decimal reference
+
+    python -m benchmarks.accuracy [--cases N] [--jobs J] [--seed S] [--modes DEG,RAD,GRAD] [--json FILE]
+
+Random expressions are generated from the keypad grammar (arithmetic,
+powers, trig and inverse trig in each angle mode, logs, hyperbolics,
+factorial and nCr) and evaluated twice: through evaluate(), exactly as
+"=" does, and by a reference that follows the same tree with decimal
+arithmetic at REFERENCE_DIGITS significant digits.  The error of every
+result is measured in units in the last place (ULPs) of the correctly
+rounded reference.
+
+By default the arguments of every operation are first rounded to the
+doubles evaluate() holds, so the error measures the functions rather
+than the conditioning of the expression (cos(cos⁻¹(0)) is 6e-17 in
+doubles, exactly 0 in decimal); --exact keeps intermediates exact.  Cases are split into chunks evaluated in parallel
+worker processes; each returns a histogram, so millions of cases merge
+in constant memory.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from decimal import Decimal, DecimalException, getcontext, localcontext
+from fractions import Fraction
+from multiprocessing import Pool
+
+from expression import ANGLE_MODES, evaluate
+
+REFERENCE_DIGITS = 50
+CHUNK_SIZE = 5000
+MAX_DEPTH = 3
+# Upper bounds of the ULP-error histogram buckets; the last one is open
+ULP_BUCKETS = (0, 0.5, 1, 2, 4, 16, 256, 2 ** 16, 2 ** 32, math.inf)
+WORST_KEPT = 10
+
+# Display text of each one-argument function and operator
+UNARY = {
+    "sin": "sin({})", "cos": "cos({})", "tan": "tan({})",
+    "asin": "sin⁻¹({})", "acos": "cos⁻¹({})", "atan": "tan⁻¹({})",
+    "sinh": "sinh({})", "cosh": "cosh({})", "tanh": "tanh({})",
+    "asinh": "sinh⁻¹({})", "acosh": "cosh⁻¹({})", "atanh": "tanh⁻¹({})",
+    "log": "log({})", "ln": "ln({})", "log2": "log₂({})", "sqrt": "√({})",
+    "exp": "e^({})", "exp10": "10^({})", "square": "({})²", "inverse": "({})⁻¹", "neg": "(−{})",
+}
+BINARY = {"add": "({})+({})", "sub": "({})−({})", "mul": "({})×({})", "div": "({})÷({})", "pow": "({})^({})"}
+# Operators that keep Python ints exact; every other function takes doubles
+ARITHMETIC = set(BINARY) | {"neg", "square", "inverse"}
+# Arguments likely to be inside each function's domain
+DOMAINS = {
+    "asin": (-1, 1), "acos": (-1, 1), "atanh": (-1, 1), "acosh": (1, 50),
+    "log": (0, 1e6), "ln": (0, 1e6), "log2": (0, 1e6), "sqrt": (0, 1e6),
+    "sinh": (-50, 50), "cosh": (-50, 50), "exp": (-50, 50), "exp10": (-20, 20),
+}
+
+
+# Integer powers evaluate() would compute exactly only up to this many digits
+MAX_INTEGER_POWER_DIGITS = 1000
+
+
+class NoReference(ArithmeticError):
+    """The exact value does not exist (outside the domain) or is not a real number"""
+
+
+class Unbounded(NoReference):
+    """evaluate() would raise an integer to a huge power exactly and not finish"""
+
+
+# Expression generation
+
+def random_number(rng, low=-1000, high=1000):
+    """A short decimal literal as typed on the keypad, negated with (−) if below zero"""
+    digits = rng.choice((0, 0, 1, 2, 3))
+    value = round(rng.uniform(low, high), digits)
+    if digits == 0:
+        value = int(value)
+    text = repr(abs(value))
+    node = ("num", text)
+    return ("neg", node) if value < 0 else node
+
+
+def random_tree(rng, depth=MAX_DEPTH):
+    """A random expression tree; leaves get more likely as depth runs out"""
+    if depth == 0 or rng.random() < 0.25:
+        return random_number(rng)
+    kind = rng.random()
+    if kind < 0.1:
+        n = rng.randint(0, 20)
+        if rng.random() < 0.5:
+            return ("factorial", n)
+        return ("comb", n, rng.randint(0, n))
+    if kind < 0.45:
+        op = rng.choice(tuple(BINARY))
+        if op == "pow":
+            return (op, random_tree(rng, depth - 1), random_number(rng, -4, 4))
+        return (op, random_tree(rng, depth - 1), random_tree(rng, depth - 1))
+    op = rng.choice(tuple(UNARY))
+    if op in DOMAINS and rng.random() < 0.7:
+        return (op, random_number(rng, *DOMAINS[op]))
+    return (op, random_tree(rng, depth - 1))
+
+
+def to_text(node):
+    """Display text of a tree, as it would be typed"""
+    op = node[0]
+    if op == "num":
+        return node[1]
+    if op == "factorial":
+        return f"{node[1]}!"
+    if op == "comb":
+        return f"nCr({node[1]},{node[2]})"
+    if op in BINARY:
+        return BINARY[op].format(to_text(node[1]), to_text(node[2]))
+    if op == "neg" and node[1][0] != "num":
+        # (−(a)−(b)) would negate only a
+        return f"(−({to_text(node[1])}))"
+    return UNARY[op].format(to_text(node[1]))
+
+
+# Reference arithmetic in decimal
+
+def _pi():
+    """π to the current precision (the decimal module's recipe)"""
+    with localcontext() as ctx:
+        ctx.prec += 2
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return +s
+
+
+def _sin_series(x):
+    with localcontext() as ctx:
+        ctx.prec += 2
+        term, total, n, last = x, x, 1, None
+        while total != last:
+            last = total
+            term *= -x * x / ((n + 1) * (n + 2))
+            total += term
+            n += 2
+    return +total
+
+
+def _atan_series(x):
+    """atan of |x| <= 1, after halving the argument twice for fast convergence"""
+    with localcontext() as ctx:
+        ctx.prec += 4
+        for _ in range(2):
+            x = x / (1 + (1 + x * x).sqrt())
+        power, total, n, last = x, x, 1, None
+        while total != last:
+            last = total
+            power *= -x * x
+            n += 2
+            total += power / n
+    return 4 * total
+
+
+def atan(x):
+    if abs(x) <= 1:
+        return _atan_series(x)
+    half_pi = _pi() / 2
+    return (half_pi if x > 0 else -half_pi) - _atan_series(1 / x)
+
+
+def _guard_digits(a):
+    """A context with extra precision for formulas that cancel when a is tiny"""
+    ctx = getcontext().copy()
+    if a:
+        ctx.prec += max(0, -a.adjusted())
+    return localcontext(ctx)
+
+
+def _as_double(value, keep_integers):
+    """value as evaluate() would hold it: integers stay exact in arithmetic as
+    Python ints do, and become doubles when passed to a math function"""
+    if keep_integers and value == value.to_integral_value():
+        return value
+    return Decimal(float(value))
+
+
+class Reference:
+    """Exact-as-possible evaluation of a tree in one angle mode"""
+
+    def __init__(self, angle_mode, exact=False):
+        self.angle_mode = angle_mode
+        self.exact = exact
+        self.pi = _pi()
+        # Full turn in the angle unit, and the factor converting it to radians
+        self.turn = {"DEG": Decimal(360), "GRAD": Decimal(400), "RAD": 2 * self.pi}[angle_mode]
+        self.unit = 2 * self.pi / self.turn
+
+    def value(self, node):
+        op = node[0]
+        if op == "num":
+            return Decimal(node[1])
+        if op == "factorial":
+            return Decimal(math.factorial(node[1]))
+        if op == "comb":
+            return Decimal(math.comb(node[1], node[2]))
+        args = [self.value(child) for child in node[1:]]
+        if not self.exact:
+            keep_integers = op in ARITHMETIC
+            args = [_as_double(arg, keep_integers) for arg in args]
+        return getattr(self, f"_{op}")(*args)
+
+    # Arithmetic
+
+    def _add(self, a, b):
+        return a + b
+
+    def _sub(self, a, b):
+        return a - b
+
+    def _mul(self, a, b):
+        return a * b
+
+    def _div(self, a, b):
+        if b == 0:
+            raise NoReference("division by zero")
+        return a / b
+
+    def _neg(self, a):
+        return -a
+
+    def _square(self, a):
+        return a * a
+
+    def _inverse(self, a):
+        return self._div(Decimal(1), a)
+
+    @staticmethod
+    def _check_integer_power(a, b):
+        # int ** int is exact in Python; 10^(13!) would run for hours
+        if a == a.to_integral_value() and b == b.to_integral_value() and abs(a) > 1 and b > 0:
+            if b * abs(a).log10() > MAX_INTEGER_POWER_DIGITS:
+                raise Unbounded("integer power too large to evaluate exactly")
+
+    def _pow(self, a, b):
+        self._check_integer_power(a, b)
+        if a == 0 and b <= 0:
+            raise NoReference("0 to a non-positive power")
+        if a < 0:
+            exponent = Fraction(b)
+            if exponent.denominator != 1:
+                raise NoReference("negative base to a fractional power")
+            return a ** int(exponent)
+        return a ** b
+
+    def _sqrt(self, a):
+        if a < 0:
+            raise NoReference("square root of a negative number")
+        return a.sqrt()
+
+    # Exponentials and logarithms
+
+    def _exp(self, a):
+        return a.exp()
+
+    def _exp10(self, a):
+        self._check_integer_power(Decimal(10), a)
+        return Decimal(10) ** a
+
+    def _ln(self, a):
+        if a <= 0:
+            raise NoReference("logarithm of a non-positive number")
+        return a.ln()
+
+    def _log(self, a):
+        return self._ln(a) / Decimal(10).ln()
+
+    def _log2(self, a):
+        return self._ln(a) / Decimal(2).ln()
+
+    # Trigonometry: arguments are reduced exactly in the angle unit first
+
+    def _reduce(self, a):
+        """a modulo a full turn, and the quarter turn it falls on exactly (or None)"""
+        a = a % self.turn
+        quarters = a / (self.turn / 4)
+        if self.angle_mode != "RAD" and quarters == quarters.to_integral_value():
+            return a, int(quarters) % 4
+        return a, None
+
+    def _sin(self, a):
+        a, quarter = self._reduce(a)
+        if quarter is not None:
+            return Decimal((0, 1, 0, -1)[quarter])
+        return _sin_series(a * self.unit)
+
+    def _cos(self, a):
+        a, quarter = self._reduce(a)
+        if quarter is not None:
+            return Decimal((1, 0, -1, 0)[quarter])
+        return _sin_series(self.pi / 2 - a * self.unit)
+
+    def _tan(self, a):
+        cos = self._cos(a)
+        if cos == 0:
+            raise NoReference("tangent of an odd quarter turn")
+        return self._sin(a) / cos
+
+    def _asin(self, a):
+        if abs(a) > 1:
+            raise NoReference("sin⁻¹ outside [-1, 1]")
+        if abs(a) == 1:
+            return a * self.pi / 2 / self.unit
+        return atan(a / (1 - a * a).sqrt()) / self.unit
+
+    def _acos(self, a):
+        return self.pi / 2 / self.unit - self._asin(a)
+
+    def _atan(self, a):
+        return atan(a) / self.unit
+
+    # Hyperbolic functions; near 0 the formulas cancel, so tiny arguments
+    # get as many extra digits as they have leading zeros
+
+    def _sinh(self, a):
+        with _guard_digits(a):
+            e = a.exp()
+            result = (e - 1 / e) / 2
+        return +result
+
+    def _cosh(self, a):
+        e = a.exp()
+        return (e + 1 / e) / 2
+
+    def _tanh(self, a):
+        with _guard_digits(a):
+            e = (2 * a).exp()
+            result = (e - 1) / (e + 1)
+        return +result
+
+    def _asinh(self, a):
+        # Odd, so work with |a| to avoid cancellation for negative arguments
+        magnitude = abs(a)
+        with _guard_digits(a):
+            result = (magnitude + (magnitude * magnitude + 1).sqrt()).ln()
+        return +result if a >= 0 else -result
+
+    def _acosh(self, a):
+        if a < 1:
+            raise NoReference("cosh⁻¹ below 1")
+        return (a + (a * a - 1).sqrt()).ln()
+
+    def _atanh(self, a):
+        if abs(a) >= 1:
+            raise NoReference("tanh⁻¹ outside (-1, 1)")
+        with _guard_digits(a):
+            result = ((1 + a) / (1 - a)).ln() / 2
+        return +result
+
+
+# Comparison
+
+def ulp_error(result, reference):
+    """|result − reference| in ULPs of the reference rounded to a double"""
+    rounded = float(reference)
+    if math.isinf(rounded):
+        return 0.0 if result == rounded else math.inf
+    return float(abs(Decimal(result) - reference) / Decimal(math.ulp(rounded)))
+
+
+def _bucket(error):
+    for k, bound in enumerate(ULP_BUCKETS):
+        if error <= bound:
+            return k
+    return len(ULP_BUCKETS) - 1
+
+
+def new_stats():
+    return {
+        "cases": 0, "compared": 0, "skipped": 0, "both_error": 0, "production_error": 0, "reference_error": 0,
+        "production_seconds": 0.0, "reference_seconds": 0.0,
+        "histogram": [0] * len(ULP_BUCKETS), "by_function": {}, "worst": [],
+    }
+
+
+def run_chunk(task):
+    """Generate and compare count cases from seed; returns mergeable statistics"""
+    seed, count, modes, digits, exact = task
+    rng = random.Random(seed)
+    stats = new_stats()
+    with localcontext() as ctx:
+        ctx.prec = digits
+        ctx.Emax, ctx.Emin = 10 ** 6, -10 ** 6
+        references = {mode: Reference(mode, exact) for mode in modes}
+        for _ in range(count):
+            mode = rng.choice(modes)
+            tree = random_tree(rng)
+            text = to_text(tree)
+            stats["cases"] += 1
+
+            # The reference goes first so cases evaluate() cannot finish are skipped
+            start = time.perf_counter()
+            try:
+                reference = references[mode].value(tree)
+                if abs(reference) > Decimal(1.7976931348623157e308):
+                    raise NoReference("overflow")
+            except Unbounded:
+                stats["skipped"] += 1
+                continue
+            except (NoReference, DecimalException, ZeroDivisionError, OverflowError, ValueError):
+                reference = None
+            middle = time.perf_counter()
+            try:
+                result = evaluate(text, mode)
+                if isinstance(result, complex) or not math.isfinite(result):
+                    raise ArithmeticError("not a finite real number")
+                result = float(result)
+            except Exception:
+                result = None
+            stats["reference_seconds"] += middle - start
+            stats["production_seconds"] += time.perf_counter() - middle
+
+            if result is None or reference is None:
+                key = "both_error" if result is reference else (
+                    "production_error" if result is None else "reference_error")
+                stats[key] += 1
+                continue
+            error = ulp_error(result, reference)
+            stats["compared"] += 1
+            stats["histogram"][_bucket(error)] += 1
+            family = stats["by_function"].setdefault(f"{tree[0]} {mode}", [0, 0.0])
+            family[0] += 1
+            family[1] = max(family[1], error)
+            if error > 0:
+                stats["worst"].append((error, mode, text, result, f"{+reference:.20g}"))
+                stats["worst"] = sorted(stats["worst"], reverse=True)[:WORST_KEPT]
+    return stats
+
+
+def merge(total, stats):
+    for key in ("cases", "compared", "skipped", "both_error", "production_error", "reference_error",
+                "production_seconds", "reference_seconds"):
+        total[key] += stats[key]
+    total["histogram"] = [a + b for a, b in zip(total["histogram"], stats["histogram"])]
+    for family, (count, worst) in stats["by_function"].items():
+        entry = total["by_function"].setdefault(family, [0, 0.0])
+        entry[0] += count
+        entry[1] = max(entry[1], worst)
+    total["worst"] = sorted(total["worst"] + stats["worst"], reverse=True)[:WORST_KEPT]
+    return total
+
+
+def percentile(histogram, fraction):
+    """Upper bucket bound below which the given fraction of compared cases fall"""
+    target, seen = fraction * sum(histogram), 0
+    for bound, count in zip(ULP_BUCKETS, histogram):
+        seen += count
+        if seen >= target:
+            return bound
+    return math.inf
+
+
+def _bound(bound):
+    if math.isinf(bound):
+        return "∞"
+    return f"2^{int(math.log2(bound))}" if bound >= 2 ** 16 else f"{bound:g}"
+
+
+def report(stats, elapsed, jobs):
+    compared = stats["compared"] or 1
+    print(f"{stats['cases']} cases in {elapsed:.1f} s on {jobs} processes "
+          f"({stats['cases'] / elapsed:,.0f} cases/s overall)")
+    if stats["production_seconds"]:
+        print(f"evaluate(): {stats['cases'] / stats['production_seconds']:,.0f} evaluations/s per process")
+    print(f"compared {stats['compared']}, skipped {stats['skipped']} huge integer powers, both errors {stats['both_error']}, "
+          f"error only in evaluate() {stats['production_error']}, "
+          f"no reference value {stats['reference_error']}")
+    print("\nULP error      cases   share")
+    for bound, count in zip(ULP_BUCKETS, stats["histogram"]):
+        label = "0" if bound == 0 else f"≤ {_bound(bound)}" if math.isfinite(bound) else f"> {_bound(ULP_BUCKETS[-2])}"
+        print(f"{label:<10} {count:>9}  {count / compared:6.2%}")
+    print(f"\np50 ≤ {_bound(percentile(stats['histogram'], 0.5))}, "
+          f"p99 ≤ {_bound(percentile(stats['histogram'], 0.99))}, "
+          f"p99.9 ≤ {_bound(percentile(stats['histogram'], 0.999))} ULP")
+    print("\nWorst error per outermost function and angle mode")
+    for family, (count, worst) in sorted(stats["by_function"].items(), key=lambda item: -item[1][1]):
+        print(f"  {family:<14} {count:>8} cases, max {worst:.3g} ULP")
+    print("\nWorst cases")
+    for error, mode, text, result, reference in stats["worst"]:
+        print(f"  {error:.3g} ULP  {mode}  {text}  = {result!r}, reference {reference}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", default=",".join(ANGLE_MODES))
+    parser.add_argument("--digits", type=int, default=REFERENCE_DIGITS,
+                        help="significant digits of the reference (default %(default)s)")
+    parser.add_argument("--exact", action="store_true",
+                        help="keep intermediates exact instead of rounding them to doubles")
+    parser.add_argument("--json", help="write the merged statistics to this file")
+    args = parser.parse_args()
+
+    modes = tuple(args.modes.split(","))
+    for mode in modes:
+        if mode not in ANGLE_MODES:
+            parser.error(f"unknown angle mode {mode}")
+    chunks = [
+        (args.seed * 1_000_003 + k, min(CHUNK_SIZE, args.cases - start), modes, args.digits, args.exact)
+        for k, start in enumerate(range(0, args.cases, CHUNK_SIZE))
+    ]
+
+    start = time.perf_counter()
+    total = new_stats()
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            for stats in pool.imap_unordered(run_chunk, chunks):
+                merge(total, stats)
+    else:
+        for chunk in chunks:
+            merge(total, run_chunk(chunk))
+    elapsed = time.perf_counter() - start
+
+    report(total, elapsed, args.jobs)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(total, elapsed_seconds=elapsed, ulp_buckets=[str(b) for b in ULP_BUCKETS]), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Replay keystrokes through CalculatorCore.button_click and time dispatch
+
+    python -m benchmarks.key_dispatch [--repeat N]
+
+Two numbers are reported: the full cost per key press (dispatch plus the
+action it runs, including evaluation on "=") and the cost of resolving a
+key to its action alone.
+"""
+import argparse
+import time
+
+from calculator_core import CalculatorCore
+
+# A session mixing digits, functions, SHIFT/ALPHA keys, STO/RCL and results
+SESSION = [
+    "1", "2", "3", "+", "4", "5", "×", "6", "=",
+    "SHIFT", "RCL", "x⁻¹",                      # STO A
+    "sin", "3", "0", ")", "+", "ALPHA", "x⁻¹", "=",  # sin(30)+A
+    "SHIFT", "7", "×", "2", "x²", "=",         # π×2²
+    "SHIFT", "√", "2", "7", ")", "=",          # ∛(27)
+    "5", "SHIFT", "x⁻¹", "=",                  # 5!
+    "hyp", "cos", "0", ")", "=",               # cosh(0)
+    "RCL", "x⁻¹", "÷", "4", "=",               # A÷4
+    "2", "DEL", "3", "AC",
+]
+
+
+def replay(core, keys, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            core.button_click(key)
+    return time.perf_counter() - start
+
+
+def lookup_only(core, keys, repeat):
+    """Resolve every key in every SHIFT/ALPHA state without running it"""
+    actions = core.key_actions
+    states = [(shift, alpha) for shift in (False, True) for alpha in (False, True)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            for shift, alpha in states:
+                actions.get((key, shift, alpha))
+    return (time.perf_counter() - start) / len(states)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    core = CalculatorCore()
+    keys = SESSION
+    replay(core, keys, 10)  # warm the expression caches
+    core.latency.reset()
+
+    presses = len(keys) * args.repeat
+    elapsed = replay(core, keys, args.repeat)
+    lookup = lookup_only(core, keys, args.repeat)
+    p50, p95, p99 = (s * 1e6 for s in core.latency.percentiles("button_click"))
+
+    print(f"{presses} key presses")
+    print(f"button_click: {elapsed / presses * 1e6:.2f} µs/key "
+          f"(p50 {p50:.2f}, p95 {p95:.2f}, p99 {p99:.2f} µs)")
+    print(f"key lookup:   {lookup / presses * 1e9:.1f} ns/key")
+    if core.last_error:
+        print(f"last error: {core.last_error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Time the live result per keystroke against evaluating the whole input
+
+    python -m benchmarks.live_preview [--terms N]
+
+An expression of N terms is typed one character at a time, then edited
+near its start.  The incremental preview only re-reads the tokens after
+each change; the baseline re-evaluates the whole prefix on every key.
+"""
+import argparse
+import time
+
+from expression import evaluate
+from live_preview import LivePreview
+
+
+def type_through(preview, text):
+    start = time.perf_counter()
+    for end in range(1, len(text) + 1):
+        preview.value(text[:end])
+    return time.perf_counter() - start
+
+
+def evaluate_through(text):
+    start = time.perf_counter()
+    for end in range(1, len(text) + 1):
+        try:
+            evaluate(text[:end])
+        except Exception:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=60)
+    args = parser.parse_args()
+
+    text = "+".join(f"sin({n})×{n}²" for n in range(args.terms))
+    preview = LivePreview()
+    typed = type_through(preview, text)
+    full = evaluate_through(text)
+
+    # Change the second term back and forth and let the preview catch up
+    edited = text.replace("sin(1)", "sin(2)", 1)
+    start = time.perf_counter()
+    for _ in range(5):
+        value = preview.value(edited)
+        preview.value(text)
+    edit = (time.perf_counter() - start) / 10
+    assert abs(value - evaluate(edited)) <= 1e-9 * abs(value)
+
+    keys = len(text)
+    print(f"{keys} keystrokes, {len(preview.tokens)} tokens")
+    print(f"live preview: {typed / keys * 1e6:8.1f} µs/key")
+    print(f"evaluate():   {full / keys * 1e6:8.1f} µs/key")
+    print(f"edit near the start: {edit * 1e6:.1f} µs ({preview.fed} tokens re-read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Replay a keystroke macro headlessly and report input-pipeline throughput
+
+    python -m benchmarks.macro_replay [--keys N] [--macro FILE]
+
+Without --macro a recorded session of main-keypad and function-tab
+presses is replayed; the events are repeated until N key presses (10^6
+by default) have gone through CalculatorCore.
+"""
+import argparse
+import os
+import tempfile
+
+from calculator_core import CalculatorCore
+from macros import load_macro, replay, replay_headless, save_macro
+
+from benchmarks.key_dispatch import SESSION
+
+# Function-tab presses, recorded alongside the main keys
+FUNCTIONS = ["sinh", "1", ")", "+", "nCr", "5", ",", "2", ")", "=", "|x|", "−", "3", ")", "=", "AC"]
+
+
+def record_session():
+    """Record SESSION and FUNCTIONS as a user would type them"""
+    core = CalculatorCore()
+    core.macro = []
+    for key in SESSION:
+        core.button_click(key)
+    for key in FUNCTIONS:
+        if key in ("sinh", "nCr", "|x|"):
+            core.scientific_function(key)
+        else:
+            core.button_click(key)
+    return core.macro
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10 ** 6)
+    parser.add_argument("--macro", help="macro file to replay instead of the built-in session")
+    args = parser.parse_args()
+
+    if args.macro:
+        events = load_macro(args.macro)
+    else:
+        # Go through a file so the saved format is exercised too
+        events = record_session()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.json")
+            save_macro(path, events)
+            assert load_macro(path) == events
+    if not events:
+        parser.error("the macro is empty")
+
+    core, _ = replay_headless(events)  # warm the expression caches
+    repeat = max(1, args.keys // len(events))
+    elapsed = replay(core, events, repeat)
+    presses = len(events) * repeat
+
+    print(f"{presses} key presses ({len(events)}-event macro × {repeat})")
+    print(f"{elapsed:.2f} s: {presses / elapsed:,.0f} keys/s, {elapsed / presses * 1e6:.2f} µs/key")
+    print(f"final display: {core.display_line2}")
+    if core.last_error:
+        print(f"last error: {core.last_error}")
+
+
+if __name__ == "__main__":
+    main()
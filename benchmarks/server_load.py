@@ -0,0 +1,117 @@
+"""Load-test the HTTP service with concurrent keep-alive clients
+
+    python -m benchmarks.server_load [--url http://127.0.0.1:8991] [--connections C]
+                                     [--requests N] [--batch B] [--workers W]
+
+Without --url a server is started on a free port for the run.  Each of
+the C connections sends N /evaluate requests of B expressions over one
+kept-alive connection, in its own session; requests/s, expressions/s and
+latency percentiles are reported.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.suite import EXPRESSIONS, ROOT
+
+
+async def request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(number, host, port, requests, batch, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    expressions = list(EXPRESSIONS.values())
+    items = [expressions[k % len(expressions)] for k in range(batch - 1)] + ["Ans×2"]
+    payload = {"session": f"load-{number}", "expressions": items}
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            status, response = await request(reader, writer, host, "/evaluate", payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200 or any("error" in result for result in response["results"]):
+                failures.append(response)
+    finally:
+        writer.close()
+
+
+async def run(host, port, connections, requests, batch):
+    latencies, failures = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(n, host, port, requests, batch, latencies, failures) for n in range(connections)
+    ))
+    return time.perf_counter() - start, latencies, failures
+
+
+def start_server(workers):
+    """Run the service in a child process on a free port; returns (process, port)"""
+    command = [sys.executable, "server.py", "--port", "0"]
+    if workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    line = process.stdout.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="an already running server")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per connection")
+    parser.add_argument("--batch", type=int, default=10, help="expressions per request")
+    parser.add_argument("--workers", type=int, help="pool size of a server started for the run")
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, port = start_server(args.workers)
+        host = "127.0.0.1"
+    try:
+        # One request per connection first, so worker start-up is not measured
+        asyncio.run(run(host, port, args.connections, 1, args.batch))
+        elapsed, latencies, failures = asyncio.run(
+            run(host, port, args.connections, args.requests, args.batch)
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    count = len(latencies)
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+    print(f"{count} requests of {args.batch} expressions on {args.connections} keep-alive connections")
+    print(f"{count / elapsed:,.0f} requests/s, {count * args.batch / elapsed:,.0f} expressions/s")
+    print(f"latency p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+    if failures:
+        print(f"{len(failures)} failed requests, first: {failures[0]}")
+
+
+if __name__ == "__main__":
+    main()
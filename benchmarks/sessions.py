@@ -0,0 +1,108 @@
+"""Memory per session and the cost of evicting and reloading sessions
+
+    python -m benchmarks.sessions [--sessions N] [--resident R]
+
+Memory is what tracemalloc sees allocated per session while N sessions
+are held, including the session id and the manager's bookkeeping.  The
+eviction run touches N sessions in random order with only R of them
+allowed in memory, so most touches write one session to disk and read
+another back.
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from calculator_core import CalculatorCore
+from session_manager import CalculatorState, SessionManager
+
+
+def bytes_per_session(count, build):
+    """Bytes allocated per session by build(count), which returns what it built"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(count)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size / count
+
+
+def _manager(count, prepare):
+    manager = SessionManager(tempfile.mkdtemp(), max_resident=count)
+    for n in range(count):
+        state = CalculatorState()
+        prepare(state, n)
+        manager.put(f"student-{n}", state)
+    return manager
+
+
+def _dict_states(count):
+    # The plain dicts the HTTP service kept per session before the manager
+    return {
+        f"student-{n}": {
+            "ans": 0,
+            "memories": {"A": 0, "B": 0, "C": 0, "D": 0, "E": 0, "F": 0, "M": 0, "x": 0, "y": 0},
+            "angle_mode": "DEG",
+            "calculation_mode": "COMP",
+            "decimal_places": 10,
+        }
+        for n in range(count)
+    }
+
+
+def _shared_matrix(count):
+    template = CalculatorState()
+    template.set_matrix("A", np.eye(4))
+    return _manager(count, lambda state, n: setattr(state, "matrices", template.copy().matrices))
+
+
+CASES = {
+    "CalculatorState, default": lambda count: _manager(count, lambda state, n: None),
+    "CalculatorState, Ans and memories": lambda count: _manager(
+        count, lambda state, n: (setattr(state, "ans", n * 0.5), state.set_memory("A", n + 0.25))
+    ),
+    "CalculatorState, own 4×4 matrix": lambda count: _manager(
+        count, lambda state, n: state.set_matrix("A", np.full((4, 4), n))
+    ),
+    "CalculatorState, shared 4×4 matrix": _shared_matrix,
+    "dict state (before)": _dict_states,
+}
+
+
+def eviction(count, resident):
+    """Seconds per touch of a random session when only resident of count stay in memory"""
+    with tempfile.TemporaryDirectory() as directory:
+        manager = SessionManager(directory, max_resident=resident)
+        for n in range(count):
+            manager.get(f"student-{n}").set_matrix("A", np.full((3, 3), n))
+        order = np.random.default_rng(0).permutation(count)
+        start = time.perf_counter()
+        for n in order:
+            state = manager.get(f"student-{n}")
+            state.ans = int(n)
+        elapsed = time.perf_counter() - start
+        return elapsed / count, manager.evictions, manager.reloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--resident", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, build in CASES.items():
+        print(f"{name:<36} {bytes_per_session(args.sessions, build):8,.0f} B/session")
+    cores = min(args.sessions, 200)
+    core_size = bytes_per_session(cores, lambda count: [CalculatorCore() for _ in range(count)])
+    print(f"{'CalculatorCore':<36} {core_size:8,.0f} B/session")
+
+    per_touch, evictions, reloads = eviction(args.sessions, args.resident)
+    print(f"{args.sessions} sessions, {args.resident} resident: {per_touch * 1e6:,.0f} µs per touch "
+          f"({evictions} evictions, {reloads} reloads)")
+
+
+if __name__ == "__main__":
+    main()
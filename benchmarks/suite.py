@@ -0,0 +1,348 @@
+"""Regression benchmarks for the calculator engine, saved as JSON and compared
+
+    python -m benchmarks.suite run [--output FILE] [--filter TEXT] [--repeat N]
+    python -m benchmarks.suite compare BASELINE CURRENT [--threshold 0.10]
+
+run times every case below and writes the per-call median and minimum;
+compare lists every case whose median grew by more than the threshold
+and exits with status 1 if there is any.  Nothing here needs a display.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from calculator_core import CalculatorCore
+from equation_solver import (
+    EQUATION_TYPES, solve_batch, solve_inequality_batch, solve_linear_system, solve_polynomial
+)
+from expression import compile_expression, format_result, parse_expression
+from matrix_ops import MatrixRegister
+from session import Snapshot, restore_snapshot, save_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each timed run lasts at least this long; the median of the runs is kept
+MIN_RUN_SECONDS = 0.05
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+# Inputs typed as on the keypad, evaluated the way "=" evaluates them
+EXPRESSIONS = {
+    "arithmetic": "12+34×56−78÷9",
+    "trig": "sin(30)+cos(60)×tan(45)",
+    "powers": "√(2)^(3)+2²−3⁻¹",
+    "factorial": "5!+log(1000)+ln(e)",
+    "nested": "((1+2)×(3+4))÷((5−6)×(7+8))",
+}
+MATRIX_SIZES = (2, 4, 10, 50)
+EQUATION_BATCH = 10000
+# n as on the Equation tab: Polynomial and System n×n go up to 10, INEQ is degree 2 to 4
+POLYNOMIAL_DEGREES = (4, 10)
+SYSTEM_SIZES = (4, 10)
+INEQUALITY_DEGREES = (2, 4)
+
+CASES = {}
+
+
+def case(name, self_timed=False):
+    """Register a benchmark: the decorated function sets up and returns the callable to time
+
+    A self-timed callable measures itself and returns the seconds it took.
+    """
+    def register(setup):
+        CASES[name] = (setup, self_timed)
+        return setup
+    return register
+
+
+def _core():
+    core = CalculatorCore({"history_enabled": True})
+    core.latency.enabled = False
+    return core
+
+
+def _calculate(text):
+    core = _core()
+
+    def run():
+        core.current_input = text
+        core.calculate_result()
+    return run
+
+
+for _name, _text in EXPRESSIONS.items():
+    case(f"calculate/{_name}")(lambda text=_text: _calculate(text))
+
+
+@case("calculate/uncached")
+def _calculate_uncached():
+    """Parse and compile every time, as for an expression seen for the first time"""
+    run = _calculate(EXPRESSIONS["trig"])
+
+    def uncached():
+        parse_expression.cache_clear()
+        compile_expression.cache_clear()
+        run()
+    return uncached
+
+
+@case("format/real")
+def _format_real():
+    values = [0.1 + 0.2, 1 / 3, 123456789.125, 2.5e-7, 1e15, 42]
+    return lambda: [format_result(value) for value in values]
+
+
+@case("format/complex")
+def _format_complex():
+    values = [3 + 4j, -2.5j, 1 - 1j, complex(1e-5, 7)]
+    return lambda: [format_result(value, complex_format=fmt) for value in values for fmt in ("rect", "polar")]
+
+
+def _matrix(size, operation):
+    rng = np.random.default_rng(size)
+    register = MatrixRegister(size, size)
+    register.assign(rng.standard_normal((size, size)) + size * np.eye(size))
+    rhs = rng.standard_normal(size)
+
+    def run():
+        # Factorize every time, as after an edit of the matrix
+        register.invalidate()
+        if operation == "det":
+            register.determinant()
+        elif operation == "inv":
+            register.inverse()
+        else:
+            register.solve(rhs)
+    return run
+
+
+for _size in MATRIX_SIZES:
+    for _operation in ("det", "inv", "solve"):
+        case(f"matrix/{_operation}/{_size}x{_size}")(
+            lambda size=_size, operation=_operation: _matrix(size, operation)
+        )
+
+
+def _equation(eq_type, rows):
+    rng = np.random.default_rng(rows)
+    coefficients = rng.uniform(-10, 10, (rows, EQUATION_TYPES[eq_type]))
+    return lambda: solve_batch(eq_type, coefficients)
+
+
+for _eq_type in EQUATION_TYPES:
+    case(f"equation/{_eq_type}")(lambda eq_type=_eq_type: _equation(eq_type, 1))
+    case(f"equation/{_eq_type}/batch{EQUATION_BATCH}")(lambda eq_type=_eq_type: _equation(eq_type, EQUATION_BATCH))
+
+
+def _polynomial(degree):
+    coefficients = np.random.default_rng(degree).uniform(-10, 10, degree + 1)
+    return lambda: solve_polynomial(coefficients)
+
+
+def _system(size):
+    rng = np.random.default_rng(size)
+    matrix = rng.uniform(-10, 10, (size, size)) + size * 10 * np.eye(size)
+    rhs = rng.uniform(-10, 10, size)
+    return lambda: solve_linear_system(matrix, rhs)
+
+
+def _inequality(degree, rows):
+    coefficients = np.random.default_rng(degree).uniform(-10, 10, (rows, degree + 1))
+    return lambda: solve_inequality_batch(coefficients, ">=")
+
+
+for _degree in POLYNOMIAL_DEGREES:
+    case(f"equation/Polynomial/{_degree}")(lambda degree=_degree: _polynomial(degree))
+for _size in SYSTEM_SIZES:
+    case(f"equation/SystemN/{_size}x{_size}")(lambda size=_size: _system(size))
+for _degree in INEQUALITY_DEGREES:
+    case(f"equation/Inequality/{_degree}")(lambda degree=_degree: _inequality(degree, 1))
+    case(f"equation/Inequality/{_degree}/batch{EQUATION_BATCH}")(
+        lambda degree=_degree: _inequality(degree, EQUATION_BATCH)
+    )
+
+
+@case("history/append")
+def _history_append():
+    core = _core()
+    entries = [f"{n}+{n} = {2 * n}" for n in range(core.max_history * 2)]
+
+    def run():
+        for entry in entries:
+            core.add_to_history(entry)
+    return run
+
+
+@case("history/search")
+def _history_search():
+    core = _core()
+    for n in range(core.max_history):
+        core.add_to_history(f"sin({n})×{n} = {n * 0.5}")
+    return lambda: core.search_history("×4")
+
+
+def _session():
+    """A full history and three 4×4 matrices, saved to a temporary session file"""
+    core = _core()
+    for n in range(core.max_history):
+        core.add_to_history(f"sin({n})×{n} = {n * 0.5}")
+    rng = np.random.default_rng(4)
+    matrices = {name: MatrixRegister(4, 4) for name in "ABC"}
+    for register in matrices.values():
+        register.assign(rng.standard_normal((4, 4)))
+    path = os.path.join(tempfile.mkdtemp(), "session.npz")
+    save_snapshot(path, core, matrices)
+    return core, matrices, path
+
+
+@case("session/save")
+def _session_save():
+    core, matrices, path = _session()
+    return lambda: save_snapshot(path, core, matrices)
+
+
+def _session_restore(read_all):
+    _, _, path = _session()
+    core = _core()
+
+    def run():
+        snapshot = Snapshot(path)
+        matrices = restore_snapshot(core, snapshot)
+        if read_all:
+            core.history
+            dict(matrices)
+        snapshot.close()
+    return run
+
+
+case("session/restore")(lambda: _session_restore(False))
+case("session/restore+read")(lambda: _session_restore(True))
+
+
+def _import_time(module):
+    """Seconds to start Python and import module, less a bare interpreter start"""
+    def start(code):
+        began = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, cwd=ROOT)
+        return time.perf_counter() - began
+
+    def run():
+        return start(f"import {module}") - start("pass")
+    return run
+
+
+case("startup/import calculator_core", self_timed=True)(lambda: _import_time("calculator_core"))
+case("startup/import calculator", self_timed=True)(lambda: _import_time("calculator"))
+
+
+def measure(run, repeat=DEFAULT_REPEAT):
+    """Per-call seconds of run over repeat runs of enough calls to last MIN_RUN_SECONDS"""
+    run()  # warm up caches and lazy imports
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS:
+            break
+        number *= 10 if elapsed < MIN_RUN_SECONDS / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+    return {"median_s": statistics.median(times), "min_s": min(times), "number": number, "repeat": repeat}
+
+
+def measure_self_timed(run, repeat=DEFAULT_REPEAT):
+    times = [run() for _ in range(repeat)]
+    return {"median_s": statistics.median(times), "min_s": min(times), "number": 1, "repeat": repeat}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "numpy": np.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_suite(selected=None, repeat=DEFAULT_REPEAT, output=sys.stdout):
+    results = {}
+    for name, (setup, self_timed) in CASES.items():
+        if selected and selected not in name:
+            continue
+        result = results[name] = (measure_self_timed if self_timed else measure)(setup(), repeat)
+        print(f"{name:<36} {format_time(result['median_s']):>10}  (min {format_time(result['min_s'])})",
+              file=output)
+    return {"environment": environment(), "results": results}
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Rows of (name, baseline, current, ratio, regressed) for cases in both runs"""
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        rows.append((name, before["median_s"], result["median_s"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="time every case")
+    run_parser.add_argument("--output", "-o", help="JSON file to write the results to")
+    run_parser.add_argument("--filter", "-k", help="only cases whose name contains this text")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    compare_parser = commands.add_parser("compare", help="flag cases that got slower")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed slowdown as a fraction (default %(default)s)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.filter, args.repeat)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for name, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<36} {format_time(before):>10} → {format_time(after):>10}  {ratio:5.2f}×  {flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} of {len(rows)} cases slower by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
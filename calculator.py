@@ -1,18 +1,46 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, colorchooser, filedialog
-import math
-import cmath
 import numpy as np
-from scipy import stats
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import re
+import argparse
 import json
 import os
+import time
 from datetime import datetime
-
-class FX991EXCalculator:
+from matrix_ops import MatrixRegister
+from equation_solver import solve_polynomial, solve_linear_system, solve_inequality, format_intervals
+from expression import format_result
+from base_n import BASES, format_base
+from units import CONSTANTS, CONVERSIONS
+from spreadsheet import Spreadsheet, cell_name, column_name
+from profiling import timed
+from display_model import DisplayModel
+from keymap import KEYBOARD_LAYOUT
+from calculator_core import CalculatorCore
+from macros import bind as bind_macro, load_macro, replay_headless, save_macro
+from session import Snapshot, restore_snapshot, save_snapshot
+from themes import (
+    KEY_ROLES, ROLES, THEMES, ThemeRegistry, load_theme, load_user_themes, save_theme,
+    theme_signature
+)
+
+# Spreadsheet grid geometry in pixels
+SHEET_CELL_WIDTH = 70
+SHEET_CELL_HEIGHT = 20
+SHEET_HEADER_WIDTH = 40
+
+# Pause in typing after which the live result is evaluated
+PREVIEW_DELAY_MS = 120
+# Replay speeds offered in the Macro menu, in key presses per second
+MACRO_RATES = (2, 5, 10, 25, 100)
+# How often the theme directory is checked for edited theme files
+THEME_POLL_MS = 1000
+# The session is kept here on exit and restored on the next start
+SESSION_FILE = "calculator_session.npz"
+
+
+class FX991EXCalculator(CalculatorCore):
     def __init__(self, root):
+        self.startup_started = time.perf_counter()
         self.root = root
         self.root.title("Casio fx-991EX ClassWiz Advanced")
         self.root.geometry("380x700")
@@ -24,117 +52,54 @@ class FX991EXCalculator:
         # Load settings or use defaults
         self.load_settings()
 
-        # Application state
-        self.current_input = ""
-        self.result_shown = False
-        self.shift_active = False
-        self.alpha_active = False
-        self.angle_mode = self.settings.get("angle_mode", "DEG")  # DEG, RAD, GRAD
-        self.calculation_mode = self.settings.get("calculation_mode", "COMP")  # COMP, STAT, etc.
-        self.decimal_places = self.settings.get("decimal_places", 10)
-        self.ans = 0
-        self.memory = 0
-        self.memories = {"A": 0, "B": 0, "C": 0, "D": 0, "E": 0, "F": 0}
-        self.history = []
-        self.max_history = 50
-        self.display_line1 = ""
-        self.display_line2 = "0"
+        # Calculator state and key handling
+        super().__init__(self.settings)
+        
+        # Window state
         self.qr_visible = False
         self.stat_data = []
-        self.matrix_data = {"A": np.zeros((2, 2)), "B": np.zeros((2, 2)), "C": np.zeros((2, 2))}
-        self.matrix_dims = {"A": (2, 2), "B": (2, 2), "C": (2, 2)}
+        self.matrices = {"A": MatrixRegister(2, 2), "B": MatrixRegister(2, 2), "C": MatrixRegister(2, 2)}
         self.equation_coefficients = []
+        self.spreadsheet = Spreadsheet(angle_mode=self.angle_mode)
+        self.display_model = DisplayModel()
+        self.display_state = None
+        self.display_pending = None
+        self.preview_pending = None
+        self.recorded_macro = []
+        self.macro_player = None
+        self.macro_job = None
+        self.macro_handlers = bind_macro(self)
+        self.qr_frame = None
+        self.history_window = None
+        self.preferences_window = None
+        
+        # Continue where the last run left off
+        self.session_snapshot = None
+        if os.path.exists(SESSION_FILE):
+            try:
+                self.restore_session(SESSION_FILE)
+                self.spreadsheet.set_angle_mode(self.angle_mode)
+            except Exception as e:
+                print(f"Error restoring session: {e}")
         
-        # Themes
-        self.themes = {
-            "Default": {
-                "bg_main": "#f0f0f0",
-                "bg_display": "#ffffff",
-                "fg_display": "#000000",
-                "bg_button": "#e0e0e0",
-                "fg_button": "#000000",
-                "bg_number": "#ffffff",
-                "fg_number": "#000000",
-                "bg_function": "#d0d0d0",
-                "fg_function": "#000000",
-                "bg_operator": "#ffcc99",
-                "fg_operator": "#000000",
-                "bg_command": "#b0c4de",
-                "fg_command": "#000000",
-                "bg_equals": "#ff6666",
-                "fg_equals": "#ffffff",
-                "shift_color": "#ff9900",
-                "alpha_color": "#009900"
-            },
-            "Dark": {
-                "bg_main": "#2c2c2c",
-                "bg_display": "#1c1c1c",
-                "fg_display": "#ffffff",
-                "bg_button": "#3c3c3c",
-                "fg_button": "#ffffff",
-                "bg_number": "#4c4c4c",
-                "fg_number": "#ffffff",
-                "bg_function": "#505050",
-                "fg_function": "#ffffff",
-                "bg_operator": "#ff9966",
-                "fg_operator": "#000000",
-                "bg_command": "#6699cc",
-                "fg_command": "#ffffff",
-                "bg_equals": "#cc3333",
-                "fg_equals": "#ffffff",
-                "shift_color": "#ffcc66",
-                "alpha_color": "#99cc99"
-            },
-            "Blue": {
-                "bg_main": "#d4e6f1",
-                "bg_display": "#f5f8fa",
-                "fg_display": "#1a5276",
-                "bg_button": "#d6eaf8",
-                "fg_button": "#1a5276",
-                "bg_number": "#eaf2f8",
-                "fg_number": "#1a5276",
-                "bg_function": "#aed6f1",
-                "fg_function": "#154360",
-                "bg_operator": "#3498db",
-                "fg_operator": "#ffffff",
-                "bg_command": "#2980b9",
-                "fg_command": "#ffffff",
-                "bg_equals": "#2471a3",
-                "fg_equals": "#ffffff",
-                "shift_color": "#f39c12",
-                "alpha_color": "#27ae60"
-            },
-            "Vintage": {
-                "bg_main": "#f5eacb",
-                "bg_display": "#fef9e7",
-                "fg_display": "#784212",
-                "bg_button": "#f8efd4",
-                "fg_button": "#784212",
-                "bg_number": "#fcf3cf",
-                "fg_number": "#784212",
-                "bg_function": "#f5cba7",
-                "fg_function": "#784212",
-                "bg_operator": "#d35400",
-                "fg_operator": "#ffffff",
-                "bg_command": "#b9770e",
-                "fg_command": "#ffffff",
-                "bg_equals": "#a04000",
-                "fg_equals": "#ffffff",
-                "shift_color": "#ba4a00",
-                "alpha_color": "#196f3d"
-            }
-        }
+        # Themes: the built-in ones plus the user's JSON themes
+        self.themes = dict(THEMES)
+        self.themes.update(load_user_themes())
+        self.theme_files = theme_signature()
         
-        # Use current theme
+        # Use current theme; every themed widget registers its roles here
         self.current_theme = self.settings.get("theme", "Default")
+        if self.current_theme not in self.themes:
+            self.current_theme = "Default"
         self.theme = self.themes[self.current_theme]
+        self.styles = ThemeRegistry(self.theme)
+        self.theme_editor = None
         
         # Create UI elements
         self.create_display()
         self.create_indicators()
         self.create_keyboard()
         self.create_menu()
-        self.create_qr_display()
         self.create_status_bar()
         
         # Initial window size setup
@@ -143,9 +108,21 @@ class FX991EXCalculator:
         
         # Bind keyboard keys
         self.bind_keyboard_keys()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_calculator)
+        if self.current_input:
+            self.refresh_input()
         
         # Apply theme
         self.apply_theme()
+        self.root.after(0, self.measure_first_paint)
+        self.root.after(THEME_POLL_MS, self.watch_themes)
+
+    def measure_first_paint(self):
+        """Record the time from start-up until the window is first drawn"""
+        self.root.update_idletasks()
+        elapsed = time.perf_counter() - self.startup_started
+        self.latency.record("first_paint", elapsed)
+        self.show_status(f"Ready ({elapsed * 1000:.0f} ms)")
 
     def load_settings(self):
         """Load user settings from file"""
@@ -182,7 +159,9 @@ class FX991EXCalculator:
                 "decimal_places": self.decimal_places,
                 "theme": self.current_theme,
                 "fullscreen": self.root.attributes("-fullscreen"),
-                "history_enabled": self.settings.get("history_enabled", True)
+                "history_enabled": self.settings.get("history_enabled", True),
+                "live_preview": self.preview_enabled,
+                "macro_rate": self.macro_rate_var.get()
             }
             with open("calculator_settings.json", "w") as f:
                 json.dump(settings_to_save, f)
@@ -191,50 +170,45 @@ class FX991EXCalculator:
 
     def create_display(self):
         """Create the calculator display area with enhanced visuals"""
-        display_frame = tk.Frame(self.root, bg=self.theme["bg_main"], bd=2, relief=tk.RIDGE)
+        display_frame = self.themed(tk.Frame(self.root, bd=2, relief=tk.RIDGE), bg="bg_main")
         display_frame.pack(pady=10, padx=10, fill=tk.BOTH)
 
         # Input history display
-        self.input_display = tk.Label(
+        self.input_display = self.themed(tk.Label(
             display_frame, 
             text="", 
             font=("Consolas", 12), 
-            bg=self.theme["bg_display"], 
-            fg=self.theme["fg_display"], 
             anchor="e", 
             justify="right",
             height=1,
             padx=5
-        )
+        ), bg="bg_display", fg="fg_display")
         self.input_display.pack(fill=tk.X, padx=5, pady=(5, 0))
 
         # Main display
-        self.main_display = tk.Label(
+        self.main_display = self.themed(tk.Label(
             display_frame, 
             text="0", 
             font=("Consolas", 24, "bold"), 
-            bg=self.theme["bg_display"], 
-            fg=self.theme["fg_display"], 
             anchor="e", 
             justify="right",
             height=2,
             padx=5
-        )
+        ), bg="bg_display", fg="fg_display")
         self.main_display.pack(fill=tk.BOTH, padx=5, pady=(0, 5))
         
         # Secondary info display
-        self.info_frame = tk.Frame(display_frame, bg=self.theme["bg_display"])
+        self.info_frame = self.themed(tk.Frame(display_frame), bg="bg_display")
         self.info_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
         
-        self.secondary_display = tk.Label(
+        self.secondary_display = self.themed(tk.Label(
             self.info_frame,
             text="",
             font=("Consolas", 10),
-            bg=self.theme["bg_display"],
             fg="#666666",
             anchor="w",
             padx=5
-        )
+        ), bg="bg_display")
         self.secondary_display.pack(side=tk.LEFT)
         
         # Add visual calculator mode indicator
@@ -250,51 +224,62 @@ class FX991EXCalculator:
             bd=0
         )
         self.mode_badge.pack(side=tk.RIGHT, padx=(0, 5))
+        
+        # Live result while typing, switched on from the View menu
+        self.preview_display = self.themed(tk.Label(
+            self.info_frame,
+            text="",
+            font=("Consolas", 10),
+            fg="#666666",
+            anchor="e",
+            padx=5
+        ), bg="bg_display")
+        self.preview_display.pack(side=tk.RIGHT)
+        self.live_preview_var = tk.BooleanVar(value=self.preview_enabled)
+        self.macro_rate_var = tk.IntVar(value=self.settings.get("macro_rate", 10))
 
     def create_indicators(self):
         """Create status indicators for calculator modes with improved visuals"""
-        indicator_frame = tk.Frame(self.root, bg=self.theme["bg_main"])
+        indicator_frame = self.themed(tk.Frame(self.root), bg="bg_main")
         indicator_frame.pack(padx=10, pady=(0, 5), fill=tk.X)
 
         # Left indicators
-        left_frame = tk.Frame(indicator_frame, bg=self.theme["bg_main"])
+        left_frame = self.themed(tk.Frame(indicator_frame), bg="bg_main")
         left_frame.pack(side=tk.LEFT)
         
         # Create indicator badges
-        self.shift_indicator = tk.Label(
+        self.shift_indicator = self.themed(tk.Label(
             left_frame, text="SHIFT", 
-            fg="#aaaaaa", bg=self.theme["bg_main"], 
+            fg="#aaaaaa",
             font=("Arial", 9, "bold"),
             padx=5, pady=1,
             relief=tk.FLAT
-        )
+        ), bg="bg_main")
         self.shift_indicator.pack(side=tk.LEFT, padx=2)
 
-        self.alpha_indicator = tk.Label(
+        self.alpha_indicator = self.themed(tk.Label(
             left_frame, text="ALPHA", 
-            fg="#aaaaaa", bg=self.theme["bg_main"], 
+            fg="#aaaaaa",
             font=("Arial", 9, "bold"),
             padx=5, pady=1,
             relief=tk.FLAT
-        )
+        ), bg="bg_main")
         self.alpha_indicator.pack(side=tk.LEFT, padx=2)
 
         # Right indicators
-        right_frame = tk.Frame(indicator_frame, bg=self.theme["bg_main"])
+        right_frame = self.themed(tk.Frame(indicator_frame), bg="bg_main")
         right_frame.pack(side=tk.RIGHT)
         
-        self.mode_indicator = tk.Label(
+        self.mode_indicator = self.themed(tk.Label(
             right_frame, text=self.calculation_mode, 
-            fg=self.theme["fg_button"], bg=self.theme["bg_main"], 
             font=("Arial", 9, "bold")
-        )
+        ), fg="fg_button", bg="bg_main")
         self.mode_indicator.pack(side=tk.RIGHT, padx=5)
 
-        self.angle_indicator = tk.Label(
+        self.angle_indicator = self.themed(tk.Label(
             right_frame, text=self.angle_mode, 
-            fg=self.theme["fg_button"], bg=self.theme["bg_main"], 
             font=("Arial", 9)
-        )
+        ), fg="fg_button", bg="bg_main")
         self.angle_indicator.pack(side=tk.RIGHT, padx=5)
 
     def create_keyboard(self):
@@ -304,78 +289,34 @@ class FX991EXCalculator:
         self.keyboard_notebook.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
         
         # Main keyboard tab
-        main_keyboard_frame = tk.Frame(self.keyboard_notebook, bg=self.theme["bg_main"])
+        main_keyboard_frame = self.themed(tk.Frame(self.keyboard_notebook), bg="bg_main")
         self.keyboard_notebook.add(main_keyboard_frame, text="Main")
         
-        # Button styling
-        btn_colors = {
-            "default": {"bg": self.theme["bg_button"], "fg": self.theme["fg_button"]},
-            "number": {"bg": self.theme["bg_number"], "fg": self.theme["fg_number"]},
-            "function": {"bg": self.theme["bg_function"], "fg": self.theme["fg_function"]},
-            "operator": {"bg": self.theme["bg_operator"], "fg": self.theme["fg_operator"]},
-            "command": {"bg": self.theme["bg_command"], "fg": self.theme["fg_command"]},
-            "equals": {"bg": self.theme["bg_equals"], "fg": self.theme["fg_equals"]},
-            "memory": {"bg": self.theme["bg_function"], "fg": self.theme["fg_function"]}
-        }
-
         # Button definitions [text, button_type, shift_text, alpha_text]
-        buttons = [
-            [("SHIFT", "command", "", ""), ("ALPHA", "command", "", ""), ("MODE", "command", "SET UP", ""), 
-             ("DEL", "function", "INS", ""), ("AC", "function", "OFF", "")],
-            
-            [("x⁻¹", "function", "x!", "A"), ("√", "function", "∛", "B"), 
-             ("x²", "function", "x³", "C"), ("^", "function", "log₂", "D"), 
-             ("log", "function", "10^", "E")],
-            
-            [("ln", "function", "e^", "F"), ("(−)", "function", "°'\"", "G"), 
-             ("hyp", "function", "d/c", "H"), ("sin", "function", "sin⁻¹", "I"), 
-             ("cos", "function", "cos⁻¹", "J")],
-            
-            [("tan", "function", "tan⁻¹", "K"), ("RCL", "memory", "STO", "L"), 
-             ("ENG", "function", "FIX", "M"), ("(", "function", "{", "N"), 
-             (")", "function", "}", "O")],
-            
-            [("7", "number", "π", "P"), ("8", "number", "e", "Q"), 
-             ("9", "number", "j", "R"), ("DEL", "function", "INS", "S"), 
-             ("AC", "function", "OFF", "T")],
-            
-            [("4", "number", "∠", "U"), ("5", "number", "i", "V"), 
-             ("6", "number", ":", "W"), ("×", "operator", "%", "X"), 
-             ("÷", "operator", "mod", "Y")],
-            
-            [("1", "number", "⏎", "Z"), ("2", "number", "□", "space"), 
-             ("3", "number", "$", ","), ("−", "operator", "m", ":"), 
-             ("+", "operator", "M", ";")],
-            
-            [("0", "number", "∞", "."), (".", "number", "Ran#", "="), 
-             ("×10^", "function", "Abs", "+"), ("Ans", "function", "DRG", "-"), 
-             ("=", "equals", "⇒", "?")]
-        ]
+        buttons = KEYBOARD_LAYOUT
 
         # Create buttons with improved appearance
         self.button_widgets = {}
         
         for i, row in enumerate(buttons):
             for j, (text, btn_type, shift_text, alpha_text) in enumerate(row):
+                bg_role, fg_role = KEY_ROLES[btn_type]
+                
                 # Create button frame to hold main text and smaller shift/alpha text
-                btn_frame = tk.Frame(
+                btn_frame = self.themed(tk.Frame(
                     main_keyboard_frame, 
-                    bg=btn_colors[btn_type]["bg"], 
                     bd=1, 
                     relief=tk.RAISED,
                     highlightbackground="#cccccc",
                     highlightthickness=1
-                )
+                ), bg=bg_role)
                 btn_frame.grid(row=i, column=j, padx=2, pady=2, sticky="nsew")
                 
                 # Button with main text
-                btn = tk.Button(
+                btn = self.themed(tk.Button(
                     btn_frame, 
                     text=text, 
                     font=("Arial", 12, "bold"), 
-                    bg=btn_colors[btn_type]["bg"],
-                    fg=btn_colors[btn_type]["fg"],
-                    activebackground=self.get_active_color(btn_colors[btn_type]["bg"]),
                     bd=0,
                     highlightthickness=0,
                     relief=tk.FLAT,
@@ -383,29 +324,26 @@ class FX991EXCalculator:
                     pady=3,
                     cursor="hand2",
                     command=lambda t=text: self.button_click(t)
-                )
+                ), bg=bg_role, fg=fg_role, activebackground=f"active:{bg_role}",
+                    disabledforeground=f"disabled:{fg_role}")
                 btn.pack(expand=True, fill=tk.BOTH)
                 
                 # Add shift text if applicable
                 if shift_text:
-                    shift_label = tk.Label(
+                    shift_label = self.themed(tk.Label(
                         btn_frame, 
                         text=shift_text, 
-                        font=("Arial", 7), 
-                        bg=btn_colors[btn_type]["bg"],
-                        fg=self.theme["shift_color"]
-                    )
+                        font=("Arial", 7)
+                    ), bg=bg_role, fg="shift_color")
                     shift_label.place(x=2, y=2)
                 
                 # Add alpha text if applicable
                 if alpha_text:
-                    alpha_label = tk.Label(
+                    alpha_label = self.themed(tk.Label(
                         btn_frame, 
                         text=alpha_text, 
-                        font=("Arial", 7), 
-                        bg=btn_colors[btn_type]["bg"],
-                        fg=self.theme["alpha_color"]
-                    )
+                        font=("Arial", 7)
+                    ), bg=bg_role, fg="alpha_color")
                     alpha_label.place(x=2, y=18)
                 
                 self.button_widgets[text] = btn
@@ -416,15 +354,43 @@ class FX991EXCalculator:
         for j in range(5):
             main_keyboard_frame.grid_columnconfigure(j, weight=1)
             
-        # Add additional keyboard tabs
-        self.create_scientific_keyboard()
-        self.create_matrix_keyboard()
-        self.create_equation_keyboard()
+        # The other tabs are added empty and built the first time they are shown
+        self.tab_frames = {}
+        self.tab_builders = {}
+        for name, builder in (
+            ("Scientific", self.create_scientific_keyboard),
+            ("Matrix", self.create_matrix_keyboard),
+            ("Equation", self.create_equation_keyboard),
+            ("BASE-N", self.create_base_n_keyboard),
+            ("Sheet", self.create_spreadsheet_keyboard),
+            ("Graph", self.create_graph_tab),
+        ):
+            frame = self.themed(tk.Frame(self.keyboard_notebook), bg="bg_main")
+            self.keyboard_notebook.add(frame, text=name)
+            self.tab_frames[name] = frame
+            self.tab_builders[name] = builder
+        self.keyboard_notebook.bind("<<NotebookTabChanged>>", self.on_keyboard_tab_changed)
+
+    def on_keyboard_tab_changed(self, event=None):
+        """Build the selected tab if it is shown for the first time"""
+        selected = self.keyboard_notebook.select()
+        if selected:
+            self.build_tab(self.keyboard_notebook.tab(selected, "text"))
+
+    def build_tab(self, name):
+        """Build a keyboard tab once, recording how long it took"""
+        builder = self.tab_builders.pop(name, None)
+        if builder is None:
+            return
+        start = time.perf_counter()
+        builder(self.tab_frames[name])
+        self.latency.record(f"build_tab {name}", time.perf_counter() - start)
+
+    def tab_built(self, name):
+        return name not in self.tab_builders
 
-    def create_scientific_keyboard(self):
+    def create_scientific_keyboard(self, sci_keyboard_frame):
         """Create a tab with advanced scientific functions"""
-        sci_keyboard_frame = tk.Frame(self.keyboard_notebook, bg=self.theme["bg_main"])
-        self.keyboard_notebook.add(sci_keyboard_frame, text="Scientific")
         
         # Scientific functions
         scientific_buttons = [
@@ -434,25 +400,23 @@ class FX991EXCalculator:
             [("gcd", "function"), ("lcm", "function"), ("mod", "function"), ("floor", "function"), ("ceil", "function")],
             [("sin⁻¹", "function"), ("cos⁻¹", "function"), ("tan⁻¹", "function"), ("log₂", "function"), ("logₓ", "function")],
             [("e^x", "function"), ("10^x", "function"), ("x^3", "function"), ("∛", "function"), ("Pol(", "function")],
-            [("Rec(", "function"), ("→r∠θ", "function"), ("→a+bi", "function"), ("arg", "function"), ("conj", "function")]
+            [("Rec(", "function"), ("→r∠θ", "function"), ("→a+bi", "function"), ("arg", "function"), ("conj", "function")],
+            [("x", "function"), ("SOLVE", "function"), ("i", "function"), ("∠", "function")]
         ]
         
         for i, row in enumerate(scientific_buttons):
             for j, (text, btn_type) in enumerate(row):
-                btn = tk.Button(
+                btn = self.themed(tk.Button(
                     sci_keyboard_frame, 
                     text=text, 
                     font=("Arial", 11), 
-                    bg=self.theme["bg_function"],
-                    fg=self.theme["fg_function"],
-                    activebackground=self.get_active_color(self.theme["bg_function"]),
                     relief=tk.RAISED,
                     bd=1,
                     padx=3,
                     pady=8,
                     cursor="hand2",
                     command=lambda t=text: self.scientific_function(t)
-                )
+                ), bg="bg_function", fg="fg_function", activebackground="active:bg_function")
                 btn.grid(row=i, column=j, padx=2, pady=2, sticky="nsew")
                 
                 # Add to widgets dictionary
@@ -464,53 +428,59 @@ class FX991EXCalculator:
         for j in range(5):
             sci_keyboard_frame.grid_columnconfigure(j, weight=1)
 
-    def create_matrix_keyboard(self):
+    def create_matrix_keyboard(self, matrix_keyboard_frame):
         """Create a tab for matrix operations"""
-        matrix_keyboard_frame = tk.Frame(self.keyboard_notebook, bg=self.theme["bg_main"])
-        self.keyboard_notebook.add(matrix_keyboard_frame, text="Matrix")
         
         # Matrix selector
-        matrix_select_frame = tk.Frame(matrix_keyboard_frame, bg=self.theme["bg_main"])
+        matrix_select_frame = self.themed(tk.Frame(matrix_keyboard_frame), bg="bg_main")
         matrix_select_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Label(matrix_select_frame, text="Select Matrix:", bg=self.theme["bg_main"]).pack(side=tk.LEFT)
+        self.themed(tk.Label(matrix_select_frame, text="Select Matrix:"), bg="bg_main").pack(side=tk.LEFT)
         
         self.matrix_var = tk.StringVar(value="A")
         matrices = ["A", "B", "C"]
         for matrix in matrices:
-            rb = tk.Radiobutton(
+            rb = self.themed(tk.Radiobutton(
                 matrix_select_frame, 
                 text=matrix, 
                 variable=self.matrix_var, 
                 value=matrix,
-                bg=self.theme["bg_main"],
-                command=self.update_matrix_display
-            )
+                command=self.select_matrix
+            ), bg="bg_main")
             rb.pack(side=tk.LEFT, padx=10)
         
         # Matrix dimensions
-        dim_frame = tk.Frame(matrix_keyboard_frame, bg=self.theme["bg_main"])
+        dim_frame = self.themed(tk.Frame(matrix_keyboard_frame), bg="bg_main")
         dim_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Label(dim_frame, text="Rows:", bg=self.theme["bg_main"]).pack(side=tk.LEFT)
+        self.themed(tk.Label(dim_frame, text="Rows:"), bg="bg_main").pack(side=tk.LEFT)
         self.rows_var = tk.IntVar(value=2)
         rows_spin = tk.Spinbox(dim_frame, from_=1, to=4, width=3, textvariable=self.rows_var, command=self.resize_matrix)
         rows_spin.pack(side=tk.LEFT, padx=5)
         
-        tk.Label(dim_frame, text="Columns:", bg=self.theme["bg_main"]).pack(side=tk.LEFT, padx=(10, 0))
+        self.themed(tk.Label(dim_frame, text="Columns:"), bg="bg_main").pack(side=tk.LEFT, padx=(10, 0))
         self.cols_var = tk.IntVar(value=2)
         cols_spin = tk.Spinbox(dim_frame, from_=1, to=4, width=3, textvariable=self.cols_var, command=self.resize_matrix)
         cols_spin.pack(side=tk.LEFT, padx=5)
         
         # Matrix display area
-        self.matrix_display_frame = tk.Frame(matrix_keyboard_frame, bg=self.theme["bg_main"])
+        self.matrix_display_frame = self.themed(tk.Frame(matrix_keyboard_frame), bg="bg_main")
         self.matrix_display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Matrix entries
+        # Matrix entries (a pool of Entry widgets reused across registers)
+        self.matrix_entry_grid = self.themed(tk.Frame(self.matrix_display_frame), bg="bg_main")
+        self.matrix_entry_grid.pack()
         self.matrix_entries = []
+        self.matrix_visible_dims = (0, 0)
+        
+        self.themed(tk.Button(
+            self.matrix_display_frame,
+            text="Update Matrix",
+            command=self.update_matrix_values,
+        ), bg="bg_command", fg="fg_command").pack(pady=5)
         
         # Matrix operations
-        op_frame = tk.Frame(matrix_keyboard_frame, bg=self.theme["bg_main"])
+        op_frame = self.themed(tk.Frame(matrix_keyboard_frame), bg="bg_main")
         op_frame.pack(fill=tk.X, padx=10, pady=5)
         
         matrix_ops = [
@@ -518,86 +488,419 @@ class FX991EXCalculator:
             ("Inv", self.matrix_inverse),
             ("Trans", self.matrix_transpose),
             ("A×B", self.matrix_multiply),
-            ("Solve", self.matrix_solve)
+            ("Solve", self.matrix_solve),
+            ("Rank", self.matrix_rank)
         ]
         
         for text, cmd in matrix_ops:
-            btn = tk.Button(
+            btn = self.themed(tk.Button(
                 op_frame,
                 text=text,
                 font=("Arial", 10),
-                bg=self.theme["bg_function"],
-                fg=self.theme["fg_function"],
                 command=cmd,
                 padx=5,
                 pady=5
-            )
+            ), bg="bg_function", fg="fg_function")
             btn.pack(side=tk.LEFT, padx=5)
         
+        # Reusable MatAns panel for operation results
+        self.mat_ans = None
+        self.mat_ans_frame = self.themed(tk.Frame(matrix_keyboard_frame, bd=1, relief=tk.GROOVE), bg="bg_main")
+        self.mat_ans_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.mat_ans_title = self.themed(tk.Label(
+            self.mat_ans_frame,
+            text="MatAns",
+            font=("Arial", 11, "bold"),
+        ), bg="bg_main")
+        self.mat_ans_title.pack(pady=(5, 0))
+        
+        self.mat_ans_grid = self.themed(tk.Frame(self.mat_ans_frame), bg="bg_main")
+        self.mat_ans_grid.pack(pady=5)
+        self.mat_ans_cells = []
+        self.mat_ans_visible_dims = (0, 0)
+        
         # Initialize matrix display
-        self.update_matrix_display()
+        self.select_matrix()
 
-    def create_equation_keyboard(self):
+    def create_equation_keyboard(self, equation_frame):
         """Create a tab for equation solving"""
-        equation_frame = tk.Frame(self.keyboard_notebook, bg=self.theme["bg_main"])
-        self.keyboard_notebook.add(equation_frame, text="Equation")
         
         # Equation type selector
-        eq_type_frame = tk.Frame(equation_frame, bg=self.theme["bg_main"])
+        eq_type_frame = self.themed(tk.Frame(equation_frame), bg="bg_main")
         eq_type_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Label(eq_type_frame, text="Equation Type:", bg=self.theme["bg_main"]).pack(side=tk.LEFT)
+        self.themed(tk.Label(eq_type_frame, text="Equation Type:"), bg="bg_main").pack(side=tk.LEFT)
         
         self.eq_type_var = tk.StringVar(value="Linear")
         eq_types = [("Linear", "Linear"), ("Quadratic", "Quadratic"), ("Cubic", "Cubic"), ("System 2×2", "System2"), ("System 3×3", "System3")]
         for text, value in eq_types:
-            rb = tk.Radiobutton(
+            rb = self.themed(tk.Radiobutton(
                 eq_type_frame, 
                 text=text, 
                 variable=self.eq_type_var, 
                 value=value,
-                bg=self.theme["bg_main"],
                 command=self.update_equation_interface
-            )
+            ), bg="bg_main")
             rb.pack(side=tk.LEFT, padx=10)
         
+        # Generic degree-n polynomial and n×n system
+        eq_size_frame = self.themed(tk.Frame(equation_frame), bg="bg_main")
+        eq_size_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        
+        for text, value in [("Polynomial", "Polynomial"), ("System n×n", "SystemN"), ("INEQ", "Inequality")]:
+            rb = self.themed(tk.Radiobutton(
+                eq_size_frame,
+                text=text,
+                variable=self.eq_type_var,
+                value=value,
+                command=self.update_equation_interface
+            ), bg="bg_main")
+            rb.pack(side=tk.LEFT, padx=10)
+        
+        self.themed(tk.Label(eq_size_frame, text="n:"), bg="bg_main").pack(side=tk.LEFT, padx=(10, 0))
+        self.eq_size_var = tk.IntVar(value=4)
+        self.ineq_op_var = tk.StringVar(value=">")
+        eq_size_spin = tk.Spinbox(
+            eq_size_frame,
+            from_=1,
+            to=10,
+            width=3,
+            textvariable=self.eq_size_var,
+            command=self.update_equation_interface
+        )
+        eq_size_spin.pack(side=tk.LEFT, padx=5)
+        
         # Equation coefficients area
-        self.eq_display_frame = tk.Frame(equation_frame, bg=self.theme["bg_main"])
+        self.eq_display_frame = self.themed(tk.Frame(equation_frame), bg="bg_main")
         self.eq_display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
         # Equation operations
-        op_frame = tk.Frame(equation_frame, bg=self.theme["bg_main"])
+        op_frame = self.themed(tk.Frame(equation_frame), bg="bg_main")
         op_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        solve_btn = tk.Button(
+        solve_btn = self.themed(tk.Button(
             op_frame,
             text="Solve Equation",
             font=("Arial", 12, "bold"),
-            bg=self.theme["bg_equals"],
-            fg=self.theme["fg_equals"],
             command=self.solve_equation,
             padx=10,
             pady=5
-        )
+        ), bg="bg_equals", fg="fg_equals")
         solve_btn.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         
+        # Solution display
+        self.eq_result_label = self.themed(tk.Label(
+            equation_frame,
+            text="",
+            font=("Arial", 12),
+            justify=tk.LEFT
+        ), bg="bg_main")
+        self.eq_result_label.pack(fill=tk.X, padx=10, pady=5)
+        
         # Initialize equation interface
         self.update_equation_interface()
 
+    def create_base_n_keyboard(self, base_n_frame):
+        """Create a tab for BASE-N integer and logic operations"""
+        
+        # Base selector
+        base_select_frame = self.themed(tk.Frame(base_n_frame), bg="bg_main")
+        base_select_frame.grid(row=0, column=0, columnspan=5, sticky="ew", pady=5)
+        
+        self.base_var = tk.StringVar(value="DEC")
+        for name in BASES:
+            rb = self.themed(tk.Radiobutton(
+                base_select_frame,
+                text=name,
+                variable=self.base_var,
+                value=name,
+                command=self.change_base
+            ), bg="bg_main")
+            rb.pack(side=tk.LEFT, padx=10)
+        
+        base_n_buttons = [
+            ["A", "B", "C", "D", "E"],
+            ["F", "and", "or", "xor", "xnor"],
+            ["not", "neg", "<<", ">>", "÷"]
+        ]
+        
+        for i, row in enumerate(base_n_buttons, start=1):
+            for j, text in enumerate(row):
+                btn = self.themed(tk.Button(
+                    base_n_frame,
+                    text=text,
+                    font=("Arial", 11),
+                    relief=tk.RAISED,
+                    bd=1,
+                    padx=3,
+                    pady=8,
+                    cursor="hand2",
+                    command=lambda t=text: self.base_n_input(t)
+                ), bg="bg_function", fg="fg_function")
+                btn.grid(row=i, column=j, padx=2, pady=2, sticky="nsew")
+            base_n_frame.grid_rowconfigure(i, weight=1)
+        
+        for j in range(5):
+            base_n_frame.grid_columnconfigure(j, weight=1)
+
+    def base_n_input(self, text):
+        """Insert a hex digit or logic operator in BASE-N mode"""
+        if self.calculation_mode != "BASE-N":
+            self.set_calculation_mode("BASE-N")
+        if self.result_shown and text in "ABCDEF":
+            self.buffer.clear()
+        self.result_shown = False
+        
+        # Words are spaced so that hex digits next to them stay separate
+        self.buffer.insert(text if len(text) == 1 else f" {text} ")
+        self.refresh_input()
+
+    def change_base(self):
+        """Switch the BASE-N display base, converting the shown result"""
+        if self.calculation_mode != "BASE-N":
+            self.set_calculation_mode("BASE-N")
+        self.base = self.base_var.get()
+        if self.result_shown and isinstance(self.ans, int):
+            self.display_line2 = format_base(self.ans, BASES[self.base])
+        self.update_display()
+
+    def create_spreadsheet_keyboard(self, sheet_frame):
+        """Create a spreadsheet tab whose grid only draws the visible cells"""
+        
+        # Formula bar
+        formula_frame = self.themed(tk.Frame(sheet_frame), bg="bg_main")
+        formula_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.sheet_cell_label = self.themed(tk.Label(formula_frame, text="A1", width=6), bg="bg_main")
+        self.sheet_cell_label.pack(side=tk.LEFT)
+        
+        self.sheet_formula_var = tk.StringVar()
+        formula_entry = tk.Entry(formula_frame, textvariable=self.sheet_formula_var)
+        formula_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        formula_entry.bind("<Return>", lambda e: self.commit_sheet_cell())
+        
+        self.themed(tk.Button(
+            formula_frame,
+            text="Enter",
+            command=self.commit_sheet_cell,
+        ), bg="bg_command", fg="fg_command").pack(side=tk.LEFT)
+        
+        # Recalculation cost of the last edit
+        self.sheet_timing_label = self.themed(tk.Label(
+            sheet_frame,
+            text="Recalc: -",
+            font=("Arial", 8),
+            anchor="w"
+        ), bg="bg_main")
+        self.sheet_timing_label.pack(fill=tk.X, padx=5)
+        
+        grid_frame = self.themed(tk.Frame(sheet_frame), bg="bg_main")
+        grid_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.sheet_canvas = tk.Canvas(grid_frame, bg="white", highlightthickness=0)
+        self.sheet_vbar = tk.Scrollbar(grid_frame, orient=tk.VERTICAL, command=self.sheet_yview)
+        self.sheet_hbar = tk.Scrollbar(grid_frame, orient=tk.HORIZONTAL, command=self.sheet_xview)
+        self.sheet_vbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.sheet_hbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.sheet_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # The canvas holds a fixed pool of items sized to the window; scrolling
+        # moves the sheet origin and rewrites their text instead of drawing
+        # the whole sheet
+        self.sheet_top = 0
+        self.sheet_left = 0
+        self.sheet_selected = (0, 0)
+        self.sheet_cells = []
+        self.sheet_row_headers = []
+        self.sheet_col_headers = []
+        self.sheet_visible_dims = (0, 0)
+        
+        self.sheet_canvas.bind("<Configure>", lambda e: self.render_sheet())
+        self.sheet_canvas.bind("<Button-1>", self.sheet_click)
+        self.sheet_canvas.bind("<MouseWheel>", lambda e: self.sheet_yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.sheet_canvas.bind("<Button-4>", lambda e: self.sheet_yview("scroll", -1, "units"))
+        self.sheet_canvas.bind("<Button-5>", lambda e: self.sheet_yview("scroll", 1, "units"))
+
+    def _sheet_item(self, x, y, width, fill):
+        rect = self.sheet_canvas.create_rectangle(x, y, x + width, y + SHEET_CELL_HEIGHT, fill=fill, outline="#cccccc")
+        text = self.sheet_canvas.create_text(x + width - 3, y + SHEET_CELL_HEIGHT // 2, anchor="e", font=("Arial", 8))
+        return [rect, text, None, fill]
+
+    def _ensure_sheet_pool(self, rows, cols):
+        """Grow the canvas item pool to cover rows x cols visible cells"""
+        w, h, hw = SHEET_CELL_WIDTH, SHEET_CELL_HEIGHT, SHEET_HEADER_WIDTH
+        while len(self.sheet_col_headers) < cols:
+            j = len(self.sheet_col_headers)
+            self.sheet_col_headers.append(self._sheet_item(hw + j * w, 0, w, "#e0e0e0"))
+        while len(self.sheet_row_headers) < rows:
+            i = len(self.sheet_row_headers)
+            self.sheet_row_headers.append(self._sheet_item(0, (i + 1) * h, hw, "#e0e0e0"))
+        for i in range(rows):
+            if len(self.sheet_cells) <= i:
+                self.sheet_cells.append([])
+            while len(self.sheet_cells[i]) < cols:
+                j = len(self.sheet_cells[i])
+                self.sheet_cells[i].append(self._sheet_item(hw + j * w, (i + 1) * h, w, "white"))
+        
+        # Hide or show only the items whose visibility changed
+        old_rows, old_cols = self.sheet_visible_dims
+        for i, row in enumerate(self.sheet_cells):
+            for j, item in enumerate(row):
+                visible = i < rows and j < cols
+                if visible != (i < old_rows and j < old_cols):
+                    for item_id in item[:2]:
+                        self.sheet_canvas.itemconfigure(item_id, state=tk.NORMAL if visible else tk.HIDDEN)
+        for headers, count, old_count in ((self.sheet_row_headers, rows, old_rows),
+                                          (self.sheet_col_headers, cols, old_cols)):
+            for k, item in enumerate(headers):
+                if (k < count) != (k < old_count):
+                    for item_id in item[:2]:
+                        self.sheet_canvas.itemconfigure(item_id, state=tk.NORMAL if k < count else tk.HIDDEN)
+        self.sheet_visible_dims = (rows, cols)
+
+    def _set_sheet_text(self, item, text):
+        # Skip the Tk call when the text on screen is already right
+        if item[2] != text:
+            self.sheet_canvas.itemconfigure(item[1], text=text)
+            item[2] = text
+
+    def sheet_cell_text(self, key):
+        """Display text of one spreadsheet cell"""
+        cell = self.spreadsheet.cells.get(key)
+        if cell is None:
+            return ""
+        if cell.error:
+            return cell.error
+        return format_result(cell.value, min(self.decimal_places, 6))
+
+    @timed
+    def render_sheet(self):
+        """Draw the visible window of the spreadsheet"""
+        if not self.tab_built("Sheet"):
+            return
+        sheet = self.spreadsheet
+        width = self.sheet_canvas.winfo_width() - SHEET_HEADER_WIDTH
+        height = self.sheet_canvas.winfo_height() - SHEET_CELL_HEIGHT
+        rows = max(0, min(sheet.rows - self.sheet_top, height // SHEET_CELL_HEIGHT + 1))
+        cols = max(0, min(sheet.cols - self.sheet_left, width // SHEET_CELL_WIDTH + 1))
+        self._ensure_sheet_pool(rows, cols)
+        
+        for j in range(cols):
+            self._set_sheet_text(self.sheet_col_headers[j], column_name(self.sheet_left + j))
+        for i in range(rows):
+            self._set_sheet_text(self.sheet_row_headers[i], str(self.sheet_top + i + 1))
+            for j in range(cols):
+                key = (self.sheet_top + i, self.sheet_left + j)
+                item = self.sheet_cells[i][j]
+                self._set_sheet_text(item, self.sheet_cell_text(key))
+                fill = "#cce0ff" if key == self.sheet_selected else "white"
+                if item[3] != fill:
+                    self.sheet_canvas.itemconfigure(item[0], fill=fill)
+                    item[3] = fill
+        
+        self.sheet_vbar.set(self.sheet_top / sheet.rows, (self.sheet_top + rows) / sheet.rows)
+        self.sheet_hbar.set(self.sheet_left / sheet.cols, (self.sheet_left + cols) / sheet.cols)
+
+    def _scroll_sheet(self, position, total, visible, args):
+        if args[0] == "moveto":
+            position = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (max(1, visible - 1) if args[2] == "pages" else 1)
+            position += step
+        return max(0, min(position, total - max(1, visible - 1)))
+
+    def sheet_yview(self, *args):
+        """Scroll the spreadsheet vertically"""
+        visible_rows = self.sheet_visible_dims[0]
+        self.sheet_top = self._scroll_sheet(self.sheet_top, self.spreadsheet.rows, visible_rows, args)
+        self.render_sheet()
+
+    def sheet_xview(self, *args):
+        """Scroll the spreadsheet horizontally"""
+        visible_cols = self.sheet_visible_dims[1]
+        self.sheet_left = self._scroll_sheet(self.sheet_left, self.spreadsheet.cols, visible_cols, args)
+        self.render_sheet()
+
+    def sheet_click(self, event):
+        """Select the clicked cell and load its formula"""
+        i = event.y // SHEET_CELL_HEIGHT - 1
+        j = (event.x - SHEET_HEADER_WIDTH) // SHEET_CELL_WIDTH
+        if i < 0 or j < 0 or event.x < SHEET_HEADER_WIDTH:
+            return
+        self.select_sheet_cell((self.sheet_top + i, self.sheet_left + j))
+
+    def select_sheet_cell(self, key):
+        """Move the spreadsheet cursor, scrolling it into view"""
+        row = min(max(key[0], 0), self.spreadsheet.rows - 1)
+        col = min(max(key[1], 0), self.spreadsheet.cols - 1)
+        self.sheet_selected = (row, col)
+        rows, cols = self.sheet_visible_dims
+        if not self.sheet_top <= row < self.sheet_top + max(1, rows - 1):
+            self.sheet_top = max(0, row - max(1, rows - 1) + 1) if row >= self.sheet_top else row
+        if not self.sheet_left <= col < self.sheet_left + max(1, cols - 1):
+            self.sheet_left = max(0, col - max(1, cols - 1) + 1) if col >= self.sheet_left else col
+        self.sheet_cell_label.config(text=cell_name(row, col))
+        self.sheet_formula_var.set(self.spreadsheet.text(self.sheet_selected))
+        self.render_sheet()
+
+    @timed
+    def commit_sheet_cell(self):
+        """Store the formula bar in the selected cell and recalculate dependents"""
+        if self.calculation_mode != "SPREADSHEET":
+            self.set_calculation_mode("SPREADSHEET")
+        try:
+            result = self.spreadsheet.set_cell(self.sheet_selected, self.sheet_formula_var.get())
+        except ValueError as e:
+            messagebox.showerror("Spreadsheet Error", str(e))
+            return
+        self.sheet_timing_label.config(
+            text=f"Recalc: {result.cells} cell(s) in {result.seconds * 1000:.2f} ms"
+        )
+        row, col = self.sheet_selected
+        self.select_sheet_cell((row + 1, col))
+
+    def create_graph_tab(self, graph_frame):
+        """Build the Graph tab; matplotlib is only imported here"""
+        from plotting import GraphPanel
+        self.graph_panel = GraphPanel(
+            graph_frame,
+            angle_mode=lambda: self.angle_mode,
+            variables=self.expression_variables,
+            on_status=self.show_status,
+            bg=self.theme["bg_main"]
+        )
+        self.graph_panel.frame.pack(fill=tk.BOTH, expand=True)
+        
+        # The panel's frames and labels follow the window background
+        pending = [self.graph_panel.frame]
+        while pending:
+            widget = pending.pop()
+            if isinstance(widget, (tk.Frame, tk.Label)):
+                self.themed(widget, bg="bg_main")
+                pending.extend(widget.winfo_children())
+        if "x" in self.current_input:
+            self.graph_panel.plot(self.current_input)
+
+    def show_graph(self):
+        """Open the Graph tab, plotting the current input if it uses x"""
+        for tab_id in self.keyboard_notebook.tabs():
+            if self.keyboard_notebook.tab(tab_id, "text") == "Graph":
+                self.keyboard_notebook.select(tab_id)
+        self.build_tab("Graph")
+
     def create_qr_display(self):
         """Create hidden QR code display area"""
-        self.qr_frame = tk.Frame(self.root, bg=self.theme["bg_main"])
+        self.qr_frame = self.themed(tk.Frame(self.root), bg="bg_main")
         
         self.qr_canvas = tk.Canvas(self.qr_frame, width=200, height=200, bg="white", highlightthickness=0)
         self.qr_canvas.pack(padx=10, pady=10)
         
-        close_btn = tk.Button(
+        close_btn = self.themed(tk.Button(
             self.qr_frame, 
             text="Close QR", 
             command=self.toggle_qr_display,
-            bg=self.theme["bg_command"],
-            fg=self.theme["fg_command"]
-        )
+        ), bg="bg_command", fg="fg_command")
         close_btn.pack(pady=(0, 10))
 
     def create_status_bar(self):
@@ -615,6 +918,16 @@ class FX991EXCalculator:
         )
         self.status_text.pack(side=tk.LEFT, padx=5)
         
+        # Latency overlay, shown from the View menu
+        self.latency_label = tk.Label(
+            self.status_bar,
+            text="",
+            bg="#e0e0e0",
+            fg="#555555",
+            font=("Arial", 8)
+        )
+        self.latency_overlay = tk.BooleanVar(value=False)
+        
         # Add battery indicator (simulated)
         self.battery_indicator = tk.Label(
             self.status_bar,
@@ -650,8 +963,11 @@ class FX991EXCalculator:
         file_menu.add_separator()
         file_menu.add_command(label="Save History", command=self.save_history)
         file_menu.add_command(label="Load History", command=self.load_history)
+        file_menu.add_command(label="Save Session...", command=self.save_session_file)
+        file_menu.add_command(label="Open Session...", command=self.open_session_file)
+        file_menu.add_command(label="Dump Latency Profile", command=self.dump_latency_profile)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.quit_calculator)
         menubar.add_cascade(label="File", menu=file_menu)
         
         # Edit menu
@@ -662,9 +978,32 @@ class FX991EXCalculator:
         edit_menu.add_command(label="Preferences", command=self.show_preferences)
         menubar.add_cascade(label="Edit", menu=edit_menu)
         
+        # Macro menu: record key presses and replay them
+        macro_menu = tk.Menu(menubar, tearoff=0)
+        macro_menu.add_command(label="Start Recording", command=self.start_macro)
+        macro_menu.add_command(label="Stop Recording", command=self.stop_macro)
+        macro_menu.add_command(label="Save Macro...", command=self.save_macro_file)
+        macro_menu.add_separator()
+        macro_menu.add_command(label="Replay Macro...", command=self.replay_macro_file)
+        macro_menu.add_command(label="Replay at Full Speed...", command=self.replay_macro_headless)
+        macro_menu.add_command(label="Stop Replay", command=self.stop_macro_replay)
+        rate_menu = tk.Menu(macro_menu, tearoff=0)
+        for rate in MACRO_RATES:
+            rate_menu.add_radiobutton(
+                label=f"{rate} keys/s",
+                variable=self.macro_rate_var,
+                value=rate,
+                command=self.save_settings
+            )
+        macro_menu.add_cascade(label="Replay Speed", menu=rate_menu)
+        menubar.add_cascade(label="Macro", menu=macro_menu)
+        
         # Mode menu
         mode_menu = tk.Menu(menubar, tearoff=0)
         mode_menu.add_command(label="COMP", command=lambda: self.set_calculation_mode("COMP"))
+        mode_menu.add_command(label="CMPLX", command=lambda: self.set_calculation_mode("CMPLX"))
+        mode_menu.add_command(label="BASE-N", command=lambda: self.set_calculation_mode("BASE-N"))
+        mode_menu.add_command(label="SPREADSHEET", command=lambda: self.set_calculation_mode("SPREADSHEET"))
         mode_menu.add_command(label="STAT", command=lambda: self.set_calculation_mode("STAT"))
         mode_menu.add_command(label="TABLE", command=lambda: self.set_calculation_mode("TABLE"))
         mode_menu.add_command(label="EQN", command=lambda: self.set_calculation_mode("EQN"))
@@ -681,22 +1020,45 @@ class FX991EXCalculator:
         angle_menu.add_command(label="Gradians (GRAD)", command=lambda: self.set_angle_mode("GRAD"))
         menubar.add_cascade(label="Angle", menu=angle_menu)
         
+        # CONST menu, in groups of ten like the calculator's pages
+        const_menu = tk.Menu(menubar, tearoff=0)
+        for start in range(0, len(CONSTANTS), 10):
+            page = self.lazy_menu(const_menu, self.fill_constant_page, CONSTANTS[start:start + 10])
+            const_menu.add_cascade(label=f"{start + 1:02d}–{min(start + 10, len(CONSTANTS)):02d}", menu=page)
+        menubar.add_cascade(label="CONST", menu=const_menu)
+        
+        # CONV menu
+        conv_menu = tk.Menu(menubar, tearoff=0)
+        for start in range(0, len(CONVERSIONS), 10):
+            page = self.lazy_menu(conv_menu, self.fill_conversion_page, start)
+            conv_menu.add_cascade(label=f"{start + 1:02d}–{start + 10:02d}", menu=page)
+        menubar.add_cascade(label="CONV", menu=conv_menu)
+        
         # View menu
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_command(label="Toggle Fullscreen", command=self.toggle_fullscreen)
         view_menu.add_separator()
         
         # Theme submenu
-        theme_menu = tk.Menu(view_menu, tearoff=0)
-        for theme_name in self.themes.keys():
-            theme_menu.add_command(
-                label=theme_name,
-                command=lambda t=theme_name: self.set_theme(t)
-            )
-        view_menu.add_cascade(label="Theme", menu=theme_menu)
+        self.theme_menu = tk.Menu(view_menu, tearoff=0)
+        self.fill_theme_menu()
+        view_menu.add_cascade(label="Theme", menu=self.theme_menu)
         
         view_menu.add_command(label="Show QR Code", command=self.toggle_qr_display)
         view_menu.add_command(label="Show History", command=self.show_history)
+        view_menu.add_command(label="Show Graph", command=self.show_graph)
+        view_menu.add_checkbutton(
+            label="Live Result",
+            variable=self.live_preview_var,
+            command=self.toggle_live_preview
+        )
+        view_menu.add_separator()
+        view_menu.add_checkbutton(
+            label="Latency Overlay",
+            variable=self.latency_overlay,
+            command=self.toggle_latency_overlay
+        )
+        view_menu.add_command(label="Latency Report", command=self.show_latency_report)
         menubar.add_cascade(label="View", menu=view_menu)
         
         # Help menu
@@ -707,103 +1069,118 @@ class FX991EXCalculator:
         
         self.root.config(menu=menubar)
 
-    def get_active_color(self, base_color):
-        """Get a slightly darker color for button active state"""
-        if base_color.startswith("#"):
-            # Convert hex to RGB
-            r = int(base_color[1:3], 16)
-            g = int(base_color[3:5], 16)
-            b = int(base_color[5:7], 16)
-            # Darken by 20%
-            r = max(0, int(r * 0.8))
-            g = max(0, int(g * 0.8))
-            b = max(0, int(b * 0.8))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        return base_color
+    def lazy_menu(self, parent, fill, *args):
+        """A menu whose entries are added by fill(menu, *args) the first time it opens"""
+        menu = tk.Menu(parent, tearoff=0)
+
+        def post():
+            if menu.index(tk.END) is None:
+                fill(menu, *args)
+
+        menu.configure(postcommand=post)
+        return menu
+
+    def fill_constant_page(self, page, constants):
+        for c in constants:
+            page.add_command(
+                label=f"{c.number:02d} {c.symbol}  {c.name}",
+                command=lambda s=c.symbol: self.insert_constant(s)
+            )
+
+    def fill_conversion_page(self, page, start):
+        for n, (source, target) in enumerate(CONVERSIONS[start:start + 10], start + 1):
+            page.add_command(
+                label=f"{n:02d} {source}▶{target}",
+                command=lambda s=source, t=target: self.apply_conversion(s, t)
+            )
 
     def bind_keyboard_keys(self):
-        """Bind keyboard keys to calculator functions"""
+        """Bind keyboard keys to calculator functions
+
+        The bindings are on the window, so they also see keys typed into an
+        entry field such as the spreadsheet's formula bar; those, including
+        the cursor keys, are left to the entry.
+        """
+        def bind(sequence, action):
+            self.root.bind(sequence, lambda e: None if isinstance(e.widget, tk.Entry) else action())
+
         # Number keys
         for num in range(10):
-            self.root.bind(str(num), lambda e, n=num: self.button_click(str(n)))
+            bind(str(num), lambda n=num: self.type_key(str(n)))
         
         # Basic operations
-        self.root.bind("+", lambda e: self.button_click("+"))
-        self.root.bind("-", lambda e: self.button_click("−"))
-        self.root.bind("*", lambda e: self.button_click("×"))
-        self.root.bind("/", lambda e: self.button_click("÷"))
-        self.root.bind("^", lambda e: self.button_click("^"))
+        bind("+", lambda: self.type_key("+"))
+        bind("-", lambda: self.type_key("−"))
+        bind("*", lambda: self.type_key("×"))
+        bind("/", lambda: self.type_key("÷"))
+        bind("^", lambda: self.type_key("^"))
         
         # Other keys
-        self.root.bind(".", lambda e: self.button_click("."))
-        self.root.bind("(", lambda e: self.button_click("("))
-        self.root.bind(")", lambda e: self.button_click(")"))
-        self.root.bind("=", lambda e: self.button_click("="))
-        self.root.bind("<Return>", lambda e: self.button_click("="))
-        self.root.bind("<BackSpace>", lambda e: self.button_click("DEL"))
-        self.root.bind("<Escape>", lambda e: self.button_click("AC"))
+        bind(".", lambda: self.type_key("."))
+        bind("(", lambda: self.type_key("("))
+        bind(")", lambda: self.type_key(")"))
+        bind("=", lambda: self.type_key("="))
+        bind("<Return>", lambda: self.type_key("="))
+        bind("<BackSpace>", lambda: self.type_key("DEL"))
+        bind("<Delete>", lambda: self.type_key("Delete"))
+        bind("<Left>", lambda: self.type_key("◀"))
+        bind("<Right>", lambda: self.type_key("▶"))
+        bind("<Home>", lambda: self.type_key("Home"))
+        bind("<End>", lambda: self.type_key("End"))
+        bind("<Insert>", lambda: self.toggle_insert_mode())
+        bind("<Escape>", lambda: self.type_key("AC"))
+        bind("x", lambda: self.type_key("x"))
         
         # Special keys
-        self.root.bind("<Shift_L>", lambda e: self.toggle_shift())
-        self.root.bind("<Shift_R>", lambda e: self.toggle_shift())
-        self.root.bind("<Control_L>", lambda e: self.toggle_alpha())
-        self.root.bind("<Control_R>", lambda e: self.toggle_alpha())
+        bind("<Shift_L>", lambda: self.toggle_shift())
+        bind("<Shift_R>", lambda: self.toggle_shift())
+        bind("<Control_L>", lambda: self.toggle_alpha())
+        bind("<Control_R>", lambda: self.toggle_alpha())
+
+    def themed(self, widget, **roles):
+        """Register the theme role of each colour option of a new widget"""
+        return self.styles.register(widget, **roles)
 
+    @timed
     def apply_theme(self):
-        """Apply the current theme to all UI elements"""
-        theme = self.themes[self.current_theme]
-        
-        # Main window
-        self.root.configure(bg=theme["bg_main"])
-        
-        # Display
-        self.input_display.configure(bg=theme["bg_display"], fg=theme["fg_display"])
-        self.main_display.configure(bg=theme["bg_display"], fg=theme["fg_display"])
-        self.secondary_display.configure(bg=theme["bg_display"], fg="#666666")
-        self.info_frame.configure(bg=theme["bg_display"])
-        
-        # Indicators
-        self.shift_indicator.configure(bg=theme["bg_main"])
-        self.alpha_indicator.configure(bg=theme["bg_main"])
-        self.mode_indicator.configure(bg=theme["bg_main"], fg=theme["fg_button"])
-        self.angle_indicator.configure(bg=theme["bg_main"], fg=theme["fg_button"])
-        
-        # Update all buttons
-        btn_colors = {
-            "default": {"bg": theme["bg_button"], "fg": theme["fg_button"]},
-            "number": {"bg": theme["bg_number"], "fg": theme["fg_number"]},
-            "function": {"bg": theme["bg_function"], "fg": theme["fg_function"]},
-            "operator": {"bg": theme["bg_operator"], "fg": theme["fg_operator"]},
-            "command": {"bg": theme["bg_command"], "fg": theme["fg_command"]},
-            "equals": {"bg": theme["bg_equals"], "fg": theme["fg_equals"]},
-            "memory": {"bg": theme["bg_function"], "fg": theme["fg_function"]}
-        }
-        
-        for btn_text, btn in self.button_widgets.items():
-            btn_type = "default"
-            if btn_text in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "."]:
-                btn_type = "number"
-            elif btn_text in ["+", "−", "×", "÷", "^"]:
-                btn_type = "operator"
-            elif btn_text in ["="]:
-                btn_type = "equals"
-            elif btn_text in ["SHIFT", "ALPHA", "MODE", "DEL", "AC"]:
-                btn_type = "command"
-            elif btn_text in ["RCL"]:
-                btn_type = "memory"
-            else:
-                btn_type = "function"
-            
-            btn.configure(
-                bg=btn_colors[btn_type]["bg"],
-                fg=btn_colors[btn_type]["fg"],
-                activebackground=self.get_active_color(btn_colors[btn_type]["bg"])
-            )
+        """Restyle the window through the theme registry"""
+        # Each widget registered its roles when it was created
+        self.styles.apply(self.theme)
+        color = self.styles.color
+        
+        # Main window and the ttk notebook tabs
+        self.root.configure(bg=color("bg_main"))
+        style = ttk.Style(self.root)
+        style.configure("TNotebook", background=color("bg_main"))
+        style.configure("TNotebook.Tab", background=color("bg_button"), foreground=color("fg_button"))
+        style.map("TNotebook.Tab", background=[("selected", color("bg_display")), ("active", color("hover:bg_button"))])
+        
+        # The display widgets were reconfigured directly; render them afresh
+        self.display_model.invalidate()
+        self.display_state = None
+        self.update_display()
 
     def update_display(self):
-        """Update the calculator display"""
-        self.input_display.config(text=self.display_line1)
-        self.main_display.config(text=self.display_line2)
+        """Schedule a display refresh; a burst of keystrokes shares one redraw"""
+        if self.display_pending is None:
+            self.display_pending = self.root.after_idle(self.render_display)
+
+    @timed
+    def render_display(self):
+        """Push the display state to the widgets whose properties changed"""
+        self.display_pending = None
+        state = (
+            self.display_line1, self.display_line2, self.calculation_mode, self.angle_mode,
+            self.decimal_places, self.shift_active, self.alpha_active, self.current_theme,
+            self.preview_text, self.result_shown
+        )
+        if state == self.display_state:
+            return
+        self.display_state = state
+        
+        push = self.display_model.push
+        push(self.input_display, text=self.display_line1)
+        push(self.main_display, text=self.display_line2)
         
         # Update secondary display with mode info
         mode_info = f"{self.calculation_mode} | {self.angle_mode} | FIX {self.decimal_places}"
@@ -811,171 +1188,93 @@ class FX991EXCalculator:
             mode_info += " | SHIFT"
         if self.alpha_active:
             mode_info += " | ALPHA"
-        self.secondary_display.config(text=mode_info)
+        push(self.secondary_display, text=mode_info)
+        push(self.preview_display, text=f"= {self.preview_text}" if self.preview_text and not self.result_shown else "")
         
         # Update mode badge
-        self.mode_badge.config(text=self.calculation_mode)
+        push(self.mode_badge, text=self.calculation_mode)
         
         # Update indicators
-        self.shift_indicator.config(
-            fg=self.theme["shift_color"] if self.shift_active else "#aaaaaa"
-        )
-        self.alpha_indicator.config(
-            fg=self.theme["alpha_color"] if self.alpha_active else "#aaaaaa"
-        )
-        self.angle_indicator.config(text=self.angle_mode)
-        self.mode_indicator.config(text=self.calculation_mode)
-
-    def button_click(self, button_text):
-        """Handle button clicks"""
-        if button_text == "SHIFT":
-            self.toggle_shift()
-            return
-        elif button_text == "ALPHA":
-            self.toggle_alpha()
-            return
-        elif button_text == "MODE":
-            self.show_mode_menu()
-            return
-        elif button_text == "DEL":
-            self.delete_char()
-            return
-        elif button_text == "AC":
-            self.clear_all()
-            return
-        elif button_text == "=":
-            self.calculate_result()
-            return
-        
-        # Handle shifted or alpha functions
-        if self.shift_active:
-            # Look up shifted function
-            for btn in self.button_widgets.values():
-                if hasattr(btn, 'shift_text') and btn.shift_text == button_text:
-                    button_text = btn.shift_text
-                    break
-            self.toggle_shift(False)
-        elif self.alpha_active:
-            # Look up alpha function
-            for btn in self.button_widgets.values():
-                if hasattr(btn, 'alpha_text') and btn.alpha_text == button_text:
-                    button_text = btn.alpha_text
-                    break
-            self.toggle_alpha(False)
-        
-        # Handle the button input
-        if self.result_shown and button_text in "0123456789.(":
-            self.current_input = ""
-            self.result_shown = False
-        
-        if button_text == "Ans":
-            self.current_input += str(self.ans)
-        elif button_text == "×10^":
-            self.current_input += "e"
-        elif button_text == "(−)":
-            if self.current_input and self.current_input[-1] in "0123456789":
-                self.current_input += "*(-1)"
-            else:
-                self.current_input += "-"
+        color = self.styles.color
+        push(self.shift_indicator, fg=color("shift_color" if self.shift_active else "disabled:shift_color"))
+        push(self.alpha_indicator, fg=color("alpha_color" if self.alpha_active else "disabled:alpha_color"))
+        push(self.angle_indicator, text=self.angle_mode)
+        push(self.mode_indicator, text=self.calculation_mode)
+
+    def schedule_preview(self):
+        """Evaluate the live result once typing pauses for PREVIEW_DELAY_MS"""
+        if self.preview_pending is not None:
+            self.root.after_cancel(self.preview_pending)
+        self.preview_pending = self.root.after(PREVIEW_DELAY_MS, self.run_preview)
+
+    def run_preview(self):
+        self.preview_pending = None
+        self.update_preview()
+
+    def toggle_live_preview(self):
+        """Show or hide the live result under the display"""
+        self.preview_enabled = self.live_preview_var.get()
+        self.settings["live_preview"] = self.preview_enabled
+        if self.preview_enabled:
+            self.schedule_preview()
         else:
-            self.current_input += button_text
-        
-        self.display_line1 = self.current_input
-        self.display_line2 = self.current_input[-20:]  # Show last 20 chars
-        self.update_display()
+            self.preview_text = ""
+            self.update_display()
 
-    def toggle_shift(self, state=None):
-        """Toggle shift mode"""
-        if state is None:
-            self.shift_active = not self.shift_active
-        else:
-            self.shift_active = state
-        self.update_display()
+    def report_error(self, title, message):
+        """Show calculation errors in a dialog"""
+        messagebox.showerror(title, message)
 
-    def toggle_alpha(self, state=None):
-        """Toggle alpha mode"""
-        if state is None:
-            self.alpha_active = not self.alpha_active
-        else:
-            self.alpha_active = state
-        self.update_display()
+    def show_status(self, text):
+        """Show a message in the status bar"""
+        self.status = text
+        self.status_text.config(text=text)
 
-    def delete_char(self):
-        """Delete the last character from input"""
-        if self.current_input:
-            self.current_input = self.current_input[:-1]
-            self.display_line1 = self.current_input
-            self.display_line2 = self.current_input[-20:] if self.current_input else "0"
-            self.result_shown = False
-            self.update_display()
+    def show_setup(self):
+        """SHIFT + MODE opens SET UP"""
+        self.show_preferences()
 
-    def clear_all(self):
-        """Clear all input and reset calculator"""
-        self.current_input = ""
-        self.display_line1 = ""
-        self.display_line2 = "0"
-        self.result_shown = False
-        self.update_display()
+    def power_off(self):
+        """SHIFT + AC turns the calculator off"""
+        self.save_settings()
+        self.quit_calculator()
 
-    def calculate_result(self):
-        """Calculate and display the result"""
+    def quit_calculator(self):
+        """Keep the session for the next start and close the calculator"""
         try:
-            # Replace display symbols with Python-compatible ones
-            expr = self.current_input
-            expr = expr.replace("×", "*")
-            expr = expr.replace("÷", "/")
-            expr = expr.replace("^", "**")
-            
-            # Handle angle mode conversions for trig functions
-            if self.angle_mode == "DEG":
-                expr = re.sub(r'sin\(', 'math.sin(math.radians(', expr)
-                expr = re.sub(r'cos\(', 'math.cos(math.radians(', expr)
-                expr = re.sub(r'tan\(', 'math.tan(math.radians(', expr)
-            elif self.angle_mode == "GRAD":
-                expr = re.sub(r'sin\(', 'math.sin(math.pi*', expr) + '/200)'
-                expr = re.sub(r'cos\(', 'math.cos(math.pi*', expr) + '/200)'
-                expr = re.sub(r'tan\(', 'math.tan(math.pi*', expr) + '/200)'
-            
-            # Evaluate the expression
-            result = eval(expr, {"__builtins__": None}, 
-                         {"math": math, "cmath": cmath, "np": np, "stats": stats, "ans": self.ans})
-            
-            # Format the result
-            if isinstance(result, (int, float)):
-                if abs(result) > 1e10 or (abs(result) < 1e-4 and result != 0):
-                    formatted_result = "{:.{}e}".format(result, self.decimal_places)
-                else:
-                    formatted_result = "{:.{}f}".format(result, self.decimal_places).rstrip('0').rstrip('.')
-            else:
-                formatted_result = str(result)
-            
-            self.display_line2 = formatted_result
-            self.ans = result
-            self.result_shown = True
-            
-            # Add to history
-            self.add_to_history(f"{self.current_input} = {formatted_result}")
-            
+            self.save_session(SESSION_FILE)
         except Exception as e:
-            self.display_line2 = "Error"
-            messagebox.showerror("Calculation Error", f"Invalid expression: {e}")
-        
-        self.update_display()
-
-    def add_to_history(self, entry):
-        """Add an entry to the calculation history"""
-        if not self.settings.get("history_enabled", True):
-            return
-            
-        self.history.append(entry)
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
+            messagebox.showerror("Save Error", f"Could not save session: {e}")
+        self.root.quit()
 
     def show_history(self):
-        """Show calculation history in a new window"""
+        """Show calculation history in a window that is built once and reused"""
+        if self.history_window is None:
+            self.create_history_window()
+        self.fill_history_list()
+        self.history_window.deiconify()
+        self.history_window.lift()
+
+    def fill_history_list(self):
+        """List the history entries matching the search box, newest first"""
+        self.history_list.delete(0, tk.END)
+        for entry in self.search_history(self.history_search_var.get()):
+            self.history_list.insert(tk.END, entry)
+
+    def create_history_window(self):
         history_window = tk.Toplevel(self.root)
         history_window.title("Calculation History")
         history_window.geometry("400x500")
+        # Closing only hides the window so the next open reuses it
+        history_window.protocol("WM_DELETE_WINDOW", history_window.withdraw)
+        
+        # Typing in the search box narrows the list to matching entries
+        self.history_search_var = tk.StringVar()
+        self.history_search_var.trace_add("write", lambda *args: self.fill_history_list())
+        search_frame = tk.Frame(history_window)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        tk.Entry(search_frame, textvariable=self.history_search_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         scrollbar = tk.Scrollbar(history_window)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -989,9 +1288,6 @@ class FX991EXCalculator:
         )
         history_list.pack(fill=tk.BOTH, expand=True)
         
-        for entry in reversed(self.history):
-            history_list.insert(tk.END, entry)
-        
         scrollbar.config(command=history_list.yview)
         
         # Add context menu
@@ -1008,6 +1304,8 @@ class FX991EXCalculator:
                 context_menu.grab_release()
         
         history_list.bind("<Button-3>", show_context_menu)
+        self.history_window = history_window
+        self.history_list = history_list
 
     def copy_history_item(self, history_list):
         """Copy selected history item to clipboard"""
@@ -1024,18 +1322,18 @@ class FX991EXCalculator:
             selection = history_list.get(history_list.curselection())
             expr = selection.split(" = ")[0]
             self.current_input = expr
-            self.display_line1 = expr
-            self.display_line2 = expr[-20:]
             self.result_shown = False
-            self.update_display()
+            self.refresh_input()
         except:
             pass
 
     def clear_history(self, window=None):
         """Clear the calculation history"""
         self.history = []
+        if self.history_window is not None:
+            self.history_list.delete(0, tk.END)
         if window:
-            window.destroy()
+            window.withdraw()
 
     def save_history(self):
         """Save calculation history to file"""
@@ -1063,6 +1361,146 @@ class FX991EXCalculator:
         except Exception as e:
             messagebox.showerror("Load Error", f"Could not load history: {e}")
 
+    def release_session(self):
+        """Read what is still left in the open session file, then close it"""
+        if self.session_snapshot is not None:
+            self.matrices = dict(self.matrices)
+            self.history = list(self.history)
+            self.session_snapshot.close()
+            self.session_snapshot = None
+
+    def save_session(self, path):
+        self.release_session()
+        save_snapshot(path, self, self.matrices, self.stat_data)
+
+    def restore_session(self, path):
+        """Take over the session saved in path; history and matrices load on first use"""
+        snapshot = Snapshot(path)
+        try:
+            stat_data = list(snapshot.header["stat_data"])
+            self.release_session()
+            self.matrices = restore_snapshot(self, snapshot)
+        except Exception:
+            snapshot.close()
+            raise
+        self.stat_data = stat_data
+        self.session_snapshot = snapshot
+
+    def save_session_file(self):
+        """Save the whole calculator state to a session file"""
+        try:
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".npz",
+                filetypes=[("Calculator sessions", "*.npz"), ("All files", "*.*")]
+            )
+            if filename:
+                self.save_session(filename)
+                self.show_status("Session saved")
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Could not save session: {e}")
+
+    def open_session_file(self):
+        """Continue a saved session"""
+        try:
+            filename = filedialog.askopenfilename(
+                filetypes=[("Calculator sessions", "*.npz"), ("All files", "*.*")]
+            )
+            if filename:
+                self.restore_session(filename)
+                self.set_angle_mode(self.angle_mode)
+                if self.tab_built("Matrix"):
+                    # An unbuilt Matrix tab shows the new registers when it is opened
+                    self.select_matrix()
+                self.refresh_input()
+                if self.history_window is not None:
+                    self.fill_history_list()
+                self.show_status("Session restored")
+        except Exception as e:
+            messagebox.showerror("Load Error", f"Could not open session: {e}")
+
+    def start_macro(self):
+        """Record every key press from now on"""
+        self.macro = []
+        self.show_status("Recording macro")
+        self.update_display()
+
+    def stop_macro(self):
+        if self.macro is None:
+            return
+        self.recorded_macro, self.macro = self.macro, None
+        self.show_status(f"Recorded {len(self.recorded_macro)} key presses")
+        self.update_display()
+
+    def save_macro_file(self):
+        """Save the last recorded macro"""
+        self.stop_macro()
+        if not self.recorded_macro:
+            messagebox.showinfo("Macro", "No macro has been recorded")
+            return
+        try:
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("Macro files", "*.json"), ("All files", "*.*")]
+            )
+            if filename:
+                save_macro(filename, self.recorded_macro)
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Could not save macro: {e}")
+
+    def open_macro_file(self):
+        """Ask for a macro file and load it; None if cancelled or unreadable"""
+        try:
+            filename = filedialog.askopenfilename(
+                filetypes=[("Macro files", "*.json"), ("All files", "*.*")]
+            )
+            if filename:
+                return load_macro(filename)
+        except Exception as e:
+            messagebox.showerror("Load Error", f"Could not load macro: {e}")
+        return None
+
+    def replay_macro_file(self):
+        """Replay a macro on this window at the chosen speed"""
+        events = self.open_macro_file()
+        if events is None:
+            return
+        self.stop_macro_replay()
+        self.macro_player = iter(events)
+        self.play_macro_event()
+
+    def play_macro_event(self):
+        event = next(self.macro_player, None)
+        if event is None:
+            self.macro_player = self.macro_job = None
+            self.show_status("Replay finished")
+            self.update_display()
+            return
+        kind, key = event
+        self.macro_handlers[kind](key)
+        self.macro_job = self.root.after(1000 // self.macro_rate_var.get(), self.play_macro_event)
+
+    def stop_macro_replay(self):
+        if self.macro_job is not None:
+            self.root.after_cancel(self.macro_job)
+            self.macro_player = self.macro_job = None
+            self.show_status("Replay stopped")
+            self.update_display()
+
+    def replay_macro_headless(self):
+        """Replay a macro without drawing anything and report the result and speed"""
+        events = self.open_macro_file()
+        if not events:
+            return
+        core, elapsed = replay_headless(events, self.settings)
+        rate = len(events) / elapsed if elapsed else float("inf")
+        report = (
+            f"{core.display_line1}\n{core.display_line2}\n\n"
+            f"{len(events)} key presses in {elapsed * 1000:.1f} ms ({rate:,.0f} keys/s)"
+        )
+        if core.last_error:
+            report += f"\n\nLast error: {core.last_error}"
+        messagebox.showinfo("Macro Replay", report)
+
     def copy_result(self):
         """Copy the current result to clipboard"""
         self.root.clipboard_clear()
@@ -1073,29 +1511,43 @@ class FX991EXCalculator:
         try:
             clipboard_content = self.root.clipboard_get()
             if clipboard_content:
-                self.current_input += clipboard_content
-                self.display_line1 = self.current_input
-                self.display_line2 = self.current_input[-20:]
                 self.result_shown = False
-                self.update_display()
+                self.buffer.insert_text(clipboard_content)
+                self.refresh_input()
         except:
             pass
 
     def set_angle_mode(self, mode):
         """Set the angle calculation mode (DEG, RAD, GRAD)"""
         self.angle_mode = mode
+        result = self.spreadsheet.set_angle_mode(mode)
+        if result.cells:
+            self.render_sheet()
+        if self.preview_enabled:
+            self.schedule_preview()
         self.update_display()
 
     def set_calculation_mode(self, mode):
         """Set the calculation mode (COMP, STAT, etc.)"""
         self.calculation_mode = mode
+        if self.preview_enabled:
+            self.schedule_preview()
         self.update_display()
-        self.keyboard_notebook.select(self.calculation_mode.lower())
+        
+        # Bring up the keyboard tab that belongs to the mode, if there is one
+        mode_tabs = {"COMP": "Main", "CMPLX": "Scientific", "MATRIX": "Matrix", "EQN": "Equation", "BASE-N": "BASE-N",
+                     "SPREADSHEET": "Sheet"}
+        for tab_id in self.keyboard_notebook.tabs():
+            if self.keyboard_notebook.tab(tab_id, "text") == mode_tabs.get(mode):
+                self.keyboard_notebook.select(tab_id)
 
     def show_mode_menu(self):
         """Show a popup menu for mode selection"""
         mode_menu = tk.Menu(self.root, tearoff=0)
         mode_menu.add_command(label="COMP", command=lambda: self.set_calculation_mode("COMP"))
+        mode_menu.add_command(label="CMPLX", command=lambda: self.set_calculation_mode("CMPLX"))
+        mode_menu.add_command(label="BASE-N", command=lambda: self.set_calculation_mode("BASE-N"))
+        mode_menu.add_command(label="SPREADSHEET", command=lambda: self.set_calculation_mode("SPREADSHEET"))
         mode_menu.add_command(label="STAT", command=lambda: self.set_calculation_mode("STAT"))
         mode_menu.add_command(label="TABLE", command=lambda: self.set_calculation_mode("TABLE"))
         mode_menu.add_command(label="EQN", command=lambda: self.set_calculation_mode("EQN"))
@@ -1112,10 +1564,137 @@ class FX991EXCalculator:
         if theme_name in self.themes:
             self.current_theme = theme_name
             self.theme = self.themes[theme_name]
+            start = time.perf_counter()
             self.apply_theme()
+            elapsed = time.perf_counter() - start
+            self.show_status(f"{theme_name} theme: {len(self.styles)} widgets in {elapsed * 1000:.1f} ms")
             self.settings["theme"] = theme_name
             self.save_settings()
 
+    def fill_theme_menu(self):
+        """List the built-in and user themes in the Theme menu"""
+        self.theme_menu.delete(0, tk.END)
+        for theme_name in self.themes.keys():
+            self.theme_menu.add_command(
+                label=theme_name,
+                command=lambda t=theme_name: self.set_theme(t)
+            )
+        self.theme_menu.add_separator()
+        self.theme_menu.add_command(label="Load Theme...", command=self.load_theme_file)
+        self.theme_menu.add_command(label="Customize Theme...", command=self.show_theme_editor)
+
+    def watch_themes(self):
+        """Pick up theme files added, edited or removed while running"""
+        # Scheduled first, so a theme that fails to apply does not stop the polling
+        self.root.after(THEME_POLL_MS, self.watch_themes)
+        signature = theme_signature()
+        if signature != self.theme_files:
+            self.theme_files = signature
+            try:
+                self.reload_themes()
+            except Exception as e:
+                self.show_status(f"Theme error: {e}")
+
+    def reload_themes(self):
+        """Re-read the user themes and restyle if the current one changed"""
+        themes = dict(THEMES)
+        themes.update(load_user_themes())
+        self.themes = themes
+        self.fill_theme_menu()
+        if self.current_theme not in themes:
+            self.set_theme("Default")
+        elif themes[self.current_theme] != self.theme and not self.theme_editor_open():
+            self.set_theme(self.current_theme)
+        else:
+            self.show_status("Themes reloaded")
+
+    def theme_editor_open(self):
+        return self.theme_editor is not None and self.theme_editor.winfo_viewable()
+
+    def load_theme_file(self):
+        """Load a JSON theme, keep a copy with the user themes and switch to it"""
+        try:
+            filename = filedialog.askopenfilename(
+                filetypes=[("Theme files", "*.json"), ("All files", "*.*")]
+            )
+            if filename:
+                name, colors = load_theme(filename)
+                save_theme(name, colors)
+                self.themes[name] = colors
+                self.fill_theme_menu()
+                self.set_theme(name)
+        except Exception as e:
+            messagebox.showerror("Load Error", f"Could not load theme: {e}")
+
+    def show_theme_editor(self):
+        """Edit the current theme's colours, previewing them on the window"""
+        if self.theme_editor is None:
+            self.create_theme_editor()
+        self.custom_theme = dict(self.theme)
+        name = self.current_theme if self.current_theme not in THEMES else f"{self.current_theme} Custom"
+        self.theme_name_var.set(name)
+        self.update_theme_swatches()
+        self.theme_editor.deiconify()
+        self.theme_editor.lift()
+
+    def create_theme_editor(self):
+        editor = tk.Toplevel(self.root)
+        editor.title("Customize Theme")
+        editor.protocol("WM_DELETE_WINDOW", self.close_theme_editor)
+        
+        # One colour swatch per role; clicking it opens the colour chooser
+        self.theme_swatches = {}
+        for row, (role, description) in enumerate(ROLES.items()):
+            tk.Label(editor, text=description, anchor="w").grid(row=row, column=0, sticky="w", padx=10, pady=1)
+            swatch = tk.Button(editor, width=10, relief=tk.GROOVE, command=lambda r=role: self.pick_theme_color(r))
+            swatch.grid(row=row, column=1, padx=10, pady=1)
+            self.theme_swatches[role] = swatch
+        
+        name_frame = tk.Frame(editor)
+        name_frame.grid(row=len(ROLES), column=0, columnspan=2, pady=10)
+        tk.Label(name_frame, text="Name:").pack(side=tk.LEFT)
+        self.theme_name_var = tk.StringVar()
+        tk.Entry(name_frame, textvariable=self.theme_name_var, width=16).pack(side=tk.LEFT, padx=5)
+        tk.Button(name_frame, text="Save Theme", command=self.save_custom_theme).pack(side=tk.LEFT)
+        self.theme_editor = editor
+
+    def update_theme_swatches(self):
+        for role, swatch in self.theme_swatches.items():
+            color = self.custom_theme[role]
+            swatch.configure(text=color, bg=color, activebackground=color)
+
+    def pick_theme_color(self, role):
+        """Choose the colour of one role"""
+        _, color = colorchooser.askcolor(self.custom_theme[role], parent=self.theme_editor, title=ROLES[role])
+        if color is None:
+            return
+        self.custom_theme[role] = color
+        self.update_theme_swatches()
+        self.theme = self.custom_theme
+        self.apply_theme()
+
+    def close_theme_editor(self):
+        """Hide the editor and drop an unsaved preview"""
+        self.theme_editor.withdraw()
+        self.theme = self.themes[self.current_theme]
+        self.apply_theme()
+
+    def save_custom_theme(self):
+        """Save the edited colours as a user theme and switch to it"""
+        name = self.theme_name_var.get().strip()
+        if not name or name in THEMES:
+            messagebox.showerror("Theme Error", "Please enter a name that is not a built-in theme")
+            return
+        try:
+            save_theme(name, self.custom_theme)
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Could not save theme: {e}")
+            return
+        self.themes[name] = dict(self.custom_theme)
+        self.fill_theme_menu()
+        self.theme_editor.withdraw()
+        self.set_theme(name)
+
     def toggle_fullscreen(self):
         """Toggle fullscreen mode"""
         current_state = self.root.attributes("-fullscreen")
@@ -1125,6 +1704,8 @@ class FX991EXCalculator:
 
     def toggle_qr_display(self):
         """Toggle QR code display"""
+        if self.qr_frame is None:
+            self.create_qr_display()
         if self.qr_visible:
             self.qr_frame.pack_forget()
         else:
@@ -1148,28 +1729,82 @@ class FX991EXCalculator:
         self.time_display.config(text=now)
         self.root.after(60000, self.update_time)  # Update every minute
 
+    def toggle_latency_overlay(self):
+        """Show or hide key-press latency percentiles in the status bar"""
+        if self.latency_overlay.get():
+            self.latency_label.pack(side=tk.RIGHT, padx=5)
+            self.update_latency_overlay()
+        else:
+            self.latency_label.pack_forget()
+
+    def update_latency_overlay(self):
+        """Refresh the latency overlay twice a second while it is visible"""
+        if not self.latency_overlay.get():
+            return
+        self.latency_label.config(text=self.latency.status_text("button_click"))
+        self.root.after(500, self.update_latency_overlay)
+
+    def show_latency_report(self):
+        """Show p50/p95/p99 of every instrumented handler"""
+        rows = self.latency.summary()
+        if not rows:
+            messagebox.showinfo("Latency Report", "No handler has run yet")
+            return
+        lines = [f"Budget: {self.latency.budget * 1000:.0f} ms per event", ""]
+        for row in rows:
+            lines.append(
+                f"{row['handler']}: {row['calls']} calls, p50 {row['p50_ms']:.2f} / "
+                f"p95 {row['p95_ms']:.2f} / p99 {row['p99_ms']:.2f} ms"
+                + (f", {row['over_budget']} over budget" if row["over_budget"] else "")
+            )
+        messagebox.showinfo("Latency Report", "\n".join(lines))
+
+    def dump_latency_profile(self):
+        """Save the recorded handler latencies to a JSON file"""
+        try:
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+                initialfile="latency_profile.json"
+            )
+            if filename:
+                self.latency.dump(filename)
+                self.status_text.config(text=f"Latency profile saved to {os.path.basename(filename)}")
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Could not save latency profile: {e}")
+
     def show_preferences(self):
-        """Show preferences dialog"""
+        """Show the preferences dialog, built once and reused"""
+        if self.preferences_window is None:
+            self.create_preferences_window()
+        self.decimal_places_var.set(self.decimal_places)
+        self.history_enabled_var.set(self.settings.get("history_enabled", True))
+        self.preferences_window.deiconify()
+        self.preferences_window.lift()
+
+    def create_preferences_window(self):
         pref_window = tk.Toplevel(self.root)
         pref_window.title("Preferences")
         pref_window.geometry("400x300")
+        pref_window.protocol("WM_DELETE_WINDOW", pref_window.withdraw)
         
         # Decimal places setting
         tk.Label(pref_window, text="Decimal Places:").pack(pady=(10, 0))
+        self.decimal_places_var = tk.IntVar(value=self.decimal_places)
         decimal_spin = tk.Spinbox(
             pref_window, 
             from_=0, 
             to=15, 
             width=5,
-            textvariable=tk.IntVar(value=self.decimal_places))
+            textvariable=self.decimal_places_var)
         decimal_spin.pack()
         
         # History checkbox
-        history_var = tk.BooleanVar(value=self.settings.get("history_enabled", True))
+        self.history_enabled_var = tk.BooleanVar(value=self.settings.get("history_enabled", True))
         history_check = tk.Checkbutton(
             pref_window, 
             text="Enable Calculation History", 
-            variable=history_var
+            variable=self.history_enabled_var
         )
         history_check.pack(pady=10)
         
@@ -1179,11 +1814,12 @@ class FX991EXCalculator:
             text="Save Preferences",
             command=lambda: self.save_preferences(
                 int(decimal_spin.get()),
-                history_var.get(),
+                self.history_enabled_var.get(),
                 pref_window
             )
         )
         save_btn.pack(pady=20)
+        self.preferences_window = pref_window
 
     def save_preferences(self, decimal_places, history_enabled, window):
         """Save preferences from dialog"""
@@ -1191,7 +1827,7 @@ class FX991EXCalculator:
         self.settings["decimal_places"] = decimal_places
         self.settings["history_enabled"] = history_enabled
         self.save_settings()
-        window.destroy()
+        window.withdraw()
         self.update_display()
 
     def show_about(self):
@@ -1212,11 +1848,15 @@ class FX991EXCalculator:
             "Basic Operations:\n"
             "- Use number buttons for input\n"
             "- +, -, ×, ÷ for basic arithmetic\n"
-            "- = to calculate result\n\n"
+            "- = to calculate result\n"
+            "- SHIFT + = to SOLVE an equation in x (e.g. x^3-2x=5)\n"
+            "- SHIFT + RCL (STO) then A–F, M, x or y stores the result; RCL recalls it\n"
+            "- ←/→, Home and End move the cursor; SHIFT + DEL (INS) toggles overwrite\n\n"
             "Special Functions:\n"
             "- SHIFT: Access secondary functions\n"
             "- ALPHA: Access alpha characters\n"
-            "- MODE: Change calculation mode\n\n"
+            "- MODE: Change calculation mode\n"
+            "- CONST / CONV menus: scientific constants and unit conversions\n\n"
             "Advanced Features:\n"
             "- Matrix operations in Matrix mode\n"
             "- Equation solving in Equation mode\n"
@@ -1224,418 +1864,302 @@ class FX991EXCalculator:
         )
         messagebox.showinfo("Help", help_text)
 
-    def scientific_function(self, func_name):
-        """Handle scientific function button presses"""
-        if func_name == "sinh":
-            self.current_input += "math.sinh("
-        elif func_name == "cosh":
-            self.current_input += "math.cosh("
-        elif func_name == "tanh":
-            self.current_input += "math.tanh("
-        elif func_name == "sinh⁻¹":
-            self.current_input += "math.asinh("
-        elif func_name == "cosh⁻¹":
-            self.current_input += "math.acosh("
-        elif func_name == "tanh⁻¹":
-            self.current_input += "math.atanh("
-        elif func_name == "x!":
-            self.current_input += "math.factorial("
-        elif func_name == "nPr":
-            self.current_input += "math.perm("
-        elif func_name == "nCr":
-            self.current_input += "math.comb("
-        elif func_name == "|x|":
-            self.current_input += "abs("
-        elif func_name == "gcd":
-            self.current_input += "math.gcd("
-        elif func_name == "lcm":
-            self.current_input += "math.lcm("
-        elif func_name == "mod":
-            self.current_input += "%"
-        elif func_name == "floor":
-            self.current_input += "math.floor("
-        elif func_name == "ceil":
-            self.current_input += "math.ceil("
-        elif func_name == "log₂":
-            self.current_input += "math.log2("
-        elif func_name == "logₓ":
-            self.current_input += "math.log("
-        elif func_name == "e^x":
-            self.current_input += "math.exp("
-        elif func_name == "10^x":
-            self.current_input += "10**"
-        elif func_name == "x^3":
-            self.current_input += "**3"
-        elif func_name == "∛":
-            self.current_input += "**(1/3)"
-        elif func_name == "Pol(":
-            self.current_input += "math.polar("
-        elif func_name == "Rec(":
-            self.current_input += "math.rect("
-        elif func_name == "→r∠θ":
-            self.current_input += "abs("
-        elif func_name == "→a+bi":
-            self.current_input += "complex("
-        elif func_name == "arg":
-            self.current_input += "cmath.phase("
-        elif func_name == "conj":
-            self.current_input += "np.conj("
-        elif func_name == "rand":
-            self.current_input += "random.random()"
-        elif func_name == "d/dx":
-            self.current_input += "derivative("
-        elif func_name == "∫":
-            self.current_input += "integrate("
-        elif func_name == "Σ":
-            self.current_input += "sum("
-        elif func_name == "Π":
-            self.current_input += "product("
-        
-        self.display_line1 = self.current_input
-        self.display_line2 = self.current_input[-20:]
+    def insert_constant(self, symbol):
+        """Insert a scientific constant from the CONST menu"""
+        self.insert(f'const("{symbol}")')
+
+    def apply_conversion(self, source, target):
+        """Wrap the current input (or Ans) in a unit conversion"""
+        value = self.current_input or "Ans"
+        # Applying several conversions in a row builds a nested conv() chain,
+        # which is folded into one multiply-add when the expression compiles
+        self.current_input = f'conv({value},"{source}","{target}")'
         self.result_shown = False
-        self.update_display()
+        self.refresh_input()
 
+    def select_matrix(self):
+        """Switch the editor to another matrix register"""
+        rows, cols = self.matrices[self.matrix_var.get()].shape
+        self.rows_var.set(rows)
+        self.cols_var.set(cols)
+        self.update_matrix_display()
+
+    def _show_widget_grid(self, pool, parent, visible_dims, rows, cols, factory):
+        """Grow a 2D widget pool to rows x cols and show only that block"""
+        while len(pool) < rows:
+            pool.append([])
+        for i in range(rows):
+            while len(pool[i]) < cols:
+                j = len(pool[i])
+                widget = factory(parent)
+                widget.grid(row=i, column=j, padx=2, pady=2)
+                pool[i].append(widget)
+        
+        # Only touch cells whose visibility actually changes
+        old_rows, old_cols = visible_dims
+        for i, row in enumerate(pool):
+            for j, widget in enumerate(row):
+                was_visible = i < old_rows and j < old_cols
+                is_visible = i < rows and j < cols
+                if is_visible and not was_visible:
+                    widget.grid()
+                elif was_visible and not is_visible:
+                    widget.grid_remove()
+        return (rows, cols)
+
+    @timed
     def update_matrix_display(self):
         """Update the matrix display based on current selection and dimensions"""
-        # Clear existing entries
-        for widget in self.matrix_display_frame.winfo_children():
-            widget.destroy()
-        
         # Get current matrix and dimensions
         matrix_name = self.matrix_var.get()
         rows = self.rows_var.get()
         cols = self.cols_var.get()
         
-        # Update matrix dimensions
-        self.matrix_dims[matrix_name] = (rows, cols)
-        
         # Resize matrix data if needed
-        current_matrix = self.matrix_data[matrix_name]
-        if current_matrix.shape != (rows, cols):
-            new_matrix = np.zeros((rows, cols))
-            min_rows = min(rows, current_matrix.shape[0])
-            min_cols = min(cols, current_matrix.shape[1])
-            new_matrix[:min_rows, :min_cols] = current_matrix[:min_rows, :min_cols]
-            self.matrix_data[matrix_name] = new_matrix
-        
-        # Create entry widgets for the matrix
-        self.matrix_entries = []
+        register = self.matrices[matrix_name]
+        register.resize(rows, cols)
+        
+        self.matrix_visible_dims = self._show_widget_grid(
+            self.matrix_entries,
+            self.matrix_entry_grid,
+            self.matrix_visible_dims,
+            rows,
+            cols,
+            lambda parent: self.themed(
+                tk.Entry(parent, width=6, font=("Arial", 10), justify="center"),
+                bg="bg_display", fg="fg_display", insertbackground="fg_display"
+            )
+        )
+        
+        # Rewrite only the cells whose text differs
+        values = register.values
         for i in range(rows):
-            row_entries = []
             for j in range(cols):
-                entry = tk.Entry(
-                    self.matrix_display_frame,
-                    width=6,
-                    font=("Arial", 10),
-                    justify="center"
-                )
-                entry.insert(0, str(self.matrix_data[matrix_name][i, j]))
-                entry.grid(row=i, column=j, padx=2, pady=2)
-                row_entries.append(entry)
-            self.matrix_entries.append(row_entries)
-        
-        # Add update button
-        update_btn = tk.Button(
-            self.matrix_display_frame,
-            text="Update Matrix",
-            command=self.update_matrix_values,
-            bg=self.theme["bg_command"],
-            fg=self.theme["fg_command"]
-        )
-        update_btn.grid(row=rows, columnspan=cols, pady=5)
+                entry = self.matrix_entries[i][j]
+                text = str(values[i, j])
+                if entry.get() != text:
+                    entry.delete(0, tk.END)
+                    entry.insert(0, text)
 
+    @timed
     def update_matrix_values(self):
         """Update matrix values from entry widgets"""
         matrix_name = self.matrix_var.get()
-        rows, cols = self.matrix_dims[matrix_name]
+        register = self.matrices[matrix_name]
+        rows, cols = register.shape
         
+        values = np.zeros((rows, cols))
         for i in range(rows):
             for j in range(cols):
                 try:
-                    value = float(self.matrix_entries[i][j].get())
-                    self.matrix_data[matrix_name][i, j] = value
+                    values[i, j] = float(self.matrix_entries[i][j].get())
                 except ValueError:
                     messagebox.showerror("Error", "Invalid matrix entry")
                     return
+        
+        # Cached factorizations are only dropped if a cell actually changed
+        register.assign(values)
 
+    @timed
     def resize_matrix(self):
         """Resize the current matrix"""
         self.update_matrix_display()
 
+    @timed
     def matrix_determinant(self):
         """Calculate determinant of current matrix"""
         matrix_name = self.matrix_var.get()
-        matrix = self.matrix_data[matrix_name]
+        register = self.matrices[matrix_name]
         
         try:
-            det = np.linalg.det(matrix)
+            det = register.determinant()
             self.show_matrix_result(f"det({matrix_name}) = {det:.4f}")
         except np.linalg.LinAlgError:
             messagebox.showerror("Error", "Matrix must be square to calculate determinant")
 
+    @timed
     def matrix_inverse(self):
         """Calculate inverse of current matrix"""
         matrix_name = self.matrix_var.get()
-        matrix = self.matrix_data[matrix_name]
+        register = self.matrices[matrix_name]
         
         try:
-            inv = np.linalg.inv(matrix)
+            inv = register.inverse()
             self.show_matrix_result(f"Inverse of {matrix_name}:", inv)
         except np.linalg.LinAlgError:
             messagebox.showerror("Error", "Matrix is singular or not square")
 
+    @timed
     def matrix_transpose(self):
         """Calculate transpose of current matrix"""
         matrix_name = self.matrix_var.get()
-        matrix = self.matrix_data[matrix_name]
+        matrix = self.matrices[matrix_name].values
         transpose = matrix.T
         self.show_matrix_result(f"Transpose of {matrix_name}:", transpose)
 
+    @timed
     def matrix_multiply(self):
         """Multiply two matrices"""
         try:
-            result = np.matmul(self.matrix_data["A"], self.matrix_data["B"])
+            result = np.matmul(self.matrices["A"].values, self.matrices["B"].values)
             self.show_matrix_result("A × B =", result)
         except ValueError:
             messagebox.showerror("Error", "Matrix dimensions incompatible for multiplication")
 
+    @timed
     def matrix_solve(self):
         """Solve system of linear equations"""
         matrix_name = self.matrix_var.get()
-        matrix = self.matrix_data[matrix_name]
+        register = self.matrices[matrix_name]
         
         # For simplicity, assume right-hand side is matrix B
         try:
-            solution = np.linalg.solve(matrix, self.matrix_data["B"])
+            solution = register.solve(self.matrices["B"].values)
             self.show_matrix_result("Solution:", solution)
         except np.linalg.LinAlgError:
             messagebox.showerror("Error", "Cannot solve system (singular matrix or wrong dimensions)")
 
+    @timed
+    def matrix_rank(self):
+        """Calculate rank of current matrix"""
+        matrix_name = self.matrix_var.get()
+        rank = self.matrices[matrix_name].rank()
+        self.show_matrix_result(f"rank({matrix_name}) = {rank}")
+
+    @timed
     def show_matrix_result(self, title, matrix=None):
-        """Show matrix calculation result"""
-        result_window = tk.Toplevel(self.root)
-        result_window.title("Matrix Result")
-        
-        tk.Label(result_window, text=title, font=("Arial", 12, "bold")).pack(pady=5)
-        
-        if matrix is not None:
-            if isinstance(matrix, np.ndarray):
-                # Display matrix
-                frame = tk.Frame(result_window)
-                frame.pack(pady=10)
-                
-                for i in range(matrix.shape[0]):
-                    for j in range(matrix.shape[1]):
-                        tk.Label(
-                            frame,
-                            text=f"{matrix[i,j]:.4f}",
-                            relief=tk.RIDGE,
-                            width=8,
-                            padx=5,
-                            pady=5
-                        ).grid(row=i, column=j, padx=2, pady=2)
-            else:
-                # Display scalar result
-                tk.Label(result_window, text=str(matrix)).pack()
+        """Show matrix calculation result in the MatAns panel"""
+        self.mat_ans_title.config(text=title)
+        
+        rows, cols = 0, 0
+        if isinstance(matrix, np.ndarray):
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(-1, 1)
+            rows, cols = matrix.shape
+            self.mat_ans = matrix
+        
+        self.mat_ans_visible_dims = self._show_widget_grid(
+            self.mat_ans_cells,
+            self.mat_ans_grid,
+            self.mat_ans_visible_dims,
+            rows,
+            cols,
+            lambda parent: self.themed(
+                tk.Label(parent, relief=tk.RIDGE, width=8, padx=5, pady=5),
+                bg="bg_display", fg="fg_display"
+            )
+        )
         
-        tk.Button(
-            result_window,
-            text="Close",
-            command=result_window.destroy
-        ).pack(pady=10)
+        for i in range(rows):
+            for j in range(cols):
+                cell = self.mat_ans_cells[i][j]
+                text = f"{matrix[i, j]:.4f}"
+                if cell.cget("text") != text:
+                    cell.config(text=text)
 
-    def update_equation_interface(self):
-        """Update the equation interface based on selected type"""
-        for widget in self.eq_display_frame.winfo_children():
-            widget.destroy()
-        
+    def equation_shape(self):
+        """Return ("poly", degree) or ("system", n) for the selected equation type"""
         eq_type = self.eq_type_var.get()
+        n = max(1, self.eq_size_var.get())
         
         if eq_type == "Linear":
-            self.create_linear_equation_interface()
+            return "poly", 1
         elif eq_type == "Quadratic":
-            self.create_quadratic_equation_interface()
+            return "poly", 2
         elif eq_type == "Cubic":
-            self.create_cubic_equation_interface()
+            return "poly", 3
+        elif eq_type == "Polynomial":
+            return "poly", n
+        elif eq_type == "Inequality":
+            # The fx-991EX INEQ mode covers degrees 2 to 4
+            return "ineq", min(4, max(2, n))
         elif eq_type == "System2":
-            self.create_system2_equation_interface()
+            return "system", 2
         elif eq_type == "System3":
-            self.create_system3_equation_interface()
-
-    def create_linear_equation_interface(self):
-        """Create interface for linear equation (ax + b = 0)"""
-        tk.Label(self.eq_display_frame, text="ax + b = 0", font=("Arial", 12)).pack(pady=10)
-        
-        coeff_frame = tk.Frame(self.eq_display_frame)
-        coeff_frame.pack(pady=5)
-        
-        tk.Label(coeff_frame, text="a:").grid(row=0, column=0, padx=5)
-        self.a_entry = tk.Entry(coeff_frame, width=10)
-        self.a_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="b:").grid(row=1, column=0, padx=5)
-        self.b_entry = tk.Entry(coeff_frame, width=10)
-        self.b_entry.grid(row=1, column=1, padx=5)
-        
-        self.equation_coefficients = [self.a_entry, self.b_entry]
+            return "system", 3
+        else:
+            return "system", max(2, n)
 
-    def create_quadratic_equation_interface(self):
-        """Create interface for quadratic equation (ax² + bx + c = 0)"""
-        tk.Label(self.eq_display_frame, text="ax² + bx + c = 0", font=("Arial", 12)).pack(pady=10)
-        
-        coeff_frame = tk.Frame(self.eq_display_frame)
-        coeff_frame.pack(pady=5)
-        
-        tk.Label(coeff_frame, text="a:").grid(row=0, column=0, padx=5)
-        self.a_entry = tk.Entry(coeff_frame, width=10)
-        self.a_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="b:").grid(row=1, column=0, padx=5)
-        self.b_entry = tk.Entry(coeff_frame, width=10)
-        self.b_entry.grid(row=1, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="c:").grid(row=2, column=0, padx=5)
-        self.c_entry = tk.Entry(coeff_frame, width=10)
-        self.c_entry.grid(row=2, column=1, padx=5)
+    @timed
+    def update_equation_interface(self):
+        """Update the equation interface based on selected type"""
+        for widget in self.eq_display_frame.winfo_children():
+            widget.destroy()
+        self.eq_result_label.config(text="")
         
-        self.equation_coefficients = [self.a_entry, self.b_entry, self.c_entry]
-
-    def create_cubic_equation_interface(self):
-        """Create interface for cubic equation (ax³ + bx² + cx + d = 0)"""
-        tk.Label(self.eq_display_frame, text="ax³ + bx² + cx + d = 0", font=("Arial", 12)).pack(pady=10)
+        kind, n = self.equation_shape()
+        if kind == "poly":
+            self.create_polynomial_equation_interface(n)
+        elif kind == "ineq":
+            self.create_polynomial_equation_interface(n, inequality=True)
+        else:
+            self.create_system_equation_interface(n)
+
+    def create_polynomial_equation_interface(self, degree, inequality=False):
+        """Create interface for a degree-n polynomial equation or inequality"""
+        names = "abcdefghijk"
+        powers = ["", "x", "x²", "x³", "x⁴", "x⁵", "x⁶", "x⁷", "x⁸", "x⁹", "x¹⁰"]
+        terms = [f"{names[i]}{powers[degree - i]}" for i in range(degree + 1)]
+        
+        if inequality:
+            header = tk.Frame(self.eq_display_frame)
+            header.pack(pady=10)
+            tk.Label(header, text=" + ".join(terms), font=("Arial", 12)).pack(side=tk.LEFT)
+            tk.OptionMenu(header, self.ineq_op_var, ">", "≥", "<", "≤").pack(side=tk.LEFT, padx=5)
+            tk.Label(header, text="0", font=("Arial", 12)).pack(side=tk.LEFT)
+        else:
+            tk.Label(self.eq_display_frame, text=" + ".join(terms) + " = 0", font=("Arial", 12)).pack(pady=10)
         
         coeff_frame = tk.Frame(self.eq_display_frame)
         coeff_frame.pack(pady=5)
         
-        tk.Label(coeff_frame, text="a:").grid(row=0, column=0, padx=5)
-        self.a_entry = tk.Entry(coeff_frame, width=10)
-        self.a_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="b:").grid(row=1, column=0, padx=5)
-        self.b_entry = tk.Entry(coeff_frame, width=10)
-        self.b_entry.grid(row=1, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="c:").grid(row=2, column=0, padx=5)
-        self.c_entry = tk.Entry(coeff_frame, width=10)
-        self.c_entry.grid(row=2, column=1, padx=5)
-        
-        tk.Label(coeff_frame, text="d:").grid(row=3, column=0, padx=5)
-        self.d_entry = tk.Entry(coeff_frame, width=10)
-        self.d_entry.grid(row=3, column=1, padx=5)
-        
-        self.equation_coefficients = [self.a_entry, self.b_entry, self.c_entry, self.d_entry]
-    def create_system2_equation_interface(self):
-        """Create interface for 2x2 system of equations"""
-        tk.Label(self.eq_display_frame, text="System of 2 Equations", font=("Arial", 12)).pack(pady=10)
-        
-        # Equation 1: a1x + b1y = c1
-        eq1_frame = tk.Frame(self.eq_display_frame)
-        eq1_frame.pack(pady=5)
-        
-        tk.Label(eq1_frame, text="a₁:").grid(row=0, column=0, padx=5)
-        self.a1_entry = tk.Entry(eq1_frame, width=8)
-        self.a1_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(eq1_frame, text="x + b₁:").grid(row=0, column=2, padx=5)
-        self.b1_entry = tk.Entry(eq1_frame, width=8)
-        self.b1_entry.grid(row=0, column=3, padx=5)
-        
-        tk.Label(eq1_frame, text="y = c₁:").grid(row=0, column=4, padx=5)
-        self.c1_entry = tk.Entry(eq1_frame, width=8)
-        self.c1_entry.grid(row=0, column=5, padx=5)
-        
-        # Equation 2: a2x + b2y = c2
-        eq2_frame = tk.Frame(self.eq_display_frame)
-        eq2_frame.pack(pady=5)
-        
-        tk.Label(eq2_frame, text="a₂:").grid(row=0, column=0, padx=5)
-        self.a2_entry = tk.Entry(eq2_frame, width=8)
-        self.a2_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(eq2_frame, text="x + b₂:").grid(row=0, column=2, padx=5)
-        self.b2_entry = tk.Entry(eq2_frame, width=8)
-        self.b2_entry.grid(row=0, column=3, padx=5)
-        
-        tk.Label(eq2_frame, text="y = c₂:").grid(row=0, column=4, padx=5)
-        self.c2_entry = tk.Entry(eq2_frame, width=8)
-        self.c2_entry.grid(row=0, column=5, padx=5)
-        
-        self.equation_coefficients = [
-            self.a1_entry, self.b1_entry, self.c1_entry,
-            self.a2_entry, self.b2_entry, self.c2_entry
-        ]
-
-    def create_system3_equation_interface(self):
-        """Create interface for 3x3 system of equations"""
-        tk.Label(self.eq_display_frame, text="System of 3 Equations", font=("Arial", 12)).pack(pady=10)
-        
-        # Equation 1: a1x + b1y + c1z = d1
-        eq1_frame = tk.Frame(self.eq_display_frame)
-        eq1_frame.pack(pady=5)
-        
-        tk.Label(eq1_frame, text="a₁:").grid(row=0, column=0, padx=5)
-        self.a1_entry = tk.Entry(eq1_frame, width=6)
-        self.a1_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(eq1_frame, text="x + b₁:").grid(row=0, column=2, padx=5)
-        self.b1_entry = tk.Entry(eq1_frame, width=6)
-        self.b1_entry.grid(row=0, column=3, padx=5)
-        
-        tk.Label(eq1_frame, text="y + c₁:").grid(row=0, column=4, padx=5)
-        self.c1_entry = tk.Entry(eq1_frame, width=6)
-        self.c1_entry.grid(row=0, column=5, padx=5)
-        
-        tk.Label(eq1_frame, text="z = d₁:").grid(row=0, column=6, padx=5)
-        self.d1_entry = tk.Entry(eq1_frame, width=6)
-        self.d1_entry.grid(row=0, column=7, padx=5)
-        
-        # Equation 2: a2x + b2y + c2z = d2
-        eq2_frame = tk.Frame(self.eq_display_frame)
-        eq2_frame.pack(pady=5)
-        
-        tk.Label(eq2_frame, text="a₂:").grid(row=0, column=0, padx=5)
-        self.a2_entry = tk.Entry(eq2_frame, width=6)
-        self.a2_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(eq2_frame, text="x + b₂:").grid(row=0, column=2, padx=5)
-        self.b2_entry = tk.Entry(eq2_frame, width=6)
-        self.b2_entry.grid(row=0, column=3, padx=5)
-        
-        tk.Label(eq2_frame, text="y + c₂:").grid(row=0, column=4, padx=5)
-        self.c2_entry = tk.Entry(eq2_frame, width=6)
-        self.c2_entry.grid(row=0, column=5, padx=5)
-        
-        tk.Label(eq2_frame, text="z = d₂:").grid(row=0, column=6, padx=5)
-        self.d2_entry = tk.Entry(eq2_frame, width=6)
-        self.d2_entry.grid(row=0, column=7, padx=5)
-        
-        # Equation 3: a3x + b3y + c3z = d3
-        eq3_frame = tk.Frame(self.eq_display_frame)
-        eq3_frame.pack(pady=5)
-        
-        tk.Label(eq3_frame, text="a₃:").grid(row=0, column=0, padx=5)
-        self.a3_entry = tk.Entry(eq3_frame, width=6)
-        self.a3_entry.grid(row=0, column=1, padx=5)
-        
-        tk.Label(eq3_frame, text="x + b₃:").grid(row=0, column=2, padx=5)
-        self.b3_entry = tk.Entry(eq3_frame, width=6)
-        self.b3_entry.grid(row=0, column=3, padx=5)
-        
-        tk.Label(eq3_frame, text="y + c₃:").grid(row=0, column=4, padx=5)
-        self.c3_entry = tk.Entry(eq3_frame, width=6)
-        self.c3_entry.grid(row=0, column=5, padx=5)
-        
-        tk.Label(eq3_frame, text="z = d₃:").grid(row=0, column=6, padx=5)
-        self.d3_entry = tk.Entry(eq3_frame, width=6)
-        self.d3_entry.grid(row=0, column=7, padx=5)
-        
-        self.equation_coefficients = [
-            self.a1_entry, self.b1_entry, self.c1_entry, self.d1_entry,
-            self.a2_entry, self.b2_entry, self.c2_entry, self.d2_entry,
-            self.a3_entry, self.b3_entry, self.c3_entry, self.d3_entry
-        ]
-
+        self.equation_coefficients = []
+        per_column = 4
+        for i in range(degree + 1):
+            row, col = i % per_column, 2 * (i // per_column)
+            tk.Label(coeff_frame, text=f"{names[i]}:").grid(row=row, column=col, padx=5)
+            entry = tk.Entry(coeff_frame, width=8)
+            entry.grid(row=row, column=col + 1, padx=5)
+            self.equation_coefficients.append(entry)
+
+    def create_system_equation_interface(self, n):
+        """Create interface for an n×n system of linear equations"""
+        tk.Label(self.eq_display_frame, text=f"System of {n} Equations", font=("Arial", 12)).pack(pady=10)
+        
+        grid_frame = tk.Frame(self.eq_display_frame)
+        grid_frame.pack(pady=5)
+        
+        # Header row: unknowns then the constant column
+        for j in range(n):
+            tk.Label(grid_frame, text=self.unknown_name(j, n)).grid(row=0, column=j, padx=2)
+        tk.Label(grid_frame, text="=").grid(row=0, column=n, padx=2)
+        
+        width = 8 if n <= 2 else 6 if n <= 4 else 4
+        self.equation_coefficients = []
+        for i in range(n):
+            for j in range(n + 1):
+                entry = tk.Entry(grid_frame, width=width)
+                entry.grid(row=i + 1, column=j, padx=2, pady=2)
+                self.equation_coefficients.append(entry)
+
+    def subscript(self, number):
+        """Render a non-negative integer with subscript digits"""
+        return "".join("₀₁₂₃₄₅₆₇₈₉"[int(d)] for d in str(number))
+
+    def unknown_name(self, index, n):
+        """Name of the index-th unknown in an n×n system"""
+        if n <= 3:
+            return "xyz"[index]
+        return "x" + self.subscript(index + 1)
+
+    def format_root(self, root):
+        """Format a polynomial root, dropping negligible imaginary parts"""
+        if abs(root.imag) <= 1e-12 * max(1.0, abs(root)):
+            return f"{root.real:.6f}"
+        sign = "+" if root.imag >= 0 else "-"
+        return f"{root.real:.6f} {sign} {abs(root.imag):.6f}i"
+
+    @timed
     def solve_equation(self):
         """Solve the current equation based on selected type"""
         try:
@@ -1648,103 +2172,40 @@ class FX991EXCalculator:
                 coefficients.append(float(value))
             
             eq_type = self.eq_type_var.get()
-            result_window = tk.Toplevel(self.root)
-            result_window.title("Equation Solution")
+            kind, n = self.equation_shape()
             
-            if eq_type == "Linear":
-                # ax + b = 0
-                a, b = coefficients
-                if a == 0:
-                    if b == 0:
-                        solution = "Infinite solutions (0 = 0)"
+            if kind == "ineq":
+                intervals = solve_inequality(coefficients, self.ineq_op_var.get())
+                result_text = format_intervals(intervals)
+            elif kind == "poly":
+                if not any(coefficients[:-1]):
+                    if coefficients[-1] == 0:
+                        result_text = "Infinite solutions (0 = 0)"
                     else:
-                        solution = "No solution (contradiction)"
+                        result_text = "No solution (contradiction)"
                 else:
-                    x = -b / a
-                    solution = f"x = {x:.6f}"
-                
-                tk.Label(result_window, text=solution, font=("Arial", 14)).pack(pady=20)
-            
-            elif eq_type == "Quadratic":
-                # ax² + bx + c = 0
-                a, b, c = coefficients
-                discriminant = b**2 - 4*a*c
-                
-                if discriminant > 0:
-                    x1 = (-b + math.sqrt(discriminant)) / (2*a)
-                    x2 = (-b - math.sqrt(discriminant)) / (2*a)
-                    solution = f"x₁ = {x1:.6f}\nx₂ = {x2:.6f}"
-                elif discriminant == 0:
-                    x = -b / (2*a)
-                    solution = f"x = {x:.6f} (double root)"
-                else:
-                    real = -b / (2*a)
-                    imag = math.sqrt(-discriminant) / (2*a)
-                    solution = f"x₁ = {real:.6f} + {imag:.6f}i\nx₂ = {real:.6f} - {imag:.6f}i"
-                
-                tk.Label(result_window, text=solution, font=("Arial", 14)).pack(pady=20)
-            
-            elif eq_type == "Cubic":
-                # ax³ + bx² + cx + d = 0
-                a, b, c, d = coefficients
-                # Using numpy roots function for simplicity
-                roots = np.roots([a, b, c, d])
-                solution = ""
-                for i, root in enumerate(roots):
-                    if np.isreal(root):
-                        solution += f"x_{i+1} = {root.real:.6f}\n"
+                    roots = solve_polynomial(coefficients)
+                    if len(roots) == 1:
+                        result_text = f"x = {self.format_root(roots[0])}"
                     else:
-                        solution += f"x_{i+1} = {root.real:.6f} + {root.imag:.6f}i\n"
-                
-                tk.Label(result_window, text=solution.strip(), font=("Arial", 14)).pack(pady=20)
-            
-            elif eq_type == "System2":
-                # 2x2 system
-                a1, b1, c1, a2, b2, c2 = coefficients
-                # Solve using numpy
-                A = np.array([[a1, b1], [a2, b2]])
-                B = np.array([c1, c2])
-                try:
-                    solution = np.linalg.solve(A, B)
-                    result_text = f"x = {solution[0]:.6f}\ny = {solution[1]:.6f}"
-                except np.linalg.LinAlgError:
-                    det = np.linalg.det(A)
-                    if det == 0:
-                        if a1/a2 == b1/b2 == c1/c2:
-                            result_text = "Infinite solutions (dependent system)"
-                        else:
-                            result_text = "No solution (inconsistent system)"
-                    else:
-                        result_text = "Error solving system"
-                
-                tk.Label(result_window, text=result_text, font=("Arial", 14)).pack(pady=20)
-            
-            elif eq_type == "System3":
-                # 3x3 system
-                a1, b1, c1, d1, a2, b2, c2, d2, a3, b3, c3, d3 = coefficients
-                A = np.array([[a1, b1, c1], [a2, b2, c2], [a3, b3, c3]])
-                B = np.array([d1, d2, d3])
+                        result_text = "\n".join(
+                            f"x{self.subscript(i + 1)} = {self.format_root(root)}"
+                            for i, root in enumerate(roots)
+                        )
+            else:
+                system = np.array(coefficients).reshape(n, n + 1)
                 try:
-                    solution = np.linalg.solve(A, B)
-                    result_text = f"x = {solution[0]:.6f}\ny = {solution[1]:.6f}\nz = {solution[2]:.6f}"
-                except np.linalg.LinAlgError:
-                    det = np.linalg.det(A)
-                    if det == 0:
-                        result_text = "System may have no solution or infinite solutions"
-                    else:
-                        result_text = "Error solving system"
-                
-                tk.Label(result_window, text=result_text, font=("Arial", 14)).pack(pady=20)
+                    solution = solve_linear_system(system[:, :n], system[:, n])
+                    result_text = "\n".join(
+                        f"{self.unknown_name(i, n)} = {value:.6f}" for i, value in enumerate(solution)
+                    )
+                except np.linalg.LinAlgError as e:
+                    result_text = str(e)
             
-            # Add close button
-            tk.Button(
-                result_window,
-                text="Close",
-                command=result_window.destroy
-            ).pack(pady=10)
+            self.eq_result_label.config(text=result_text)
             
             # Add to history
-            self.add_to_history(f"Solved {eq_type} equation: {solution}")
+            self.add_to_history(f"Solved {eq_type} equation: {result_text}")
         
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numeric coefficients")
@@ -1756,7 +2217,17 @@ class FX991EXCalculator:
         self.root.mainloop()
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    calculator = FX991EXCalculator(root)
-    calculator.run()
+    # Only needed here, so importing the window does not import the service
+    import server
+
+    parser = argparse.ArgumentParser(description="Casio fx-991EX ClassWiz emulator")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP/JSON service instead of the window")
+    server.add_arguments(parser)
+    args = parser.parse_args()
+    if args.serve:
+        server.main(args)
+    else:
+        root = tk.Tk()
+        calculator = FX991EXCalculator(root)
+        calculator.run()
  
@@ -0,0 +1,459 @@
+"""Calculator state and key handling, independent of any widgets
+
+FX991EXCalculator subclasses CalculatorCore and overrides the display
+and reporting hooks; scripts and benchmarks can drive the core directly.
+"""
+from base_n import BASES, evaluate as evaluate_base_n, format_base
+from expression import ANGLE_MODES, evaluate, format_result, split_format_suffix
+from input_buffer import InputBuffer
+from keymap import FUNCTION_TOKENS, KEYMAP, VARIABLE_KEYS
+from live_preview import LivePreview
+from profiling import LatencyRecorder, timed
+from root_finder import solve
+
+# Keys that continue from the previous result (Ans+…) instead of starting over
+CONTINUATIONS = ("+", "−", "×", "÷", "^(", "²", "³", "⁻¹", "!", "%", "mod")
+
+# Characters of the input shown on the small and the main display line
+INPUT_LINE_WIDTH = 32
+MAIN_LINE_WIDTH = 20
+
+
+class CalculatorCore:
+    """The calculator without a window: input, modes, memories and results"""
+
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else {}
+
+        # Application state
+        self.buffer = InputBuffer()
+        self.result_shown = False
+        self.shift_active = False
+        self.alpha_active = False
+        self.angle_mode = self.settings.get("angle_mode", "DEG")  # DEG, RAD, GRAD
+        self.calculation_mode = self.settings.get("calculation_mode", "COMP")  # COMP, STAT, etc.
+        self.decimal_places = self.settings.get("decimal_places", 10)
+        self.ans = 0
+        # Variables A–F, M, x and y; SOLVE stores its root in x
+        self.memories = {"A": 0, "B": 0, "C": 0, "D": 0, "E": 0, "F": 0, "M": 0, "x": 0, "y": 0}
+        self.complex_format = "rect"  # rect (a+bi) or polar (r∠θ)
+        self.base = "DEC"
+        self.prefix = None  # pending STO, RCL, FIX or hyp
+        self.history = []
+        self.history_loader = None  # reads a restored session's history on first use
+        self.max_history = 50
+        self.display_line1 = ""
+        self.display_line2 = "0"
+        self.status = ""
+        self.last_error = None
+        self.latency = LatencyRecorder()
+        self.macro = None  # key events while a macro is being recorded
+
+        # Live result of the input while it is typed
+        self.preview_enabled = self.settings.get("live_preview", False)
+        self.preview = LivePreview(self.angle_mode)
+        self.preview_text = ""
+
+        # (key, shift, alpha) → bound method, resolved with one lookup per key
+        self.key_actions = {
+            key: (getattr(self, action.method), action.args, action.modifier)
+            for key, action in KEYMAP.items()
+        }
+
+    @property
+    def current_input(self):
+        """The whole input line as text"""
+        return self.buffer.text
+
+    @current_input.setter
+    def current_input(self, text):
+        self.buffer.set_text(text)
+
+    @property
+    def history(self):
+        """Calculation history, oldest first"""
+        if self.history_loader is not None:
+            self._history = self.history_loader()
+            self.history_loader = None
+        return self._history
+
+    @history.setter
+    def history(self, entries):
+        self._history = entries
+        self.history_loader = None
+
+    # Hooks for a user interface
+
+    def update_display(self):
+        """Show display_line1/display_line2 and the mode indicators"""
+
+    def report_error(self, title, message):
+        self.last_error = f"{title}: {message}"
+
+    def show_status(self, text):
+        self.status = text
+
+    def show_mode_menu(self):
+        """Let the user pick a calculation mode"""
+
+    def show_setup(self):
+        """Open the SET UP screen"""
+
+    def schedule_preview(self):
+        """Bring the live result up to date; a window may wait for a pause in typing"""
+        self.update_preview()
+
+    def power_off(self):
+        self.clear_all()
+
+    # Key handling
+
+    @timed
+    def button_click(self, button_text):
+        """Handle one key press through the (key, SHIFT, ALPHA) table"""
+        if self.macro is not None:
+            self.macro.append(("key", button_text))
+        self._press(button_text, self.shift_active, self.alpha_active)
+
+    @timed
+    def type_key(self, button_text):
+        """Handle a key of the physical keyboard, which never has a SHIFT or ALPHA function
+
+        ( ) + * ^ take Shift on most keyboards, and the Shift keys also turn
+        SHIFT on, so the table's SHIFT and ALPHA functions are for the keypad.
+        """
+        if self.macro is not None:
+            self.macro.append(("type", button_text))
+        self._press(button_text, False, False)
+
+    def _press(self, button_text, shift, alpha):
+        if self.prefix is not None and button_text not in ("SHIFT", "ALPHA"):
+            if self.finish_prefix(button_text):
+                return
+
+        entry = self.key_actions.get((button_text, shift, alpha))
+        if entry is None:
+            self.shift_active = self.alpha_active = False
+            if shift or alpha:
+                # A SHIFT/ALPHA combination without a function does nothing
+                self.update_display()
+            else:
+                # Keys from other tabs and the physical keyboard type themselves
+                self.insert(button_text)
+            return
+
+        method, args, modifier = entry
+        if not modifier:
+            self.shift_active = self.alpha_active = False
+        method(*args)
+
+    @timed
+    def scientific_function(self, func_name):
+        """Handle a key of the scientific function tab"""
+        if self.macro is not None:
+            self.macro.append(("function", func_name))
+        if func_name == "SOLVE":
+            self.solve_for_x()
+            return
+        self.result_shown = False
+        self.buffer.insert(FUNCTION_TOKENS.get(func_name, ""))
+        self.refresh_input()
+
+    def insert(self, text):
+        """Type text at the cursor"""
+        if self.result_shown:
+            self.buffer.clear()
+            if text in CONTINUATIONS:
+                self.buffer.insert("Ans")
+            self.result_shown = False
+        self.buffer.insert(text)
+        self.refresh_input()
+
+    def refresh_input(self):
+        """Show the part of the input around the cursor on both display lines"""
+        self.display_line1 = self.buffer.view(INPUT_LINE_WIDTH, "|")
+        self.display_line2 = self.buffer.view(MAIN_LINE_WIDTH) if len(self.buffer) else "0"
+        if self.preview_enabled:
+            self.schedule_preview()
+        self.update_display()
+
+    @timed
+    def update_preview(self):
+        """Evaluate the input quietly for the live result; errors just clear it"""
+        text = ""
+        if self.preview_enabled and self.current_input and self.calculation_mode != "BASE-N":
+            complex_mode = self.calculation_mode == "CMPLX"
+            if (self.preview.angle_mode, self.preview.complex_mode) != (self.angle_mode, complex_mode):
+                self.preview.set_mode(self.angle_mode, complex_mode)
+            self.preview.set_variables(self.expression_variables())
+            value = self.preview.value(self.current_input)
+            if value is not None:
+                _, complex_format = split_format_suffix(self.current_input)
+                try:
+                    text = format_result(
+                        value, self.decimal_places, complex_format or self.complex_format, self.angle_mode
+                    )
+                except Exception:
+                    text = ""
+        if text != self.preview_text:
+            self.preview_text = text
+            self.update_display()
+
+    def negate(self):
+        """(−): a minus sign, or multiplication by -1 right after a number"""
+        previous = self.buffer.previous
+        if previous is not None and previous[-1] in "0123456789" and not self.result_shown:
+            self.insert("*(-1)")
+        else:
+            self.insert("-")
+
+    def toggle_shift(self, state=None):
+        """Toggle shift mode"""
+        if state is None:
+            self.shift_active = not self.shift_active
+        else:
+            self.shift_active = state
+        self.update_display()
+
+    def toggle_alpha(self, state=None):
+        """Toggle alpha mode"""
+        if state is None:
+            self.alpha_active = not self.alpha_active
+        else:
+            self.alpha_active = state
+        self.update_display()
+
+    def toggle_insert_mode(self):
+        """INS: switch between inserting and overwriting"""
+        self.buffer.overwrite = not self.buffer.overwrite
+        self.show_status("Overwrite" if self.buffer.overwrite else "Insert")
+        self.update_display()
+
+    def _edit(self):
+        # Editing keys return from a shown result to the expression
+        self.result_shown = False
+
+    def delete_char(self):
+        """Delete the key press before the cursor"""
+        self._edit()
+        self.buffer.backspace()
+        self.refresh_input()
+
+    def delete_forward(self):
+        """Delete the key press after the cursor"""
+        self._edit()
+        self.buffer.delete()
+        self.refresh_input()
+
+    def cursor_left(self):
+        self._edit()
+        self.buffer.left()
+        self.refresh_input()
+
+    def cursor_right(self):
+        self._edit()
+        self.buffer.right()
+        self.refresh_input()
+
+    def cursor_home(self):
+        self._edit()
+        self.buffer.home()
+        self.refresh_input()
+
+    def cursor_end(self):
+        self._edit()
+        self.buffer.end()
+        self.refresh_input()
+
+    def clear_all(self):
+        """Clear all input and reset calculator"""
+        self.buffer.clear()
+        self.display_line1 = ""
+        self.display_line2 = "0"
+        self.result_shown = False
+        self.prefix = None
+        self.update_display()
+
+    def begin_prefix(self, prefix):
+        """Wait for the key that completes STO, RCL, FIX or hyp"""
+        self.prefix = prefix
+        self.show_status({"FIX": "FIX 0~9?", "hyp": "hyp"}.get(prefix, f"{prefix} to A~F, M, x, y"))
+        self.update_display()
+
+    def finish_prefix(self, key):
+        """Complete a pending prefix; returns False when the key should run as usual"""
+        prefix, self.prefix = self.prefix, None
+        if prefix == "hyp":
+            if key in ("sin", "cos", "tan"):
+                self.insert(f"{key}h(")
+                return True
+            return False
+        if prefix == "FIX":
+            if key.isdigit():
+                self.decimal_places = int(key)
+                self.settings["decimal_places"] = self.decimal_places
+                self.show_status(f"FIX {key}")
+            self.update_display()
+            return True
+        name = VARIABLE_KEYS.get(key)
+        if name is not None:
+            if prefix == "STO":
+                self.store(name)
+            else:
+                self.recall(name)
+        else:
+            self.update_display()
+        return True
+
+    def _current_value(self):
+        """Evaluate pending input so STO and M+ act on its value; None on error"""
+        if self.current_input and not self.result_shown:
+            self.calculate_result()
+            if not self.result_shown:
+                return None
+        return self.ans
+
+    def store(self, name):
+        """STO: save the current result in a variable"""
+        value = self._current_value()
+        if value is None:
+            return
+        self.memories[name] = value
+        self.display_line1 = f"Ans→{name}"
+        self.display_line2 = format_result(value, self.decimal_places)
+        self.result_shown = True
+        self.update_display()
+
+    def recall(self, name):
+        """RCL: type a variable into the input and show its value"""
+        self.insert(name)
+        self.show_status(f"{name} = {format_result(self.memories[name], self.decimal_places)}")
+
+    def memory_add(self, sign):
+        """M+ / M−: add the current result to (or subtract it from) M"""
+        value = self._current_value()
+        if value is None:
+            return
+        self.memories["M"] += sign * value
+        self.display_line1 = "M+" if sign > 0 else "M−"
+        self.display_line2 = format_result(value, self.decimal_places)
+        self.result_shown = True
+        self.update_display()
+
+    def set_angle_mode(self, mode):
+        """Set the angle calculation mode (DEG, RAD, GRAD)"""
+        self.angle_mode = mode
+        if self.preview_enabled:
+            self.schedule_preview()
+        self.update_display()
+
+    def cycle_angle_mode(self):
+        """DRG: step through DEG, RAD and GRAD"""
+        index = ANGLE_MODES.index(self.angle_mode)
+        self.set_angle_mode(ANGLE_MODES[(index + 1) % len(ANGLE_MODES)])
+
+    # Results
+
+    @timed
+    def calculate_result(self):
+        """Calculate and display the result"""
+        if self.calculation_mode == "BASE-N":
+            self.calculate_base_n_result()
+            return
+
+        try:
+            # The expression is translated and compiled once per distinct input;
+            # CMPLX mode only swaps the namespace it is evaluated against
+            result = evaluate(
+                self.current_input,
+                self.angle_mode,
+                self.expression_variables(),
+                complex_mode=self.calculation_mode == "CMPLX"
+            )
+
+            # Format the result, honouring a trailing →r∠θ / →a+bi
+            _, complex_format = split_format_suffix(self.current_input)
+            formatted_result = format_result(
+                result,
+                self.decimal_places,
+                complex_format or self.complex_format,
+                self.angle_mode
+            )
+
+            self.display_line2 = formatted_result
+            self.ans = result
+            self.result_shown = True
+
+            # Add to history
+            self.add_to_history(f"{self.current_input} = {formatted_result}")
+
+        except Exception as e:
+            self.display_line2 = "Error"
+            self.report_error("Calculation Error", f"Invalid expression: {e}")
+
+        self.update_display()
+
+    @timed
+    def calculate_base_n_result(self):
+        """Evaluate the input as 32-bit integers in the selected base"""
+        base = BASES[self.base]
+        try:
+            result = evaluate_base_n(self.current_input, base)
+            self.display_line2 = format_base(result, base)
+            self.ans = result
+            self.result_shown = True
+            self.add_to_history(f"{self.base} {self.current_input} = {self.display_line2}")
+        except Exception as e:
+            self.display_line2 = "Error"
+            self.report_error("Calculation Error", f"Invalid BASE-N expression: {e}")
+
+        self.update_display()
+
+    def expression_variables(self):
+        """Variables visible to the evaluator: Ans, A–F, M, x and y"""
+        variables = dict(self.memories)
+        variables["ans"] = self.ans
+        return variables
+
+    @timed
+    def solve_for_x(self):
+        """SOLVE the input for x, starting from the previous solution; returns the SolveResult"""
+        try:
+            result = solve(
+                self.current_input,
+                guess=self.memories["x"],
+                angle_mode=self.angle_mode,
+                variables=self.expression_variables()
+            )
+        except Exception as e:
+            self.display_line2 = "Error"
+            self.report_error("Solve Error", f"Cannot solve expression: {e}")
+            self.update_display()
+            return None
+
+        if result.converged:
+            self.memories["x"] = result.root
+            self.display_line2 = f"x={format_result(result.root, self.decimal_places)}"
+            self.add_to_history(f"SOLVE {self.current_input}: {self.display_line2}")
+        else:
+            self.display_line2 = "Can't Solve"
+
+        self.display_line1 = self.current_input
+        self.result_shown = True
+        self.show_status(f"SOLVE: {result.iterations} iterations, L−R = {result.residual:.3g}")
+        self.update_display()
+        return result
+
+    def add_to_history(self, entry):
+        """Add an entry to the calculation history"""
+        if not self.settings.get("history_enabled", True):
+            return
+
+        self.history.append(entry)
+        if len(self.history) > self.max_history:
+            self.history.pop(0)
+
+    def search_history(self, text):
+        """History entries containing text (any case), newest first"""
+        text = text.casefold()
+        return [entry for entry in reversed(self.history) if text in entry.casefold()]
@@ -0,0 +1,33 @@
+"""Dirty tracking for display widgets
+
+The model remembers the options last pushed to each widget and only
+calls configure() with the ones whose value changed.
+"""
+
+
+class DisplayModel:
+    """Last rendered options per widget"""
+
+    def __init__(self):
+        self.rendered = {}
+        self.pushes = 0
+        self.skipped = 0
+
+    def push(self, widget, **options):
+        """Configure only the options that differ from what is on screen"""
+        last = self.rendered.setdefault(widget, {})
+        changed = {key: value for key, value in options.items() if last.get(key) != value}
+        if not changed:
+            self.skipped += 1
+            return False
+        widget.configure(**changed)
+        last.update(changed)
+        self.pushes += 1
+        return True
+
+    def invalidate(self, widget=None):
+        """Forget what was rendered, e.g. after a theme reconfigured the widgets"""
+        if widget is None:
+            self.rendered.clear()
+        else:
+            self.rendered.pop(widget, None)
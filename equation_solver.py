@@ -0,0 +1,427 @@
+"""Headless equation solvers for the EQN mode"""
+from collections import namedtuple
+
+import numpy as np
+
+# Number of coefficients per row for each equation type
+EQUATION_TYPES = {
+    "Linear": 2,     # ax + b = 0
+    "Quadratic": 3,  # ax² + bx + c = 0
+    "Cubic": 4,      # ax³ + bx² + cx + d = 0
+    "System2": 6,    # a₁x + b₁y = c₁, a₂x + b₂y = c₂
+    "System3": 12,   # a₁x + b₁y + c₁z = d₁, ... (three rows)
+}
+
+
+def _as_coefficient_rows(eq_type, coefficients):
+    if eq_type not in EQUATION_TYPES:
+        raise ValueError(f"Unknown equation type: {eq_type}")
+    rows = np.asarray(coefficients, dtype=float)
+    if rows.ndim == 1:
+        rows = rows.reshape(1, -1)
+    if rows.ndim != 2 or rows.shape[1] != EQUATION_TYPES[eq_type]:
+        raise ValueError(
+            f"{eq_type} equations need an (N, {EQUATION_TYPES[eq_type]}) coefficient array"
+        )
+    return rows
+
+
+def solve_linear_batch(rows):
+    """Roots of ax + b = 0 as an (N, 1) array; NaN where a == 0"""
+    a, b = rows[:, 0], rows[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.where(a != 0, -b / a, np.nan)
+    return x[:, None]
+
+
+def _stable_quadratic_roots(a, b, c):
+    """Vectorized roots of ax² + bx + c with a != 0, free of cancellation"""
+    discriminant = b * b - 4 * a * c
+    sqrt_d = np.sqrt(discriminant.astype(complex))
+    sign_b = np.where(b < 0, -1.0, 1.0)
+    q = -0.5 * (b + sign_b * sqrt_d)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x1 = q / a
+        # q == 0 only when b == c == 0, giving a double root at zero
+        x2 = np.where(q != 0, c / np.where(q != 0, q, 1), 0)
+    return x1, x2
+
+
+def solve_quadratic_batch(rows):
+    """Roots of ax² + bx + c = 0 as an (N, 2) complex array
+
+    Uses the vectorized discriminant with the cancellation-free form
+    q = -(b + sign(b)·√D) / 2, x₁ = q / a, x₂ = c / q.  Rows with a == 0
+    degrade to the linear root in the first column and NaN in the second;
+    rows with a == b == 0 have no roots and are all NaN.
+    """
+    a, b, c = rows[:, 0], rows[:, 1], rows[:, 2]
+    roots = np.full((rows.shape[0], 2), np.nan, dtype=complex)
+
+    quadratic = a != 0
+    x1, x2 = _stable_quadratic_roots(a[quadratic], b[quadratic], c[quadratic])
+    roots[quadratic, 0] = x1
+    roots[quadratic, 1] = x2
+
+    linear = ~quadratic & (b != 0)
+    roots[linear, 0] = -c[linear] / b[linear]
+    return roots
+
+
+def solve_cubic_batch(rows):
+    """Roots of ax³ + bx² + cx + d = 0 as an (N, 3) complex array
+
+    One real root per row comes from the vectorized Cardano/trigonometric
+    formula, is polished with Newton steps, and the remaining quadratic
+    factor is solved with the stable quadratic formula.  The few badly
+    scaled rows where these roots do not multiply back out to the
+    coefficients are solved again from their companion matrices.  Rows
+    with a == 0 are returned as NaN.
+    """
+    n = rows.shape[0]
+    roots = np.full((n, 3), np.nan, dtype=complex)
+    cubic = rows[:, 0] != 0
+    if not np.any(cubic):
+        return roots
+
+    # Monic form x³ + p2·x² + p1·x + p0, depressed with x = t - p2/3
+    p2, p1, p0 = (rows[cubic, 1:] / rows[cubic, :1]).T
+    shift = p2 / 3
+    p = p1 - p2 * shift
+    q = 2 * shift ** 3 - shift * p1 + p0
+    delta = (q / 2) ** 2 + (p / 3) ** 3
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # One real root: u = ∛(-q/2 ∓ √Δ) chosen to avoid cancellation
+        u = np.cbrt(-q / 2 - np.where(q < 0, -1.0, 1.0) * np.sqrt(np.maximum(delta, 0)))
+        t_one = np.where(u != 0, u - p / (3 * np.where(u != 0, u, 1)), 0)
+
+        # Three real roots: take the largest from the trigonometric form
+        m = 2 * np.sqrt(np.maximum(-p / 3, 0))
+        cos_arg = np.clip(np.where(m != 0, 3 * q / (p * np.where(m != 0, m, 1)), 0), -1, 1)
+        t_three = m * np.cos(np.arccos(cos_arg) / 3)
+
+    x = np.where(delta > 0, t_one, t_three) - shift
+
+    # Newton polishing on the monic polynomial
+    for _ in range(2):
+        f = ((x + p2) * x + p1) * x + p0
+        df = (3 * x + 2 * p2) * x + p1
+        step = np.where(df != 0, f / np.where(df != 0, df, 1), 0)
+        x = x - step
+
+    # Deflate to x² + b1·x + b0.  From the top coefficients when x is small
+    # beside the other roots, from the constant term when it is large;
+    # either way round, the subtraction would cancel the small roots away.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        large = np.abs(x) ** 3 > np.abs(p0)
+        safe_x = np.where(large, x, 1)
+        b0 = np.where(large, -p0 / safe_x, p1 + x * (p2 + x))
+        b1 = np.where(large, (b0 - p1) / safe_x, p2 + x)
+    x1, x2 = _stable_quadratic_roots(np.ones_like(b1), b1, b0)
+
+    found = np.stack([x, x1, x2], axis=1)
+
+    # Badly scaled rows can still lose a root; the roots must multiply back
+    # out to the coefficients, and the rows where they do not are redone
+    # from the companion matrix, as np.roots would
+    redo = ~_matches_cubic(found, p2, p1, p0)
+    if np.any(redo):
+        found[redo] = _companion_cubic_roots(p2[redo], p1[redo], p0[redo])
+    roots[cubic] = found
+    return roots
+
+
+def _matches_cubic(roots, p2, p1, p0, tolerance=1e-10):
+    """Rows whose roots give back x³ + p2·x² + p1·x + p0 by Vieta's formulas"""
+    r1, r2, r3 = roots.T
+    checks = [
+        (r1 + r2 + r3 + p2, abs(r1) + abs(r2) + abs(r3)),
+        (r1 * r2 + r1 * r3 + r2 * r3 - p1, abs(r1 * r2) + abs(r1 * r3) + abs(r2 * r3)),
+        (r1 * r2 * r3 + p0, abs(r1 * r2 * r3)),
+    ]
+    matches = np.ones(len(p0), dtype=bool)
+    for error, scale in checks:
+        matches &= abs(error) <= tolerance * scale
+    return matches
+
+
+def _companion_cubic_roots(p2, p1, p0):
+    """Roots of monic cubics as the eigenvalues of their stacked companion matrices"""
+    companion = np.zeros((len(p0), 3, 3))
+    companion[:, 0] = -np.stack([p2, p1, p0], axis=1)
+    companion[:, 1, 0] = companion[:, 2, 1] = 1
+    roots = np.linalg.eigvals(companion).astype(complex)
+    return _polish_cubic_roots((p2[:, None], p1[:, None], p0[:, None]), roots)
+
+
+def _polish_cubic_roots(coefficients, roots, iterations=3):
+    """Vectorized polish_roots() for monic cubics x³ + p2·x² + p1·x + p0"""
+    p2, p1, p0 = coefficients
+    residual = np.abs(((roots + p2) * roots + p1) * roots + p0)
+    for _ in range(iterations):
+        slope = (3 * roots + 2 * p2) * roots + p1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            candidate = roots - (((roots + p2) * roots + p1) * roots + p0) / slope
+            candidate_residual = np.abs(((candidate + p2) * candidate + p1) * candidate + p0)
+        better = np.isfinite(candidate) & (candidate_residual < residual)
+        if not np.any(better):
+            break
+        roots = np.where(better, candidate, roots)
+        residual = np.where(better, candidate_residual, residual)
+    return roots
+
+
+def solve_system_batch(rows, size):
+    """Solve stacked size×size systems as an (N, size) array; NaN where singular"""
+    augmented = rows.reshape(-1, size, size + 1)
+    matrices = augmented[:, :, :size]
+    rhs = augmented[:, :, size]
+
+    solutions = np.full(rhs.shape, np.nan)
+    # Rounding leaves a singular matrix a determinant of a few ulps, so it
+    # is measured against the largest it could be, the product of the row
+    # lengths (Hadamard's bound)
+    bound = np.prod(np.linalg.norm(matrices, axis=2), axis=1)
+    regular = np.abs(np.linalg.det(matrices)) > size * np.finfo(float).eps * bound
+    if np.any(regular):
+        solutions[regular] = np.linalg.solve(matrices[regular], rhs[regular, :, None])[..., 0]
+    return solutions
+
+
+def solve_batch(eq_type, coefficients):
+    """Solve many equations of one EQN type in a single vectorized pass
+
+    ``coefficients`` is an (N, k) array with one coefficient set per row, in
+    the same order as the Equation tab entries.  Returns an (N, m) array of
+    roots (complex for polynomials) or unknowns (for systems).
+    """
+    rows = _as_coefficient_rows(eq_type, coefficients)
+    if eq_type == "Linear":
+        return solve_linear_batch(rows)
+    elif eq_type == "Quadratic":
+        return solve_quadratic_batch(rows)
+    elif eq_type == "Cubic":
+        return solve_cubic_batch(rows)
+    elif eq_type == "System2":
+        return solve_system_batch(rows, 2)
+    elif eq_type == "System3":
+        return solve_system_batch(rows, 3)
+
+
+def polish_roots(coefficients, roots, iterations=3):
+    """Refine polynomial roots with Newton steps that never increase |p(x)|"""
+    coefficients = np.asarray(coefficients, dtype=complex)
+    derivative = np.polyder(coefficients)
+    roots = np.array(roots, dtype=complex)
+    residual = np.abs(np.polyval(coefficients, roots))
+    for _ in range(iterations):
+        slope = np.polyval(derivative, roots)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            candidate = roots - np.polyval(coefficients, roots) / slope
+        candidate_residual = np.abs(np.polyval(coefficients, candidate))
+        better = np.isfinite(candidate) & (candidate_residual < residual)
+        if not np.any(better):
+            break
+        roots[better] = candidate[better]
+        residual[better] = candidate_residual[better]
+    return roots
+
+
+def solve_polynomial(coefficients):
+    """All complex roots of a polynomial given highest-degree coefficient first
+
+    Roots are the eigenvalues of the companion matrix, refined by Newton
+    polishing.  Leading zero coefficients lower the degree instead of
+    dividing by zero; a constant polynomial raises ValueError.
+    """
+    coefficients = np.trim_zeros(np.asarray(coefficients, dtype=float), "f")
+    if coefficients.size < 2:
+        raise ValueError("Polynomial must have degree 1 or higher")
+
+    # Zero constant terms are exact roots at the origin
+    nonzero = np.flatnonzero(coefficients)
+    zero_roots = coefficients.size - 1 - nonzero[-1]
+    reduced = coefficients[:nonzero[-1] + 1]
+
+    degree = reduced.size - 1
+    if degree == 0:
+        roots = np.empty(0, dtype=complex)
+    elif degree == 1:
+        roots = np.array([-reduced[1] / reduced[0]], dtype=complex)
+    elif degree == 2:
+        x1, x2 = _stable_quadratic_roots(reduced[:1], reduced[1:2], reduced[2:])
+        roots = np.concatenate([x1, x2])
+    else:
+        companion = np.zeros((degree, degree))
+        companion[0, :] = -reduced[1:] / reduced[0]
+        companion[np.arange(1, degree), np.arange(degree - 1)] = 1.0
+        roots = polish_roots(reduced, np.linalg.eigvals(companion))
+    return np.concatenate([roots, np.zeros(zero_roots, dtype=complex)])
+
+
+def solve_linear_system(matrix, rhs):
+    """Solve an n×n system A·x = b
+
+    Raises np.linalg.LinAlgError with "Infinite solutions" or
+    "No solution" when A is singular.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    rhs = np.asarray(rhs, dtype=float)
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1] or rhs.shape != matrix.shape[:1]:
+        raise ValueError("System needs an n×n coefficient matrix and n constants")
+    try:
+        if np.linalg.matrix_rank(matrix) == matrix.shape[0]:
+            return np.linalg.solve(matrix, rhs)
+    except np.linalg.LinAlgError:
+        pass
+    augmented = np.column_stack([matrix, rhs])
+    if np.linalg.matrix_rank(augmented) == np.linalg.matrix_rank(matrix):
+        raise np.linalg.LinAlgError("Infinite solutions (dependent system)")
+    raise np.linalg.LinAlgError("No solution (inconsistent system)")
+
+
+# Inequality operators accepted by the INEQ solvers, display form included
+INEQUALITY_OPERATORS = {">": ">", ">=": ">=", "≥": ">=", "<": "<", "<=": "<=", "≤": "<="}
+
+Interval = namedtuple("Interval", "low high closed_low closed_high")
+
+
+def _real_roots_batch(rows, tolerance=1e-5):
+    """Sorted distinct real roots per row as a NaN-padded (N, degree) array"""
+    n, size = rows.shape
+    degree = size - 1
+    if degree == 2:
+        roots = solve_quadratic_batch(rows)
+    elif degree == 3:
+        roots = solve_cubic_batch(rows)
+    else:
+        roots = np.full((n, degree), np.nan, dtype=complex)
+        regular = rows[:, 0] != 0
+        companion = np.zeros((np.count_nonzero(regular), degree, degree))
+        companion[:, 0, :] = -rows[regular, 1:] / rows[regular, :1]
+        companion[:, np.arange(1, degree), np.arange(degree - 1)] = 1.0
+        roots[regular] = np.linalg.eigvals(companion)
+
+    # Rows with a vanishing leading coefficient drop to a lower degree; a
+    # constant has no roots, its sign alone decides the inequality
+    for i in np.flatnonzero(rows[:, 0] == 0):
+        roots[i, :] = np.nan
+        if np.any(rows[i, :-1]):
+            found = solve_polynomial(rows[i])
+            roots[i, :found.size] = found
+
+    finite = np.isfinite(roots)
+    roots = np.where(finite, roots, 0)
+    scale = np.maximum(1.0, np.abs(roots))
+    real = np.where(finite & (np.abs(roots.imag) <= tolerance * scale), roots.real, np.nan)
+    real.sort(axis=1)
+
+    # Collapse multiple roots that came out as near-equal values
+    duplicate = np.zeros(real.shape, dtype=bool)
+    duplicate[:, 1:] = np.abs(np.diff(real, axis=1)) <= tolerance * np.maximum(1.0, np.abs(real[:, 1:]))
+    real[duplicate] = np.nan
+    real.sort(axis=1)
+    return real
+
+
+def _intervals_from_signs(roots, region_signs, root_ok, operator):
+    """Merge satisfied regions and root points into an ordered interval set"""
+    # A region's sign is only 0 when p is identically zero
+    satisfied = {">": lambda s: s > 0, ">=": lambda s: s >= 0,
+                 "<": lambda s: s < 0, "<=": lambda s: s <= 0}[operator]
+    pieces = []
+    bounds = [-np.inf] + list(roots) + [np.inf]
+    for i in range(len(roots) + 1):
+        pieces.append((bounds[i], bounds[i + 1], False, False, satisfied(region_signs[i])))
+        if i < len(roots):
+            pieces.append((roots[i], roots[i], True, True, root_ok))
+
+    intervals = []
+    current = None
+    for low, high, closed_low, closed_high, ok in pieces:
+        if not ok:
+            if current is not None:
+                intervals.append(Interval(*current))
+                current = None
+        elif current is None:
+            current = [low, high, closed_low, closed_high]
+        else:
+            current[1], current[3] = high, closed_high
+    if current is not None:
+        intervals.append(Interval(*current))
+    return intervals
+
+
+def solve_inequality_batch(coefficients, operator):
+    """Solve p(x) op 0 for many polynomials of the same degree at once
+
+    ``coefficients`` is an (N, degree + 1) array, highest power first, and
+    ``operator`` one of >, >=, <, <= (or ≥, ≤).  Real roots are found once
+    per row, then the sign of p is tested at one point inside each interval
+    between consecutive roots.  Returns one list of Interval per row.
+    """
+    if operator not in INEQUALITY_OPERATORS:
+        raise ValueError(f"Unknown inequality operator: {operator}")
+    operator = INEQUALITY_OPERATORS[operator]
+    rows = np.asarray(coefficients, dtype=float)
+    if rows.ndim == 1:
+        rows = rows.reshape(1, -1)
+    if rows.ndim != 2 or rows.shape[1] < 2:
+        raise ValueError("Inequalities need an (N, degree + 1) coefficient array")
+
+    roots = _real_roots_batch(rows)
+    n, slots = roots.shape
+    counts = np.count_nonzero(~np.isnan(roots), axis=1)
+
+    # Test points: left of the first root, midpoints, right of the last root
+    test_points = np.full((n, slots + 1), np.nan)
+    first = np.where(counts > 0, roots[:, 0], 0.0)
+    test_points[:, 0] = first - np.maximum(1.0, np.abs(first))
+    test_points[:, 1:] = (roots + np.roll(roots, -1, axis=1)) / 2
+    rows_idx = np.arange(n)
+    last = roots[rows_idx, np.maximum(counts - 1, 0)]
+    test_points[rows_idx, counts] = np.where(counts > 0, last + np.maximum(1.0, np.abs(last)), 0.0)
+    test_points[:, 0] = np.where(counts > 0, test_points[:, 0], 0.0)
+
+    # Horner evaluation of every test point in one pass
+    values = np.zeros_like(test_points)
+    for column in range(rows.shape[1]):
+        values = values * test_points + rows[:, column:column + 1]
+    signs = np.sign(values)
+
+    root_ok = operator in (">=", "<=")
+    return [
+        _intervals_from_signs(roots[i, :counts[i]], signs[i, :counts[i] + 1], root_ok, operator)
+        for i in range(n)
+    ]
+
+
+def solve_inequality(coefficients, operator):
+    """Solve a single polynomial inequality p(x) op 0 as a list of Interval"""
+    return solve_inequality_batch(np.asarray(coefficients, dtype=float).reshape(1, -1), operator)[0]
+
+
+def format_intervals(intervals, var="x", digits=6):
+    """Render an interval set the way the INEQ result screen does"""
+    if not intervals:
+        return "No solution"
+
+    def number(value):
+        return f"{value:.{digits}g}"
+
+    parts = []
+    for low, high, closed_low, closed_high in intervals:
+        if low == -np.inf and high == np.inf:
+            return "All real numbers"
+        if low == high:
+            parts.append(f"{var} = {number(low)}")
+        elif low == -np.inf:
+            parts.append(f"{var} {'≤' if closed_high else '<'} {number(high)}")
+        elif high == np.inf:
+            parts.append(f"{number(low)} {'≤' if closed_low else '<'} {var}")
+        else:
+            parts.append(
+                f"{number(low)} {'≤' if closed_low else '<'} {var} {'≤' if closed_high else '<'} {number(high)}"
+            )
+    return ", ".join(parts)
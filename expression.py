@@ -0,0 +1,427 @@
+"""Translation, compilation and evaluation of calculator expressions"""
+import ast
+import math
+import cmath
+import random
+import re
+from functools import lru_cache
+from types import SimpleNamespace
+
+from units import UnitFolder, const, conv
+
+ANGLE_MODES = ("DEG", "RAD", "GRAD")
+
+# Display symbols and key labels mapped to Python syntax.  Longer symbols
+# must win over their prefixes (sinh⁻¹ before sin⁻¹ before ⁻¹).
+SYMBOLS = {
+    "×": "*",
+    "÷": "/",
+    "−": "-",
+    "^": "**",
+    "π": "pi",
+    "√": "sqrt",
+    "∛": "cbrt",
+    "²": "**2",
+    "³": "**3",
+    "⁻¹": "**(-1)",
+    "sinh⁻¹": "asinh",
+    "cosh⁻¹": "acosh",
+    "tanh⁻¹": "atanh",
+    "sin⁻¹": "asin",
+    "cos⁻¹": "acos",
+    "tan⁻¹": "atan",
+    "log₂": "log2",
+    "10^": "10**",
+    "e^": "e**",
+    "Ans": "ans",
+    "Ran#": "rand()",
+    "%": "/100",
+    "mod": "%",
+    # r∠θ parses as a matmul-precedence operator, rewritten to polar(r, θ)
+    "∠": "@",
+}
+_SYMBOL_PATTERN = re.compile(
+    "|".join(re.escape(symbol) for symbol in sorted(SYMBOLS, key=len, reverse=True))
+)
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<string>"[^"]*"|'[^']*')
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z_0-9]*(?:\.[A-Za-z_][A-Za-z_0-9]*)*)
+  | (?P<space>\s+)
+  | (?P<op>\*\*|//|.)
+""", re.VERBOSE)
+
+# Names that are values rather than functions, for implicit multiplication
+# such as 2x, 3π or x(x+1)
+VARIABLES = {"x", "y", "i", "ans", "pi", "e", "A", "B", "C", "D", "E", "F", "M"}
+
+# Display-format suffixes accepted at the end of a CMPLX expression
+FORMAT_SUFFIXES = {"→r∠θ": "polar", "→a+bi": "rect"}
+
+
+def tokenize(text):
+    """Split translated text into (kind, value) tokens"""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind != "space":
+            tokens.append((kind, match.group()))
+    return tokens
+
+
+def _is_operand_end(token):
+    kind, value = token
+    return kind == "number" or value == ")" or (kind == "name" and value in VARIABLES)
+
+
+def _is_operand_start(token):
+    kind, value = token
+    return kind in ("number", "name") or value == "("
+
+
+def _wrap_factorial(tokens):
+    """Rewrite the operand before a postfix ! as factorial(operand)"""
+    if not tokens:
+        raise SyntaxError("Factorial needs an operand")
+    start = len(tokens) - 1
+    if tokens[start][1] == ")":
+        depth = 0
+        for start in range(len(tokens) - 1, -1, -1):
+            if tokens[start][1] == ")":
+                depth += 1
+            elif tokens[start][1] == "(":
+                depth -= 1
+                if depth == 0:
+                    break
+        # Include the function name of a call such as sqrt(9)!
+        if start > 0 and tokens[start - 1][0] == "name" and tokens[start - 1][1] not in VARIABLES:
+            start -= 1
+    operand = tokens[start:]
+    del tokens[start:]
+    tokens.extend([("name", "factorial"), ("op", "(")] + operand + [("op", ")")])
+
+
+def split_format_suffix(text):
+    """Strip a trailing →r∠θ / →a+bi and return (expression, format or None)"""
+    stripped = text.rstrip()
+    for suffix, complex_format in FORMAT_SUFFIXES.items():
+        if stripped.endswith(suffix):
+            return stripped[:-len(suffix)], complex_format
+    return text, None
+
+
+def translate(text):
+    """Translate display text into a Python expression string
+
+    Display symbols are replaced, implicit multiplication is made explicit
+    (2x, 3(4), (1)(2)), postfix ! becomes factorial() and an equation
+    L = R becomes (L) - (R).
+    """
+    # Pad replacements so adjacent symbols such as iπ stay separate tokens
+    text = _SYMBOL_PATTERN.sub(lambda m: f" {SYMBOLS[m.group()]} ", text)
+
+    tokens = []
+    for token in tokenize(text):
+        if token[1] == "!":
+            _wrap_factorial(tokens)
+            continue
+        if tokens and _is_operand_end(tokens[-1]) and _is_operand_start(token):
+            tokens.append(("op", "*"))
+        tokens.append(token)
+
+    python_expr = " ".join(value for _, value in tokens)
+    if "=" in python_expr and not re.search(r"[<>!=]=|=[=<>]", python_expr):
+        left, _, right = python_expr.partition("=")
+        python_expr = f"({left})-({right})"
+    return python_expr
+
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Attribute,
+    ast.Constant, ast.Load, ast.Tuple, ast.List, ast.Compare, ast.BoolOp,
+    ast.IfExp, ast.keyword, ast.operator, ast.unaryop, ast.cmpop, ast.boolop,
+)
+
+
+def _validate(tree):
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise SyntaxError(f"Unsupported syntax: {type(node).__name__}")
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise SyntaxError(f"Access to {node.attr} is not allowed")
+        if isinstance(node, ast.Name) and node.id.startswith("__"):
+            raise SyntaxError(f"Access to {node.id} is not allowed")
+
+
+class _PolarRewriter(ast.NodeTransformer):
+    """Turn r @ θ (typed as r∠θ) into polar(r, θ)"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.MatMult):
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id="polar", ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+                node
+            )
+        return node
+
+
+@lru_cache(maxsize=512)
+def parse_expression(text):
+    """Parse display text into a validated Python AST (cached per text)"""
+    tree = ast.parse(translate(text), mode="eval")
+    tree = _PolarRewriter().visit(tree)
+    tree = ast.fix_missing_locations(UnitFolder().visit(tree))
+    _validate(tree)
+    return tree
+
+
+@lru_cache(maxsize=512)
+def compile_expression(text):
+    """Compile display text to a code object once; evaluate it many times"""
+    return compile(parse_expression(text), "<calculator>", "eval")
+
+
+def _integral(value, name):
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"{name} needs an integer argument")
+        value = int(value)
+    return value
+
+
+def factorial(n):
+    return math.factorial(_integral(n, "x!"))
+
+
+def comb(n, r):
+    return math.comb(_integral(n, "nCr"), _integral(r, "nCr"))
+
+
+def perm(n, r):
+    return math.perm(_integral(n, "nPr"), _integral(r, "nPr"))
+
+
+def log(a, b=None):
+    """log(x) is base 10; log(a, b) is the base-a logarithm of b, as on the fx-991EX"""
+    if b is None:
+        return math.log10(a)
+    return math.log(b, a)
+
+
+def cbrt(x):
+    if hasattr(math, "cbrt"):
+        return math.cbrt(x)
+    return math.copysign(abs(x) ** (1 / 3), x)
+
+
+def _angle_functions(mode):
+    """Trig functions for one angle mode, exact at multiples of a quarter turn"""
+    if mode == "RAD":
+        return {
+            "sin": math.sin, "cos": math.cos, "tan": math.tan,
+            "asin": math.asin, "acos": math.acos, "atan": math.atan,
+            "to_rad": lambda x: x, "from_rad": lambda x: x,
+        }
+
+    half_turn = 180.0 if mode == "DEG" else 200.0
+    quarter_turn = half_turn / 2
+
+    def to_rad(x):
+        return math.pi * math.fmod(x, 2 * half_turn) / half_turn
+
+    def from_rad(x):
+        return x * half_turn / math.pi
+
+    def quadrant(x):
+        turns = math.fmod(x, 2 * half_turn) / quarter_turn
+        if turns.is_integer():
+            return int(turns) % 4
+        return None
+
+    def sin(x):
+        q = quadrant(x)
+        return (0.0, 1.0, 0.0, -1.0)[q] if q is not None else math.sin(to_rad(x))
+
+    def cos(x):
+        q = quadrant(x)
+        return (1.0, 0.0, -1.0, 0.0)[q] if q is not None else math.cos(to_rad(x))
+
+    def tan(x):
+        q = quadrant(x)
+        if q in (1, 3):
+            raise ValueError("Math ERROR")
+        return 0.0 if q is not None else math.tan(to_rad(x))
+
+    return {
+        "sin": sin, "cos": cos, "tan": tan,
+        "asin": lambda x: from_rad(math.asin(x)),
+        "acos": lambda x: from_rad(math.acos(x)),
+        "atan": lambda x: from_rad(math.atan(x)),
+        "to_rad": to_rad, "from_rad": from_rad,
+    }
+
+
+def _complex_functions(mode, trig):
+    """CMPLX-mode functions: cmath for complex arguments, exact real paths otherwise"""
+    unit = {"DEG": math.pi / 180, "GRAD": math.pi / 200}.get(mode, 1.0)
+
+    def is_real(z):
+        return not isinstance(z, complex) or z.imag == 0
+
+    def real_or_complex(real_func, complex_func, domain=None):
+        def func(z):
+            if is_real(z):
+                z = z.real if isinstance(z, complex) else z
+                if domain is None or domain(z):
+                    return real_func(z)
+            return complex_func(z)
+        return func
+
+    def log(a, b=None):
+        if b is None:
+            return real_or_complex(math.log10, cmath.log10, lambda v: v > 0)(a)
+        return cmath.log(b) / cmath.log(a)
+
+    return {
+        "sin": real_or_complex(trig["sin"], lambda z: cmath.sin(z * unit)),
+        "cos": real_or_complex(trig["cos"], lambda z: cmath.cos(z * unit)),
+        "tan": real_or_complex(trig["tan"], lambda z: cmath.tan(z * unit)),
+        "asin": real_or_complex(trig["asin"], lambda z: cmath.asin(z) / unit, lambda v: -1 <= v <= 1),
+        "acos": real_or_complex(trig["acos"], lambda z: cmath.acos(z) / unit, lambda v: -1 <= v <= 1),
+        "atan": real_or_complex(trig["atan"], lambda z: cmath.atan(z) / unit),
+        "sinh": cmath.sinh, "cosh": cmath.cosh, "tanh": cmath.tanh,
+        "asinh": cmath.asinh, "acosh": cmath.acosh, "atanh": cmath.atanh,
+        "exp": cmath.exp,
+        "ln": real_or_complex(math.log, cmath.log, lambda v: v > 0),
+        "log": log,
+        "log2": lambda z: log(2, z),
+        "sqrt": real_or_complex(math.sqrt, cmath.sqrt, lambda v: v >= 0),
+    }
+
+
+def _module_functions(module, names=None):
+    """The public functions and constants of a module, without the module itself"""
+    names = names or [name for name in dir(module) if not name.startswith("_")]
+    return SimpleNamespace(**{name: getattr(module, name) for name in names})
+
+
+# What the Scientific tab types as math.sinh( and random.random(); modules
+# themselves are never reachable from an expression
+MODULES = {
+    "math": _module_functions(math),
+    "cmath": _module_functions(cmath),
+    "random": _module_functions(random, ["random"]),
+}
+
+
+@lru_cache(maxsize=None)
+def build_namespace(angle_mode, complex_mode=False):
+    """Evaluation globals for an angle mode (and CMPLX mode), built once and shared"""
+    if angle_mode not in ANGLE_MODES:
+        raise ValueError(f"Unknown angle mode: {angle_mode}")
+    trig = _angle_functions(angle_mode)
+
+    def pol(x, y):
+        return math.hypot(x, y), trig["from_rad"](math.atan2(y, x))
+
+    def rec(r, theta):
+        theta = trig["to_rad"](theta)
+        return r * math.cos(theta), r * math.sin(theta)
+
+    def polar(r, theta):
+        x, y = rec(r, theta)
+        return complex(x, y)
+
+    def arg(z):
+        return trig["from_rad"](cmath.phase(z))
+
+    def conj(z):
+        return complex(z).conjugate()
+
+    namespace = {
+        "__builtins__": {},
+        **MODULES,
+        "pi": math.pi, "e": math.e, "i": 1j,
+        "sin": trig["sin"], "cos": trig["cos"], "tan": trig["tan"],
+        "asin": trig["asin"], "acos": trig["acos"], "atan": trig["atan"],
+        "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+        "asinh": math.asinh, "acosh": math.acosh, "atanh": math.atanh,
+        "exp": math.exp, "ln": math.log, "log": log, "log2": math.log2, "log10": math.log10,
+        "sqrt": math.sqrt, "cbrt": cbrt, "abs": abs, "Abs": abs,
+        "factorial": factorial, "comb": comb, "nCr": comb, "perm": perm, "nPr": perm,
+        "gcd": math.gcd, "lcm": math.lcm, "floor": math.floor, "ceil": math.ceil,
+        "round": round, "Pol": pol, "Rec": rec, "rand": random.random,
+        "polar": polar, "arg": arg, "conj": conj, "const": const, "conv": conv,
+        "Re": lambda z: complex(z).real, "Im": lambda z: complex(z).imag,
+    }
+    if complex_mode:
+        namespace.update(_complex_functions(angle_mode, trig))
+    return namespace
+
+
+def unknown_names(text):
+    """Names in text that are neither calculator functions nor variables
+
+    Text that does not parse has none; evaluating it reports the syntax error.
+    """
+    try:
+        tree = parse_expression(split_format_suffix(text)[0])
+    except (SyntaxError, ValueError):
+        return []
+    namespace = build_namespace("DEG")
+    unknown = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in namespace and node.id not in VARIABLES:
+            unknown.append(node.id)
+        elif (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+              and node.value.id in MODULES and not hasattr(MODULES[node.value.id], node.attr)):
+            unknown.append(f"{node.value.id}.{node.attr}")
+    return unknown
+
+
+def normalize_complex(value):
+    """Collapse complex results whose imaginary part is rounding noise"""
+    if isinstance(value, complex):
+        if value.imag == 0 or abs(value.imag) <= 1e-14 * abs(value.real):
+            return value.real
+        if abs(value.real) <= 1e-14 * abs(value.imag):
+            return complex(0.0, value.imag)
+    return value
+
+
+def evaluate(text, angle_mode="DEG", variables=None, complex_mode=False):
+    """Evaluate display text with the given angle mode and variables (ans, A–F, x)
+
+    The same compiled code runs in COMP and CMPLX mode; only the namespace
+    it is evaluated against differs.
+    """
+    text, _ = split_format_suffix(text)
+    result = eval(compile_expression(text), build_namespace(angle_mode, complex_mode), variables or {})
+    if complex_mode:
+        result = normalize_complex(result)
+    return result
+
+
+def _format_real(value, decimal_places):
+    if abs(value) > 1e10 or (abs(value) < 1e-4 and value != 0):
+        return "{:.{}e}".format(value, decimal_places)
+    return "{:.{}f}".format(value, decimal_places).rstrip('0').rstrip('.')
+
+
+def format_result(result, decimal_places=10, complex_format="rect", angle_mode="DEG"):
+    """Format a result for the main display (a+bi or r∠θ for complex values)"""
+    if isinstance(result, (int, float)) and not isinstance(result, bool):
+        return _format_real(result, decimal_places)
+    if isinstance(result, complex):
+        if complex_format == "polar":
+            modulus = abs(result)
+            angle = build_namespace(angle_mode)["arg"](result)
+            return f"{_format_real(modulus, decimal_places)}∠{_format_real(angle, decimal_places)}"
+        real, imag = result.real, result.imag
+        imag_text = "" if abs(imag) == 1 else _format_real(abs(imag), decimal_places)
+        if real == 0:
+            return f"{'-' if imag < 0 else ''}{imag_text}i"
+        return f"{_format_real(real, decimal_places)}{'-' if imag < 0 else '+'}{imag_text}i"
+    return str(result)
@@ -0,0 +1,171 @@
+"""Editable input line: a gap buffer of key tokens with a cursor
+
+Each element is the text of one key press ("7", "sin(", "Ans"), so DEL
+removes what one key typed, as on the calculator.  Typing, deleting and
+moving the cursor by one token are O(1); the running character counts
+let the display window around the cursor be cut out without joining the
+whole line.
+"""
+
+
+class InputBuffer:
+    """Gap buffer of tokens with insert/overwrite editing"""
+
+    def __init__(self, text="", capacity=64):
+        self._items = [None] * capacity
+        self._gap_start = 0
+        self._gap_end = capacity
+        self._chars_before = 0
+        self._chars_total = 0
+        self._text = ""
+        self._scroll = {}
+        self.overwrite = False
+        if text:
+            self.insert_text(text)
+
+    def __len__(self):
+        return self._chars_total
+
+    @property
+    def cursor(self):
+        """Cursor position in characters"""
+        return self._chars_before
+
+    @property
+    def at_end(self):
+        return self._gap_end == len(self._items)
+
+    @property
+    def previous(self):
+        """The token just before the cursor, or None at the start"""
+        return self._items[self._gap_start - 1] if self._gap_start else None
+
+    @property
+    def text(self):
+        """The whole line; joined once per edit and then cached"""
+        if self._text is None:
+            self._text = "".join(self._items[:self._gap_start]) + "".join(self._items[self._gap_end:])
+        return self._text
+
+    def _grow(self):
+        # Only called when the gap is closed; doubling keeps inserts amortized O(1)
+        extra = max(len(self._items), 16)
+        self._items[self._gap_start:self._gap_start] = [None] * extra
+        self._gap_end += extra
+
+    def insert(self, token):
+        """Type one token at the cursor (replacing the next one in overwrite mode)"""
+        if not token:
+            return
+        if self.overwrite and not self.at_end:
+            self.delete()
+        if self._gap_start == self._gap_end:
+            self._grow()
+        self._items[self._gap_start] = token
+        self._gap_start += 1
+        self._chars_before += len(token)
+        self._chars_total += len(token)
+        self._text = None
+
+    def insert_text(self, text):
+        """Type pasted text, one token per character"""
+        for ch in text:
+            self.insert(ch)
+
+    def backspace(self):
+        """Delete the token before the cursor"""
+        if self._gap_start == 0:
+            return False
+        self._gap_start -= 1
+        token = self._items[self._gap_start]
+        self._items[self._gap_start] = None
+        self._chars_before -= len(token)
+        self._chars_total -= len(token)
+        self._text = None
+        return True
+
+    def delete(self):
+        """Delete the token after the cursor"""
+        if self.at_end:
+            return False
+        token = self._items[self._gap_end]
+        self._items[self._gap_end] = None
+        self._gap_end += 1
+        self._chars_total -= len(token)
+        self._text = None
+        return True
+
+    def left(self):
+        if self._gap_start == 0:
+            return False
+        self._gap_start -= 1
+        self._gap_end -= 1
+        token = self._items[self._gap_end] = self._items[self._gap_start]
+        self._items[self._gap_start] = None
+        self._chars_before -= len(token)
+        return True
+
+    def right(self):
+        if self.at_end:
+            return False
+        token = self._items[self._gap_start] = self._items[self._gap_end]
+        self._items[self._gap_end] = None
+        self._gap_start += 1
+        self._gap_end += 1
+        self._chars_before += len(token)
+        return True
+
+    def home(self):
+        while self.left():
+            pass
+
+    def end(self):
+        while self.right():
+            pass
+
+    def clear(self):
+        self._items = [None] * len(self._items)
+        self._gap_start = 0
+        self._gap_end = len(self._items)
+        self._chars_before = 0
+        self._chars_total = 0
+        self._text = ""
+        self._scroll.clear()
+
+    def set_text(self, text):
+        self.clear()
+        self.insert_text(text)
+
+    def view(self, width, cursor_mark=""):
+        """The width characters around the cursor, scrolling only when it leaves them
+
+        cursor_mark is drawn at the cursor unless it is at the end of the line.
+        """
+        scroll = self._scroll.get(width, 0)
+        cursor = self._chars_before
+        if cursor < scroll:
+            scroll = cursor
+        elif cursor > scroll + width:
+            scroll = cursor - width
+        scroll = max(0, min(scroll, self._chars_total - width))
+        self._scroll[width] = scroll
+
+        # Collect just enough tokens on each side of the gap
+        left_chars = cursor - scroll
+        left, count, k = [], 0, self._gap_start - 1
+        while count < left_chars and k >= 0:
+            left.append(self._items[k])
+            count += len(self._items[k])
+            k -= 1
+        left_text = "".join(reversed(left))[-left_chars:] if left_chars else ""
+
+        right_chars = width - len(left_text)
+        right, count, k = [], 0, self._gap_end
+        while count < right_chars and k < len(self._items):
+            right.append(self._items[k])
+            count += len(self._items[k])
+            k += 1
+        right_text = "".join(right)[:right_chars]
+
+        mark = cursor_mark if right_text else ""
+        return left_text + mark + right_text
@@ -0,0 +1,190 @@
+"""Main keypad layout, the (key, SHIFT, ALPHA) → action table and function keys
+
+Every key is resolved with a single dictionary lookup.  An Action names
+a CalculatorCore method and its arguments; the table is built once at
+import, and each calculator binds it to its own methods.
+"""
+from collections import namedtuple
+
+# Button definitions [text, button_type, shift_text, alpha_text]
+KEYBOARD_LAYOUT = [
+    [("SHIFT", "command", "", ""), ("ALPHA", "command", "", ""), ("MODE", "command", "SET UP", ""),
+     ("DEL", "function", "INS", ""), ("AC", "function", "OFF", "")],
+
+    [("x⁻¹", "function", "x!", "A"), ("√", "function", "∛", "B"),
+     ("x²", "function", "x³", "C"), ("^", "function", "log₂", "D"),
+     ("log", "function", "10^", "E")],
+
+    [("ln", "function", "e^", "F"), ("(−)", "function", "°'\"", "G"),
+     ("hyp", "function", "d/c", "H"), ("sin", "function", "sin⁻¹", "I"),
+     ("cos", "function", "cos⁻¹", "J")],
+
+    [("tan", "function", "tan⁻¹", "K"), ("RCL", "memory", "STO", "L"),
+     ("ENG", "function", "FIX", "M"), ("(", "function", "{", "N"),
+     (")", "function", "}", "O")],
+
+    [("7", "number", "π", "P"), ("8", "number", "e", "Q"),
+     ("9", "number", "j", "R"), ("DEL", "function", "INS", "S"),
+     ("AC", "function", "OFF", "T")],
+
+    [("4", "number", "∠", "U"), ("5", "number", "i", "V"),
+     ("6", "number", ":", "W"), ("×", "operator", "%", "X"),
+     ("÷", "operator", "mod", "Y")],
+
+    [("1", "number", "⏎", "Z"), ("2", "number", "□", "space"),
+     ("3", "number", "$", ","), ("−", "operator", "m", ":"),
+     ("+", "operator", "M", ";")],
+
+    [("0", "number", "∞", "."), (".", "number", "Ran#", "="),
+     ("×10^", "function", "Abs", "+"), ("Ans", "function", "DRG", "-"),
+     ("=", "equals", "⇒", "?")]
+]
+
+Action = namedtuple("Action", "method args modifier")
+
+
+def _call(method, *args):
+    return Action(method, args, False)
+
+
+def _insert(text):
+    return Action("insert", (text,), False)
+
+
+# Keys whose primary function is not simply typing their label
+PRIMARY = {
+    "MODE": _call("show_mode_menu"),
+    "DEL": _call("delete_char"),
+    "AC": _call("clear_all"),
+    "=": _call("calculate_result"),
+    "x⁻¹": _insert("⁻¹"),
+    "√": _insert("√("),
+    "x²": _insert("²"),
+    "^": _insert("^("),
+    "log": _insert("log("),
+    "ln": _insert("ln("),
+    "(−)": _call("negate"),
+    "hyp": _call("begin_prefix", "hyp"),
+    "sin": _insert("sin("),
+    "cos": _insert("cos("),
+    "tan": _insert("tan("),
+    "RCL": _call("begin_prefix", "RCL"),
+    "ENG": _call("show_status", "ENG display is not available"),
+}
+
+# SHIFT functions; labels without an entry (d/c, {, }, j, ∞, ...) do nothing
+SHIFTED = {
+    "MODE": _call("show_setup"),
+    "DEL": _call("toggle_insert_mode"),
+    "AC": _call("power_off"),
+    "x⁻¹": _insert("!"),
+    "√": _insert("∛("),
+    "x²": _insert("³"),
+    "^": _insert("log₂("),
+    "log": _insert("10^("),
+    "ln": _insert("e^("),
+    "sin": _insert("sin⁻¹("),
+    "cos": _insert("cos⁻¹("),
+    "tan": _insert("tan⁻¹("),
+    "RCL": _call("begin_prefix", "STO"),
+    "ENG": _call("begin_prefix", "FIX"),
+    "7": _insert("π"),
+    "8": _insert("e"),
+    "4": _insert("∠"),
+    "5": _insert("i"),
+    "×": _insert("%"),
+    "÷": _insert("mod"),
+    "−": _call("memory_add", -1),
+    "+": _call("memory_add", 1),
+    ".": _insert("Ran#"),
+    "×10^": _insert("Abs("),
+    "Ans": _call("cycle_angle_mode"),
+    "=": _call("solve_for_x"),
+}
+
+# Cursor keys of the REPLAY pad and the physical keyboard
+NAVIGATION = {
+    "◀": _call("cursor_left"),
+    "▶": _call("cursor_right"),
+    "Home": _call("cursor_home"),
+    "End": _call("cursor_end"),
+    "Delete": _call("delete_forward"),
+}
+
+# Keys of the scientific function tab → the text they type
+FUNCTION_TOKENS = {
+    "sinh": "math.sinh(",
+    "cosh": "math.cosh(",
+    "tanh": "math.tanh(",
+    "sinh⁻¹": "math.asinh(",
+    "cosh⁻¹": "math.acosh(",
+    "tanh⁻¹": "math.atanh(",
+    "x!": "math.factorial(",
+    "nPr": "math.perm(",
+    "nCr": "math.comb(",
+    "|x|": "abs(",
+    "gcd": "math.gcd(",
+    "lcm": "math.lcm(",
+    "mod": "mod",
+    "floor": "math.floor(",
+    "ceil": "math.ceil(",
+    "log₂": "math.log2(",
+    "logₓ": "math.log(",
+    "e^x": "math.exp(",
+    "10^x": "10**",
+    "x^3": "**3",
+    "∛": "**(1/3)",
+    "Pol(": "math.polar(",
+    "Rec(": "math.rect(",
+    "→r∠θ": "→r∠θ",
+    "→a+bi": "→a+bi",
+    "arg": "arg(",
+    "conj": "conj(",
+    "i": "i",
+    "∠": "∠",
+    "rand": "random.random()",
+    "d/dx": "derivative(",
+    "∫": "integrate(",
+    "Σ": "sum(",
+    "Π": "product(",
+    "x": "x",
+}
+
+# ALPHA letters that name a variable (also the STO/RCL targets)
+VARIABLE_LETTERS = {"A": "A", "B": "B", "C": "C", "D": "D", "E": "E", "F": "F", "M": "M", "X": "x", "Y": "y"}
+# Other ALPHA characters that mean something in an expression
+ALPHA_TEXT = {"=": "=", ",": ",", "space": " "}
+
+
+def variable_keys(layout=KEYBOARD_LAYOUT):
+    """Key label → variable name for the keys whose ALPHA letter is a variable"""
+    return {
+        text: VARIABLE_LETTERS[alpha_text]
+        for row in layout for text, _, _, alpha_text in row
+        if alpha_text in VARIABLE_LETTERS
+    }
+
+
+def build_keymap(layout=KEYBOARD_LAYOUT):
+    """Map every (key, shift, alpha) combination with a function to its Action"""
+    keymap = {}
+    for row in layout:
+        for text, _, _, alpha_text in row:
+            keymap.setdefault((text, False, False), PRIMARY.get(text, _insert(text)))
+            if text in SHIFTED:
+                keymap[(text, True, False)] = SHIFTED[text]
+            letter = VARIABLE_LETTERS.get(alpha_text) or ALPHA_TEXT.get(alpha_text)
+            if letter:
+                keymap[(text, False, True)] = _insert(letter)
+    for key, action in NAVIGATION.items():
+        keymap[(key, False, False)] = action
+    # SHIFT and ALPHA work in every state and do not consume themselves
+    for shift in (False, True):
+        for alpha in (False, True):
+            keymap[("SHIFT", shift, alpha)] = Action("toggle_shift", (), True)
+            keymap[("ALPHA", shift, alpha)] = Action("toggle_alpha", (), True)
+    return keymap
+
+
+KEYMAP = build_keymap()
+VARIABLE_KEYS = variable_keys()
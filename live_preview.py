@@ -0,0 +1,392 @@
+"""Quiet, incremental evaluation of the input line for a live result
+
+The input is lexed into the same tokens translate() produces, and the
+tokens are fed to an operator-precedence evaluator whose state after
+every token is kept as a checkpoint.  The state holds the values of the
+subexpressions already reduced, so after an edit only the tokens from
+the first changed character on are lexed and fed again; typing at the
+end costs only the new tokens.
+
+Nothing here raises or reports: an incomplete or invalid expression
+simply has no preview, and neither has one with an unclosed parenthesis,
+which = would reject.  Input the evaluator does not handle (comparisons,
+lists, keywords) is previewed with one quiet full evaluation instead.
+Exact integer powers longer than MAX_INTEGER_POWER_DIGITS digits are
+refused in both, so 9^9^9 cannot freeze the window while it is typed.
+"""
+import ast
+import copy
+import keyword
+import math
+import operator
+from functools import lru_cache
+
+from expression import (
+    SYMBOLS, VARIABLES, _SYMBOL_PATTERN, _TOKEN_PATTERN, build_namespace,
+    factorial, normalize_complex, parse_expression, split_format_suffix, tokenize
+)
+
+# Far more digits than a result can show; the exact power would take seconds
+MAX_INTEGER_POWER_DIGITS = 1000
+
+
+def _power(base, exponent):
+    """base ** exponent, refusing exact integer powers too long to work out while typing"""
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1 and exponent > 0:
+        if exponent * math.log10(abs(base)) > MAX_INTEGER_POWER_DIGITS:
+            raise OverflowError("Integer power too large to preview")
+    return base ** exponent
+
+
+# Binary operators: precedence, right associativity and function.  "=" is
+# the lowest and subtracts, as translate() turns L = R into (L) - (R).
+BINARY = {
+    "=": (0, False, operator.sub),
+    "+": (1, False, operator.add),
+    "-": (1, False, operator.sub),
+    "*": (2, False, operator.mul),
+    "/": (2, False, operator.truediv),
+    "//": (2, False, operator.floordiv),
+    "%": (2, False, operator.mod),
+    "@": (2, False, None),  # r∠θ, evaluated with the namespace's polar()
+    "**": (4, True, _power),
+}
+UNARY = {"-": operator.neg, "+": operator.pos}
+UNARY_PRECEDENCE = 3
+
+
+class _GuardPowers(ast.NodeTransformer):
+    """Rewrite a ** b as _power(a, b)"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            call = ast.Call(ast.Name("_power", ast.Load()), [node.left, node.right], [])
+            return ast.copy_location(call, node)
+        return node
+
+
+@lru_cache(maxsize=128)
+def _compile_guarded(text):
+    """compile_expression() for the fallback, with every power going through _power()"""
+    tree = _GuardPowers().visit(copy.deepcopy(parse_expression(text)))
+    return compile(ast.fix_missing_locations(tree), "<preview>", "eval")
+
+
+class Unsupported(Exception):
+    """Syntax the incremental evaluator leaves to evaluate()"""
+
+
+class Token:
+    """One translated token and the span of display text it came from
+
+    A token is a boundary when lexing can restart right after it: no
+    later character can merge into it or into a symbol spanning it.
+    """
+
+    __slots__ = ("kind", "value", "start", "end", "boundary")
+
+    def __init__(self, kind, value, start, end, boundary=False):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+        self.boundary = boundary
+
+
+def _operand_end(token):
+    kind, value = token.kind, token.value
+    return kind == "number" or value in (")", "!") or (kind == "name" and value in VARIABLES)
+
+
+def _operand_start(token):
+    return token.kind in ("number", "name") or token.value == "("
+
+
+def lex(text, start=0, previous=None):
+    """Translated tokens of text[start:], continuing after the token previous
+
+    Symbols win over the tokens around them exactly as in translate(), and
+    the implicit multiplications it inserts are emitted as "*" tokens that
+    share the span of the operand they precede.
+    """
+    tokens = []
+    pos, length = start, len(text)
+    symbol = _SYMBOL_PATTERN.search(text, pos)
+    while pos < length:
+        if symbol is not None and symbol.start() < pos:
+            symbol = _SYMBOL_PATTERN.search(text, pos)
+        if symbol is not None and symbol.start() == pos:
+            # No symbol is the start of a longer one, so a whole symbol never changes
+            end, pieces, boundary = symbol.end(), tokenize(SYMBOLS[symbol.group()]), True
+        else:
+            match = _TOKEN_PATTERN.match(text, pos, symbol.start() if symbol is not None else length)
+            if match is None:
+                # Only a line break fails to match; keep it as an unknown operator
+                end, pieces = pos + 1, [("op", text[pos])]
+            elif match.lastgroup == "space":
+                pos = match.end()
+                continue
+            else:
+                end, pieces = match.end(), [(match.lastgroup, match.group())]
+            value = pieces[0][1]
+            # A sign may still become part of an exponent such as 1e+5
+            boundary = value in ("(", ")", ",") or (
+                value in ("+", "-") and previous is not None and previous.kind != "name"
+            )
+        for kind, value in pieces:
+            token = Token(kind, value, pos, end, boundary)
+            if previous is not None and _operand_end(previous) and _operand_start(token):
+                tokens.append(Token("op", "*", pos, end))
+            tokens.append(token)
+            previous = token
+        pos = end
+    return tokens
+
+
+def _push(stack, item):
+    return (item, stack)
+
+
+class _State:
+    """Evaluator state after a token; stacks are shared cons lists, so a checkpoint costs O(1)"""
+
+    __slots__ = ("values", "ops", "expect_operand", "equals")
+
+    def __init__(self, values=None, ops=None, expect_operand=True, equals=False):
+        self.values = values
+        self.ops = ops
+        self.expect_operand = expect_operand
+        self.equals = equals
+
+
+EMPTY = _State()
+
+
+class _Paren:
+    """An open parenthesis: a call of func (or a plain group) with the arguments so far"""
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+
+class LivePreview:
+    """Result preview of the input line, updated incrementally per edit"""
+
+    def __init__(self, angle_mode="DEG", complex_mode=False):
+        self.text = ""
+        self.tokens = []
+        self.states = [EMPTY]
+        self.variables = {}
+        self.fed = 0
+        self.set_mode(angle_mode, complex_mode)
+
+    def set_mode(self, angle_mode, complex_mode=False):
+        """Switch the evaluation namespace; every checkpoint is recomputed"""
+        self.angle_mode = angle_mode
+        self.complex_mode = complex_mode
+        self.namespace = build_namespace(angle_mode, complex_mode)
+        self.guarded_namespace = dict(self.namespace, _power=_power)
+        self.reset()
+
+    def reset(self):
+        """Forget the checkpoints, e.g. after Ans or a variable changed"""
+        self.text = ""
+        self.tokens = []
+        self.states = [EMPTY]
+        self.fed = 0
+
+    def set_variables(self, variables):
+        if variables != self.variables:
+            self.variables = dict(variables)
+            self.reset()
+
+    def value(self, text):
+        """The value text would evaluate to, or None while it is incomplete or invalid"""
+        expression, _ = split_format_suffix(text)
+        self._update(expression)
+        state = self.states[-1]
+        try:
+            if state is None:
+                raise Unsupported
+            result = self._finish(state)
+        except Unsupported:
+            try:
+                result = eval(_compile_guarded(expression), self.guarded_namespace, self.variables)
+            except Exception:
+                return None
+        except Exception:
+            return None
+        if self.complex_mode:
+            result = normalize_complex(result)
+        return result
+
+    def _update(self, text):
+        """Re-lex and re-feed only from the first character that changed"""
+        old = self.text
+        if text.startswith(old):
+            common = len(old)
+        else:
+            limit = min(len(old), len(text))
+            common = 0
+            while common < limit and old[common] == text[common]:
+                common += 1
+        self.text = text
+
+        tokens = self.tokens
+        keep = len(tokens)
+        if '"' in text or "'" in text:
+            # A quote can swallow everything after it into a string
+            keep = 0
+        while keep and not (
+            tokens[keep - 1].boundary and tokens[keep - 1].end <= common
+            and (keep == len(tokens) or tokens[keep].start >= tokens[keep - 1].end)
+        ):
+            keep -= 1
+        restart = tokens[keep - 1].end if keep else 0
+
+        del tokens[keep:]
+        del self.states[keep + 1:]
+        new = lex(text, restart, tokens[-1] if tokens else None)
+        tokens.extend(new)
+        self.fed = len(new)
+
+        state = self.states[-1]
+        for token in new:
+            if state is not None:
+                try:
+                    state = self._feed(state, token)
+                except Unsupported:
+                    state = None
+                except Exception:
+                    # An error in a closed subexpression: nothing after it can recover
+                    state = _State(expect_operand=None)
+            self.states.append(state)
+
+    # Evaluation
+
+    def _lookup(self, name):
+        if name.startswith("__") or keyword.iskeyword(name.split(".")[0]):
+            raise Unsupported
+        head, *attributes = name.split(".")
+        if head in self.variables:
+            value = self.variables[head]
+        else:
+            value = self.namespace[head]
+        for attribute in attributes:
+            if attribute.startswith("_"):
+                raise Unsupported
+            value = getattr(value, attribute)
+        return value
+
+    def _apply(self, values, op):
+        """Reduce the operator entry op on top of the value stack"""
+        kind, symbol = op
+        if kind == "unary":
+            operand, values = values
+            return _push(values, UNARY[symbol](operand))
+        right, values = values
+        left, values = values
+        if symbol == "@":
+            return _push(values, self.namespace["polar"](left, right))
+        return _push(values, BINARY[symbol][2](left, right))
+
+    def _reduce(self, values, ops, precedence, right_assoc=False):
+        """Reduce the pending operators that bind tighter than an incoming one"""
+        while ops is not None:
+            top = ops[0]
+            if isinstance(top, _Paren):
+                break
+            top_precedence = UNARY_PRECEDENCE if top[0] == "unary" else BINARY[top[1]][0]
+            if top_precedence < precedence or (top_precedence == precedence and right_assoc):
+                break
+            values = self._apply(values, top)
+            ops = ops[1]
+        return values, ops
+
+    def _feed(self, state, token):
+        if state.expect_operand is None:
+            raise ValueError("Math ERROR")
+        kind, value = token.kind, token.value
+        values, ops = state.values, state.ops
+
+        if state.expect_operand:
+            if kind == "number":
+                if value.isdigit() and len(value) > 1 and value[0] == "0" and value.strip("0"):
+                    raise ValueError("Leading zeros are not allowed")
+                number = int(value) if value.isdigit() else float(value)
+                return _State(_push(values, number), ops, False, state.equals)
+            if kind == "string":
+                return _State(_push(values, ast.literal_eval(value)), ops, False, state.equals)
+            if kind == "name":
+                # A function name waits for its "("; everything else is a value now
+                return _State(_push(values, self._lookup(value)), ops, False, state.equals)
+            if value == "(":
+                return _State(values, _push(ops, _Paren(None, 0)), True, state.equals)
+            if value in UNARY:
+                return _State(values, _push(ops, ("unary", value)), True, state.equals)
+            if value == ")" and ops is not None and isinstance(ops[0], _Paren) and ops[0].func is not None \
+                    and ops[0].args == 0:
+                # A call without arguments, such as rand()
+                return _State(_push(values, ops[0].func()), ops[1], False, state.equals)
+            raise Unsupported
+
+        if value == "(":
+            # The value just pushed is the function being called
+            func, values = values
+            return _State(values, _push(ops, _Paren(func, 0)), True, state.equals)
+        if value == "!":
+            operand, values = values
+            return _State(_push(values, factorial(operand)), ops, False, state.equals)
+        if value in BINARY:
+            precedence, right_assoc, _ = BINARY[value]
+            if value == "=":
+                if state.equals or self._depth(ops):
+                    raise Unsupported
+            values, ops = self._reduce(values, ops, precedence, right_assoc)
+            return _State(values, _push(ops, ("binary", value)), True, state.equals or value == "=")
+        if value in (",", ")"):
+            values, ops = self._reduce(values, ops, -1)
+            if ops is None:
+                raise Unsupported
+            paren, ops = ops
+            if value == ",":
+                return _State(values, _push(ops, _Paren(paren.func, paren.args + 1)), True, state.equals)
+            return _State(self._close(values, paren), ops, False, state.equals)
+        raise Unsupported
+
+    @staticmethod
+    def _depth(ops):
+        depth = 0
+        while ops is not None:
+            depth += isinstance(ops[0], _Paren)
+            ops = ops[1]
+        return depth
+
+    @staticmethod
+    def _close(values, paren):
+        """Pop the arguments of a closed parenthesis and push its value"""
+        args = []
+        for _ in range(paren.args + 1):
+            arg, values = values
+            args.append(arg)
+        args.reverse()
+        if paren.func is not None:
+            return _push(values, paren.func(*args))
+        return _push(values, args[0] if len(args) == 1 else tuple(args))
+
+    def _finish(self, state):
+        """Reduce everything; an unclosed parenthesis is an error, as it is for ="""
+        if state.expect_operand is None:
+            raise ValueError("Math ERROR")
+        if state.expect_operand:
+            raise SyntaxError("Incomplete expression")
+        values, ops = state.values, state.ops
+        while True:
+            values, ops = self._reduce(values, ops, -1)
+            if ops is None:
+                return values[0]
+            raise SyntaxError("'(' was never closed")
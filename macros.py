@@ -0,0 +1,85 @@
+"""Keystroke macros: record key presses, save them and replay them
+
+A macro is a list of (kind, key) events, where kind is "key" for a
+button_click, "type" for a key of the physical keyboard (type_key) and
+"function" for a scientific_function press.  Recording
+appends to CalculatorCore.macro as the handlers run; replaying calls the
+same handlers again, so a macro reproduces exactly what the user did.
+
+Macros are JSON files: {"version": 1, "events": [[kind, key], ...]}.
+
+    python macros.py MACRO.json [--repeat N]
+
+replays a macro headlessly and prints the final display and throughput.
+"""
+import argparse
+import json
+import time
+
+from calculator_core import CalculatorCore
+
+MACRO_VERSION = 1
+# Event kind → the CalculatorCore handler it replays
+HANDLERS = {"key": "button_click", "type": "type_key", "function": "scientific_function"}
+
+
+def save_macro(path, events):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": MACRO_VERSION, "events": [list(event) for event in events]}, f)
+
+
+def load_macro(path):
+    """Events of a macro file; a malformed file raises ValueError"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get("version") != MACRO_VERSION:
+        raise ValueError("Not a calculator macro file")
+    events = []
+    for event in data.get("events", []):
+        if not (isinstance(event, list) and len(event) == 2 and event[0] in HANDLERS
+                and isinstance(event[1], str)):
+            raise ValueError(f"Bad macro event: {event!r}")
+        events.append((event[0], event[1]))
+    return events
+
+
+def bind(core):
+    """Event kind → bound handler of core, resolved once per replay"""
+    return {kind: getattr(core, handler) for kind, handler in HANDLERS.items()}
+
+
+def replay(core, events, repeat=1):
+    """Run the events through core as fast as possible; returns the seconds taken"""
+    handlers = bind(core)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for kind, key in events:
+            handlers[kind](key)
+    return time.perf_counter() - start
+
+
+def replay_headless(events, settings=None, repeat=1):
+    """Replay on a fresh calculator without a window; returns (core, seconds)"""
+    core = CalculatorCore(dict(settings) if settings else None)
+    core.latency.enabled = False
+    return core, replay(core, events, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a keystroke macro without a window")
+    parser.add_argument("macro")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    events = load_macro(args.macro)
+    core, elapsed = replay_headless(events, repeat=args.repeat)
+    presses = len(events) * args.repeat
+    print(f"{core.display_line1}\n{core.display_line2}")
+    if core.last_error:
+        print(f"last error: {core.last_error}")
+    if presses and elapsed:
+        print(f"{presses} key presses in {elapsed:.3f} s: {presses / elapsed:,.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main()
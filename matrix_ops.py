@@ -0,0 +1,122 @@
+"""Matrix registers (MatA, MatB, MatC) with cached factorizations"""
+import warnings
+
+import numpy as np
+from scipy import linalg
+
+
+class MatrixRegister:
+    """A matrix register that caches its LU and QR factorizations
+
+    The factorizations are computed lazily on first use and reused by every
+    operation on the same matrix (det, inverse, solve, rank) until a cell
+    actually changes value.
+    """
+
+    def __init__(self, rows=2, cols=2):
+        self._values = np.zeros((rows, cols))
+        self._lu = None
+        self._qr = None
+        self.version = 0
+
+    @property
+    def values(self):
+        """Read-only view of the matrix contents"""
+        view = self._values.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def shape(self):
+        return self._values.shape
+
+    def invalidate(self):
+        """Drop cached factorizations after the matrix has changed"""
+        self._lu = None
+        self._qr = None
+        self.version += 1
+
+    def resize(self, rows, cols):
+        """Resize the matrix, keeping the overlapping top-left block"""
+        if self._values.shape == (rows, cols):
+            return False
+        new_values = np.zeros((rows, cols))
+        min_rows = min(rows, self._values.shape[0])
+        min_cols = min(cols, self._values.shape[1])
+        new_values[:min_rows, :min_cols] = self._values[:min_rows, :min_cols]
+        self._values = new_values
+        self.invalidate()
+        return True
+
+    def set_cell(self, i, j, value):
+        """Set a single cell, returning True if its value changed"""
+        if self._values[i, j] == value:
+            return False
+        self._values[i, j] = value
+        self.invalidate()
+        return True
+
+    def assign(self, values):
+        """Replace the whole matrix, returning True if anything changed"""
+        values = np.array(values, dtype=float)
+        if values.shape == self._values.shape and np.array_equal(values, self._values):
+            return False
+        self._values = values
+        self.invalidate()
+        return True
+
+    def _require_square(self):
+        rows, cols = self._values.shape
+        if rows != cols:
+            raise np.linalg.LinAlgError("Matrix must be square")
+
+    def lu(self):
+        """Return the cached (lu, piv) factorization of a square matrix"""
+        self._require_square()
+        if self._lu is None:
+            with warnings.catch_warnings():
+                # Singular matrices are detected from the pivots below
+                warnings.simplefilter("ignore", linalg.LinAlgWarning)
+                self._lu = linalg.lu_factor(self._values, check_finite=False)
+        return self._lu
+
+    def qr(self):
+        """Return the cached column-pivoted (R, P) QR factorization"""
+        if self._qr is None:
+            self._qr = linalg.qr(self._values, mode="r", pivoting=True, check_finite=False)
+        return self._qr
+
+    def is_singular(self):
+        lu, _ = self.lu()
+        return not np.all(np.diag(lu))
+
+    def determinant(self):
+        """Determinant from the product of the LU pivots"""
+        lu, piv = self.lu()
+        swaps = np.count_nonzero(piv != np.arange(piv.size))
+        sign = -1.0 if swaps % 2 else 1.0
+        return sign * float(np.prod(np.diag(lu)))
+
+    def solve(self, rhs):
+        """Solve A·x = rhs; each call is O(n²) once A has been factorized"""
+        if self.is_singular():
+            raise np.linalg.LinAlgError("Singular matrix")
+        rhs = np.asarray(rhs, dtype=float)
+        if rhs.ndim == 0 or rhs.shape[0] != self._values.shape[0]:
+            raise np.linalg.LinAlgError("Right-hand side has wrong dimensions")
+        return linalg.lu_solve(self.lu(), rhs, check_finite=False)
+
+    def inverse(self):
+        """Inverse computed by solving against the identity"""
+        return self.solve(np.eye(self._values.shape[0]))
+
+    def rank(self):
+        """Numerical rank from the diagonal of the pivoted QR factor"""
+        if self._values.size == 0:
+            return 0
+        r, _ = self.qr()
+        diag = np.abs(np.diag(r))
+        if diag.size == 0 or diag[0] == 0:
+            return 0
+        tol = diag[0] * max(self._values.shape) * np.finfo(float).eps
+        return int(np.count_nonzero(diag > tol))
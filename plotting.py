@@ -0,0 +1,304 @@
+"""Graph panel: vectorized, adaptive sampling of f(x) drawn with blitting
+
+matplotlib is imported only when a GraphPanel is built, and the
+calculator builds it the first time the Graph tab is opened, so plotting
+adds nothing to startup.
+"""
+import math
+import time
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from expression import build_namespace, compile_expression, unknown_names
+
+# Uniform samples across the visible x range before refinement
+RESOLUTION = 400
+REFINE_PASSES = 6
+MAX_POINTS = 20000
+# A sample is refined when it bends away from its neighbours by more than
+# this fraction of the visible y range
+CURVATURE_TOLERANCE = 2e-3
+
+
+@lru_cache(maxsize=None)
+def vector_namespace(angle_mode):
+    """The calculator namespace with NumPy ufuncs in place of scalar math"""
+    unit = {"DEG": math.pi / 180, "GRAD": math.pi / 200}.get(angle_mode, 1.0)
+
+    def log(a, b=None):
+        if b is None:
+            return np.log10(a)
+        return np.log(b) / np.log(a)
+
+    namespace = dict(build_namespace(angle_mode))
+    namespace.update({
+        "sin": lambda x: np.sin(x * unit),
+        "cos": lambda x: np.cos(x * unit),
+        "tan": lambda x: np.tan(x * unit),
+        "asin": lambda x: np.arcsin(x) / unit,
+        "acos": lambda x: np.arccos(x) / unit,
+        "atan": lambda x: np.arctan(x) / unit,
+        "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+        "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh,
+        "exp": np.exp, "ln": np.log, "log": log, "log2": np.log2, "log10": np.log10,
+        "sqrt": np.sqrt, "cbrt": np.cbrt, "abs": np.abs, "Abs": np.abs,
+        "floor": np.floor, "ceil": np.ceil,
+    })
+    return namespace
+
+
+class FunctionSampler:
+    """Samples of y = f(x), kept across pans and zooms of the view
+
+    Only x ranges that were not sampled before are evaluated when the view
+    moves, and extra samples are placed where the curve bends.
+    """
+
+    def __init__(self, text, angle_mode="DEG", variables=None):
+        """Raises SyntaxError or ValueError for text that cannot be plotted"""
+        self.code = compile_expression(text)
+        unknown = unknown_names(text)
+        if unknown:
+            raise ValueError(f"Unknown name {unknown[0]}")
+        self.angle_mode = angle_mode
+        self.variables = dict(variables or {})
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+        self.spacing = math.inf
+        self.evaluations = 0
+
+    def evaluate(self, xs):
+        """f at every x in one vectorized call; NaN where f is undefined"""
+        self.evaluations += len(xs)
+        local = dict(self.variables, x=xs)
+        with np.errstate(all="ignore"):
+            try:
+                ys = eval(self.code, vector_namespace(self.angle_mode), local)
+                return self._real(np.broadcast_to(np.asarray(ys), xs.shape))
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                pass
+        # Functions without a vectorized form (x!, nCr, ...) go point by point
+        ys = np.empty(len(xs))
+        namespace = build_namespace(self.angle_mode)
+        for k, x in enumerate(xs.tolist()):
+            local["x"] = x
+            try:
+                ys[k] = eval(self.code, namespace, local)
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+                ys[k] = np.nan
+        return ys
+
+    @staticmethod
+    def _real(ys):
+        if np.iscomplexobj(ys):
+            ys = np.where(ys.imag == 0, ys.real, np.nan)
+        return ys.astype(float)
+
+    def _sample(self, x_min, x_max, y_span, spacing):
+        count = max(2, int(round((x_max - x_min) / spacing)) + 1)
+        xs = np.linspace(x_min, x_max, count)
+        return self.refine(xs, self.evaluate(xs), y_span)
+
+    def refine(self, xs, ys, y_span):
+        """Add midpoints where the curve bends or leaves its domain"""
+        for _ in range(REFINE_PASSES):
+            if len(xs) < 3 or len(xs) >= MAX_POINTS:
+                break
+            bent = np.zeros(len(xs) - 1, dtype=bool)
+            with np.errstate(over="ignore", invalid="ignore"):
+                # Samples of a steep curve overflow, and inf - inf is NaN
+                bend = np.abs(ys[1:-1] - 0.5 * (ys[:-2] + ys[2:]))
+                steep = bend > CURVATURE_TOLERANCE * y_span
+            bent[:-1] |= steep
+            bent[1:] |= steep
+            # Segments with one undefined end straddle a domain boundary
+            finite = np.isfinite(ys)
+            bent |= finite[:-1] != finite[1:]
+            if not bent.any():
+                break
+            midpoints = 0.5 * (xs[:-1][bent] + xs[1:][bent])
+            midpoints = midpoints[:MAX_POINTS - len(xs)]
+            positions = np.searchsorted(xs, midpoints)
+            xs = np.insert(xs, positions, midpoints)
+            ys = np.insert(ys, positions, self.evaluate(midpoints))
+        return xs, ys
+
+    def view(self, x_min, x_max, y_span=None, resolution=RESOLUTION):
+        """Samples covering [x_min, x_max], evaluating only what is new"""
+        spacing = (x_max - x_min) / resolution
+        if y_span is None:
+            y_span = x_max - x_min
+        covered = len(self.xs) > 0 and self.xs[0] < x_max and self.xs[-1] > x_min
+        if not covered or spacing < 0.5 * self.spacing:
+            # First plot, a jump elsewhere, or zoomed in past the sample density
+            self.spacing = spacing
+            self.xs, self.ys = self._sample(x_min, x_max, y_span, spacing)
+        else:
+            # Newly exposed ranges are sampled at the density of the current view
+            spacing = max(spacing, self.spacing)
+            self.spacing = spacing
+            pieces_x, pieces_y = [self.xs], [self.ys]
+            if x_min < self.xs[0]:
+                xs, ys = self._sample(x_min, self.xs[0], y_span, spacing)
+                pieces_x.insert(0, xs[:-1])
+                pieces_y.insert(0, ys[:-1])
+            if x_max > self.xs[-1]:
+                xs, ys = self._sample(self.xs[-1], x_max, y_span, spacing)
+                pieces_x.append(xs[1:])
+                pieces_y.append(ys[1:])
+            self.xs, self.ys = np.concatenate(pieces_x), np.concatenate(pieces_y)
+            # Forget samples more than a view width away
+            width = x_max - x_min
+            keep = (self.xs >= x_min - width) & (self.xs <= x_max + width)
+            self.xs, self.ys = self.xs[keep], self.ys[keep]
+
+        lo, hi = np.searchsorted(self.xs, [x_min, x_max])
+        lo, hi = max(lo - 1, 0), min(hi + 1, len(self.xs))
+        return self.xs[lo:hi], self.ys[lo:hi]
+
+
+def break_jumps(xs, ys, y_span):
+    """Insert NaN between samples that jump across the view (asymptotes)"""
+    with np.errstate(invalid="ignore"):
+        jumps = np.flatnonzero(np.abs(np.diff(ys)) > y_span)
+    if len(jumps) == 0:
+        return xs, ys
+    return np.insert(xs, jumps + 1, np.nan), np.insert(ys, jumps + 1, np.nan)
+
+
+def auto_y_limits(ys):
+    """y limits around the bulk of the finite samples"""
+    finite = ys[np.isfinite(ys)]
+    if len(finite) == 0:
+        return -10.0, 10.0
+    low, high = np.percentile(finite, [2, 98])
+    if high - low < 1e-12:
+        low, high = low - 1, high + 1
+    margin = 0.1 * (high - low)
+    return float(low - margin), float(high + margin)
+
+
+class GraphPanel:
+    """Tk widget with an f(x) entry and an interactive plot"""
+
+    def __init__(self, parent, angle_mode, variables, on_status=None, bg="#f0f0f0"):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        import tkinter as tk
+
+        self.angle_mode = angle_mode
+        self.variables = variables
+        self.on_status = on_status or (lambda text: None)
+        self.sampler = None
+        self.background = None
+        self.drag = None
+        self.frame_times = deque(maxlen=30)
+
+        self.frame = tk.Frame(parent, bg=bg)
+        entry_frame = tk.Frame(self.frame, bg=bg)
+        entry_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(entry_frame, text="f(x) =", bg=bg).pack(side=tk.LEFT)
+        self.function_var = tk.StringVar(value="sin(x)")
+        entry = tk.Entry(entry_frame, textvariable=self.function_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        entry.bind("<Return>", self._on_return)
+        tk.Button(entry_frame, text="Plot", command=self.plot).pack(side=tk.LEFT)
+
+        self.figure = Figure(figsize=(4, 3), dpi=80)
+        self.axes = self.figure.add_subplot(111)
+        self.axes.grid(True, alpha=0.3)
+        self.axes.set_xlim(-10, 10)
+        self.axes.set_ylim(-10, 10)
+        # The curve is drawn separately from the static axes so it can be blitted
+        (self.line,) = self.axes.plot([], [], linewidth=1.5, animated=True)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.mpl_connect("button_press_event", self._on_press)
+        self.canvas.mpl_connect("motion_notify_event", self._on_motion)
+        self.canvas.mpl_connect("button_release_event", self._on_release)
+        self.canvas.mpl_connect("scroll_event", self._on_scroll)
+
+    def plot(self, text=None):
+        """Plot f(x) from the entry (or the given text) over the current x range"""
+        if text is not None:
+            self.function_var.set(text)
+        x_min, x_max = self.axes.get_xlim()
+        try:
+            sampler = FunctionSampler(self.function_var.get(), self.angle_mode(), self.variables())
+            xs, ys = sampler.view(x_min, x_max)
+        except (SyntaxError, ValueError, NameError) as e:
+            from tkinter import messagebox
+            messagebox.showerror("Graph Error", f"Invalid function: {e}")
+            return
+        self.sampler = sampler
+        self.axes.set_ylim(*auto_y_limits(ys))
+        self._update_line()
+        self.canvas.draw_idle()
+
+    def _on_return(self, event):
+        # Stop here: the window's own <Return> would evaluate the calculator input too
+        self.plot()
+        return "break"
+
+    def _update_line(self):
+        x_min, x_max = self.axes.get_xlim()
+        y_min, y_max = self.axes.get_ylim()
+        y_span = y_max - y_min
+        xs, ys = self.sampler.view(x_min, x_max, y_span)
+        self.line.set_data(*break_jumps(xs, ys, y_span))
+
+    def _on_draw(self, event):
+        # Cache everything but the curve, then draw the curve over it
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.axes.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
+
+    def _blit(self):
+        start = time.perf_counter()
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self._update_line()
+        self.canvas.restore_region(self.background)
+        self.axes.draw_artist(self.line)
+        self.canvas.blit(self.axes.bbox)
+        self.frame_times.append(time.perf_counter() - start)
+        average = sum(self.frame_times) / len(self.frame_times)
+        self.on_status(f"Graph: {1 / average:.0f} FPS, {self.sampler.evaluations} samples")
+
+    def _on_press(self, event):
+        if event.inaxes is self.axes and event.button == 1 and self.sampler is not None:
+            self.drag = (event.x, event.y, self.axes.get_xlim(), self.axes.get_ylim())
+
+    def _on_motion(self, event):
+        if self.drag is None:
+            return
+        x0, y0, (x_min, x_max), (y_min, y_max) = self.drag
+        bbox = self.axes.bbox
+        dx = (event.x - x0) * (x_max - x_min) / bbox.width
+        dy = (event.y - y0) * (y_max - y_min) / bbox.height
+        self.axes.set_xlim(x_min - dx, x_max - dx)
+        self.axes.set_ylim(y_min - dy, y_max - dy)
+        # Only the curve is redrawn while dragging; ticks follow on release
+        self._blit()
+
+    def _on_release(self, event):
+        if self.drag is not None:
+            self.drag = None
+            self.canvas.draw_idle()
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.axes or self.sampler is None:
+            return
+        factor = 0.8 if event.button == "up" else 1.25
+        x_min, x_max = self.axes.get_xlim()
+        y_min, y_max = self.axes.get_ylim()
+        x, y = event.xdata, event.ydata
+        self.axes.set_xlim(x + (x_min - x) * factor, x + (x_max - x) * factor)
+        self.axes.set_ylim(y + (y_min - y) * factor, y + (y_max - y) * factor)
+        self._update_line()
+        self.canvas.draw_idle()
@@ -0,0 +1,102 @@
+"""Per-handler latency recording for the calculator UI
+
+Handlers are wrapped with @timed; each call's wall time is kept in a
+bounded window per handler, from which p50/p95/p99 are computed on
+demand.  The whole record can be dumped to a JSON file.
+"""
+import functools
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# A key press should be handled within this many seconds
+KEYSTROKE_BUDGET = 0.010
+WINDOW = 1000
+
+
+class LatencyRecorder:
+    """Rolling window of handler durations, keyed by handler name"""
+
+    def __init__(self, window=WINDOW, budget=KEYSTROKE_BUDGET):
+        self.window = window
+        self.budget = budget
+        self.samples = {}
+        self.counts = {}
+        self.enabled = True
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+        samples.append(seconds)
+        self.counts[name] += 1
+
+    def percentiles(self, name, quantiles=(50, 95, 99)):
+        """Latency percentiles in seconds for one handler, or None if it never ran"""
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        return tuple(float(p) for p in np.percentile(np.fromiter(samples, float), quantiles))
+
+    def summary(self):
+        """Statistics per handler, slowest p99 first"""
+        rows = []
+        for name, samples in self.samples.items():
+            p50, p95, p99 = self.percentiles(name)
+            over = sum(1 for s in samples if s > self.budget)
+            rows.append({
+                "handler": name,
+                "calls": self.counts[name],
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "p99_ms": p99 * 1000,
+                "max_ms": max(samples) * 1000,
+                "over_budget": over,
+            })
+        rows.sort(key=lambda row: row["p99_ms"], reverse=True)
+        return rows
+
+    def status_text(self, name="button_click"):
+        """One-line p50/p95/p99 for the status bar"""
+        stats = self.percentiles(name)
+        if stats is None:
+            return f"{name}: no samples"
+        p50, p95, p99 = (s * 1000 for s in stats)
+        flag = "OK" if p99 <= self.budget * 1000 else "SLOW"
+        return f"{name} p50 {p50:.2f} / p95 {p95:.2f} / p99 {p99:.2f} ms {flag}"
+
+    def dump(self, path):
+        """Write the summary and the raw windows (in milliseconds) to a JSON file"""
+        profile = {
+            "budget_ms": self.budget * 1000,
+            "window": self.window,
+            "summary": self.summary(),
+            "samples_ms": {name: [s * 1000 for s in samples] for name, samples in self.samples.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    def reset(self):
+        self.samples.clear()
+        self.counts.clear()
+
+
+def timed(method):
+    """Record the wall time of a handler method in self.latency"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        recorder = getattr(self, "latency", None)
+        if recorder is None or not recorder.enabled:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            recorder.record(name, time.perf_counter() - start)
+
+    return wrapper
@@ -0,0 +1,255 @@
+"""SOLVE: roots of an arbitrary equation in x
+
+The equation is compiled once through the expression module and the
+compiled code is evaluated on every iteration.  When the expression only
+uses functions with known derivatives, a symbolic derivative is compiled
+as well and Newton steps are taken inside the bracket.
+"""
+import ast
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from expression import build_namespace, compile_expression, parse_expression
+
+SolveResult = namedtuple("SolveResult", "root residual iterations converged method")
+
+MAX_ITERATIONS = 100
+MAX_BRACKET_PROBES = 60
+
+
+class NotDifferentiable(Exception):
+    """The expression uses a construct without a known derivative"""
+
+
+def _num(value):
+    return ast.Constant(value=value)
+
+
+def _call(name, *args):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args), keywords=[])
+
+
+def _binop(left, op, right):
+    return ast.BinOp(left=left, op=op, right=right)
+
+
+def _mul(a, b):
+    return _binop(a, ast.Mult(), b)
+
+
+def _div(a, b):
+    return _binop(a, ast.Div(), b)
+
+
+def _depends_on(node, var):
+    return any(isinstance(n, ast.Name) and n.id == var for n in ast.walk(node))
+
+
+def differentiate(node, var="x", angle_mode="RAD"):
+    """Return the AST of d(node)/d(var)"""
+    if isinstance(node, ast.Expression):
+        return ast.Expression(body=differentiate(node.body, var, angle_mode))
+    if not _depends_on(node, var):
+        return _num(0)
+    if isinstance(node, ast.Name):
+        return _num(1)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        return ast.UnaryOp(op=node.op, operand=differentiate(node.operand, var, angle_mode))
+
+    if isinstance(node, ast.BinOp):
+        a, b = node.left, node.right
+        da = differentiate(a, var, angle_mode)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            return _binop(da, node.op, differentiate(b, var, angle_mode))
+        db = differentiate(b, var, angle_mode)
+        if isinstance(node.op, ast.Mult):
+            return _binop(_mul(da, b), ast.Add(), _mul(a, db))
+        if isinstance(node.op, ast.Div):
+            numerator = _binop(_mul(da, b), ast.Sub(), _mul(a, db))
+            return _div(numerator, _binop(b, ast.Pow(), _num(2)))
+        if isinstance(node.op, ast.Pow):
+            if not _depends_on(b, var):
+                # n·a^(n-1)·a'
+                lowered = _binop(a, ast.Pow(), _binop(b, ast.Sub(), _num(1)))
+                return _mul(_mul(b, lowered), da)
+            # a^b·(b'·ln(a) + b·a'/a)
+            inner = _binop(_mul(db, _call("ln", a)), ast.Add(), _div(_mul(b, da), a))
+            return _mul(node, inner)
+        raise NotDifferentiable(type(node.op).__name__)
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1 and not node.keywords:
+        u = node.args[0]
+        du = differentiate(u, var, angle_mode)
+        # Trig arguments and inverse-trig results are in the current angle unit
+        k = _num({"DEG": math.pi / 180, "GRAD": math.pi / 200}.get(angle_mode, 1.0))
+        one = _num(1)
+        derivatives = {
+            "sin": lambda: _mul(_call("cos", u), k),
+            "cos": lambda: ast.UnaryOp(op=ast.USub(), operand=_mul(_call("sin", u), k)),
+            "tan": lambda: _div(k, _binop(_call("cos", u), ast.Pow(), _num(2))),
+            "asin": lambda: _div(one, _mul(k, _call("sqrt", _binop(one, ast.Sub(), _binop(u, ast.Pow(), _num(2)))))),
+            "acos": lambda: _div(_num(-1), _mul(k, _call("sqrt", _binop(one, ast.Sub(), _binop(u, ast.Pow(), _num(2)))))),
+            "atan": lambda: _div(one, _mul(k, _binop(one, ast.Add(), _binop(u, ast.Pow(), _num(2))))),
+            "sinh": lambda: _call("cosh", u),
+            "cosh": lambda: _call("sinh", u),
+            "tanh": lambda: _div(one, _binop(_call("cosh", u), ast.Pow(), _num(2))),
+            "exp": lambda: _call("exp", u),
+            "ln": lambda: _div(one, u),
+            "log": lambda: _div(one, _mul(u, _num(math.log(10)))),
+            "log2": lambda: _div(one, _mul(u, _num(math.log(2)))),
+            "sqrt": lambda: _div(one, _mul(_num(2), _call("sqrt", u))),
+            "abs": lambda: _div(u, _call("abs", u)),
+        }
+        if node.func.id in derivatives:
+            return _mul(derivatives[node.func.id](), du)
+
+    raise NotDifferentiable(type(node).__name__)
+
+
+@lru_cache(maxsize=128)
+def compile_derivative(text, angle_mode, var="x"):
+    """Compiled d/dx of an equation, or None when no derivative is known"""
+    try:
+        tree = differentiate(parse_expression(text), var, angle_mode)
+    except NotDifferentiable:
+        return None
+    return compile(ast.fix_missing_locations(tree), "<derivative>", "eval")
+
+
+def _make_function(code, namespace, variables, var):
+    local = dict(variables)
+
+    def f(x):
+        local[var] = x
+        try:
+            value = eval(code, namespace, local)
+        except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+            return math.nan
+        if isinstance(value, complex):
+            return math.nan
+        return float(value)
+
+    return f
+
+
+def _find_bracket(f, x0, f0):
+    """Search outward from x0 for a sign change; returns (a, fa, b, fb) or None"""
+    step = 0.01 * max(1.0, abs(x0))
+    for _ in range(MAX_BRACKET_PROBES // 2):
+        for x in (x0 + step, x0 - step):
+            fx = f(x)
+            if math.isfinite(fx) and (fx == 0 or math.copysign(1, fx) != math.copysign(1, f0)):
+                return (min(x0, x), f0 if x > x0 else fx, max(x0, x), fx if x > x0 else f0)
+        step *= 1.6
+    return None
+
+
+def solve(text, guess=0.0, angle_mode="DEG", variables=None, var="x",
+          max_iterations=MAX_ITERATIONS, tolerance=1e-14):
+    """Solve text (an equation L = R, or an expression equal to zero) for x
+
+    Uses a bracketed Illinois method with a Newton step whenever the
+    derivative is known, bisecting only when a step leaves the bracket or
+    is not half the one before last, and stops once a step no longer moves
+    x.  Without a sign change near the guess it falls back to unbracketed
+    Newton or secant iteration.  Iterations are capped at max_iterations.
+    """
+    namespace = build_namespace(angle_mode)
+    variables = variables or {}
+    f = _make_function(compile_expression(text), namespace, variables, var)
+    derivative_code = compile_derivative(text, angle_mode, var)
+    df = _make_function(derivative_code, namespace, variables, var) if derivative_code else None
+
+    x = float(guess)
+    fx = f(x)
+    if not math.isfinite(fx):
+        raise ValueError("Equation is undefined at the initial value")
+    if fx == 0:
+        return SolveResult(x, 0.0, 0, True, "exact")
+
+    bracket = _find_bracket(f, x, fx)
+    if bracket is not None:
+        return _solve_bracketed(f, df, bracket, max_iterations, tolerance)
+    return _solve_open(f, df, x, fx, max_iterations, tolerance)
+
+
+def _solve_bracketed(f, df, bracket, max_iterations, tolerance):
+    a, fa, b, fb = bracket
+    if fa == 0:
+        return SolveResult(a, 0.0, 0, True, "bracket")
+    if fb == 0:
+        return SolveResult(b, 0.0, 0, True, "bracket")
+
+    x, fx = (a, fa) if abs(fa) < abs(fb) else (b, fb)
+    # A sign change at a pole also collapses the bracket, but there |f| grows
+    # instead of shrinking; such a point is not a root
+    f_scale = min(abs(fa), abs(fb))
+    side = 0
+    method = "illinois"
+    # The last two steps; anything inside the bracket is a fine first step
+    step = older_step = 2 * (b - a)
+    for iteration in range(1, max_iterations + 1):
+        candidate = None
+        if df is not None:
+            slope = df(x)
+            if math.isfinite(slope) and slope != 0:
+                candidate = x - fx / slope
+                method = "newton"
+        if candidate is None:
+            # Illinois variant of regula falsi
+            candidate = (a * fb - b * fa) / (fb - fa)
+            method = "illinois"
+        if abs(candidate - x) <= tolerance * max(1.0, abs(x)):
+            # The step would not move x any more
+            return SolveResult(x, fx, iteration, abs(fx) <= f_scale, method)
+        if not a < candidate < b or abs(candidate - x) > 0.5 * abs(older_step):
+            # Bisect when the step leaves the bracket or is not converging
+            candidate = 0.5 * (a + b)
+
+        fc = f(candidate)
+        if not math.isfinite(fc):
+            candidate = 0.5 * (a + b)
+            fc = f(candidate)
+        older_step, step = step, candidate - x
+        x, fx = candidate, fc
+        if fc == 0:
+            return SolveResult(x, fx, iteration, True, method)
+        if abs(step) <= tolerance * max(1.0, abs(x)) or (b - a) <= tolerance * max(1.0, abs(x)):
+            return SolveResult(x, fx, iteration, abs(fx) <= f_scale, method)
+
+        if math.copysign(1, fc) == math.copysign(1, fa):
+            a, fa = candidate, fc
+            if side == -1:
+                fb /= 2
+            side = -1
+        else:
+            b, fb = candidate, fc
+            if side == 1:
+                fa /= 2
+            side = 1
+    return SolveResult(x, fx, max_iterations, False, method)
+
+
+def _solve_open(f, df, x, fx, max_iterations, tolerance):
+    # Without a bracket, iterate Newton (or secant) from the guess
+    previous = x + 1e-4 * max(1.0, abs(x))
+    f_previous = f(previous)
+    method = "newton" if df is not None else "secant"
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        if df is not None:
+            slope = df(x)
+        else:
+            slope = (fx - f_previous) / (x - previous) if x != previous else math.nan
+        if not math.isfinite(slope) or slope == 0:
+            break
+        candidate = x - fx / slope
+        fc = f(candidate)
+        if not math.isfinite(fc):
+            break
+        previous, f_previous = x, fx
+        x, fx = candidate, fc
+        if fx == 0 or abs(x - previous) <= tolerance * max(1.0, abs(x)):
+            return SolveResult(x, fx, iteration, True, method)
+    return SolveResult(x, fx, iteration, False, method)
@@ -0,0 +1,519 @@
+"""Local HTTP/JSON service for the calculator engine
+
+    python server.py [--host 127.0.0.1] [--port 8991] [--workers N]
+    python calculator.py --serve [...]
+
+Endpoints (POST bodies and responses are JSON):
+
+    POST /evaluate  {"session": "lab1", "angle_mode": "RAD", "memories": {"A": 2},
+                     "expressions": ["1+2", {"expression": "Ans×A", "store": "B"}]}
+    POST /solve     {"eq_type": "Quadratic", "coefficients": [[1, -3, 2], ...]}
+                    {"session": "lab1", "expression": "x²=2"}        (SOLVE)
+    POST /matrix    {"op": "det" | "inverse" | "solve" | "rank", "matrix": [[...]], "rhs": [...]}
+                    {"session": "lab1", "op": "det", "matrix": [[...]], "store": "A"}
+                    {"session": "lab1", "op": "inverse", "matrix": "A"}   (stored matrix)
+    GET  /session?id=lab1                                            state of a session
+    GET  /health
+
+A session keeps Ans, the memories A–F, M, x, y, the angle mode and the
+matrices A–C between calls; batched expressions run in order, as if "="
+was pressed after each.  Expressions may only name the calculator's
+functions and variables; anything else is answered with 400.  Sessions
+are held by a SessionManager: the least recently used ones beyond
+--max-sessions are written to --session-dir and read back when they are
+next used.
+
+Connections are kept alive (HTTP/1.1), and all evaluation runs in a
+process pool so a slow request only occupies one worker.  A request
+still running after REQUEST_TIMEOUT is answered with 504 and leaves its
+session unchanged, though its worker stays busy until it finishes.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from calculator_core import CalculatorCore
+from equation_solver import EQUATION_TYPES, solve_batch
+from expression import ANGLE_MODES, unknown_names
+from matrix_ops import MatrixRegister
+from session_manager import DEFAULT_MAX_RESIDENT, CalculatorState, SessionManager
+
+DEFAULT_PORT = 8991
+MAX_BODY = 1 << 20
+MAX_BATCH = 1000
+IDLE_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
+# Requests still running at shutdown get this long to finish; any
+# calculation has timed out with a 504 by then
+SHUTDOWN_TIMEOUT = REQUEST_TIMEOUT + 1
+MATRIX_NAMES = ("A", "B", "C")
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+
+class RequestError(Exception):
+    """A request the server answers with an HTTP error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Work done in the pool processes
+
+_core = None
+
+
+def _worker_core(state):
+    """This process's calculator, loaded with a session's state"""
+    global _core
+    if _core is None:
+        _core = CalculatorCore({"history_enabled": False})
+        _core.latency.enabled = False
+    _core.ans = state["ans"]
+    _core.memories = dict(state["memories"])
+    _core.angle_mode = state["angle_mode"]
+    _core.calculation_mode = state["calculation_mode"]
+    _core.decimal_places = state["decimal_places"]
+    return _core
+
+
+def _number(value):
+    """value as JSON: a number, [re, im] for complex values, or None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, complex):
+        return [_number(value.real), _number(value.imag)]
+    if isinstance(value, int):
+        return value if abs(value) < 2 ** 53 else float(value)
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    return None
+
+
+def _save_state(core, state):
+    return dict(state, ans=core.ans, memories=dict(core.memories))
+
+
+def evaluate_batch(state, items):
+    """Press "=" after each expression in turn; returns (results, new state)"""
+    core = _worker_core(state)
+    results = []
+    for item in items:
+        core.last_error = None
+        core.current_input = item["expression"]
+        core.calculate_result()
+        if core.last_error:
+            results.append({"expression": item["expression"], "error": core.last_error})
+            continue
+        if item.get("store"):
+            core.memories[item["store"]] = core.ans
+        results.append({"expression": item["expression"], "result": core.display_line2, "value": _number(core.ans)})
+    return results, _save_state(core, state)
+
+
+def solve_in_session(state, expression):
+    core = _worker_core(state)
+    core.last_error = None
+    core.current_input = expression
+    result = core.solve_for_x()
+    if core.last_error:
+        return {"expression": expression, "error": core.last_error}, state
+    if not result.converged:
+        # x still holds the previous solution, which says nothing about this equation
+        return {"expression": expression, "error": core.display_line2, "converged": False}, state
+    return {"expression": expression, "result": core.display_line2, "x": _number(core.memories["x"])}, \
+        _save_state(core, state)
+
+
+def solve_equations(eq_type, coefficients):
+    """EQN mode for many coefficient rows; complex roots come back as [re, im]"""
+    roots = solve_batch(eq_type, coefficients)
+    return {"eq_type": eq_type, "roots": [[_number(root) for root in row] for row in roots.tolist()]}
+
+
+def matrix_operation(op, matrix, rhs):
+    register = MatrixRegister()
+    register.assign(matrix)
+    if op == "det":
+        result = register.determinant()
+    elif op == "inverse":
+        result = register.inverse().tolist()
+    elif op == "solve":
+        result = register.solve(rhs).tolist()
+    else:
+        result = register.rank()
+    return {"op": op, "result": result}
+
+
+def _warm_up():
+    _worker_core(CalculatorState().to_dict()).calculate_result()
+
+
+class CalculatorServer:
+    """asyncio HTTP/1.1 server that offloads every calculation to a process pool"""
+
+    def __init__(self, workers=None, session_dir=None, max_sessions=DEFAULT_MAX_RESIDENT):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+        # Without a directory of its own, evicted sessions last as long as the server
+        self.session_temp = None
+        if session_dir is None:
+            self.session_temp = tempfile.TemporaryDirectory(prefix="calculator-sessions-")
+            session_dir = self.session_temp.name
+        self.sessions = SessionManager(session_dir, max_sessions)
+        # One batch at a time runs against a session; a lock lives while it is in use
+        self.locks = weakref.WeakValueDictionary()
+        self.requests = 0
+        # Open connection → its handler task, and the connections inside a request
+        self.connections = {}
+        self.busy = set()
+        self.stopping = False
+        self.routes = {
+            ("POST", "/evaluate"): self.handle_evaluate,
+            ("POST", "/solve"): self.handle_solve,
+            ("POST", "/matrix"): self.handle_matrix,
+            ("GET", "/session"): self.handle_session,
+            ("GET", "/health"): self.handle_health,
+        }
+
+    # Plumbing
+
+    async def run_in_pool(self, function, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self.pool, function, *args), REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RequestError(504, f"Calculation took longer than {REQUEST_TIMEOUT} s")
+
+    def session_lock(self, session_id):
+        lock = self.locks.get(session_id)
+        if lock is None:
+            lock = self.locks[session_id] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def session_id(body):
+        session_id = body.get("session", "default")
+        if not isinstance(session_id, str) or not session_id:
+            raise RequestError(400, "session must be a non-empty string")
+        return session_id
+
+    @staticmethod
+    def check_expression(expression):
+        """Only the calculator's functions and variables may be named"""
+        names = unknown_names(expression)
+        if names:
+            raise RequestError(400, f"Unknown name {names[0]!r} in {expression!r}")
+
+    @staticmethod
+    def apply_settings(state, body):
+        """Angle mode, memories and mode sent along with a request update the session"""
+        if "angle_mode" in body:
+            if body["angle_mode"] not in ANGLE_MODES:
+                raise RequestError(400, f"angle_mode must be one of {', '.join(ANGLE_MODES)}")
+            state["angle_mode"] = body["angle_mode"]
+        if "complex" in body:
+            state["calculation_mode"] = "CMPLX" if body["complex"] else "COMP"
+        if "decimal_places" in body:
+            if body["decimal_places"] not in range(0, 16):
+                raise RequestError(400, "decimal_places must be 0 to 15")
+            state["decimal_places"] = body["decimal_places"]
+        memories = body.get("memories", {})
+        if memories:
+            state["memories"] = dict(state["memories"])
+        for name, value in memories.items():
+            if name not in state["memories"] or isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise RequestError(400, f"Bad memory {name!r}")
+            state["memories"][name] = value
+
+    # Endpoints
+
+    async def handle_evaluate(self, body, query):
+        items = body.get("expressions")
+        if items is None and "expression" in body:
+            items = [body["expression"]]
+        if not isinstance(items, list) or not items:
+            raise RequestError(400, "expressions must be a non-empty list")
+        if len(items) > MAX_BATCH:
+            raise RequestError(413, f"At most {MAX_BATCH} expressions per request")
+        batch = []
+        for item in items:
+            if isinstance(item, str):
+                item = {"expression": item}
+            if not (isinstance(item, dict) and isinstance(item.get("expression"), str)):
+                raise RequestError(400, "Each expression must be a string or {\"expression\": ...}")
+            if item.get("store") not in (None, "A", "B", "C", "D", "E", "F", "M", "x", "y"):
+                raise RequestError(400, f"Cannot store to {item['store']!r}")
+            self.check_expression(item["expression"])
+            batch.append(item)
+
+        session_id = self.session_id(body)
+        async with self.session_lock(session_id):
+            session = self.sessions.get(session_id)
+            state = session.to_dict()
+            self.apply_settings(state, body)
+            results, state = await self.run_in_pool(evaluate_batch, state, batch)
+            session.update(state)
+            # Put back in case other sessions evicted it while the batch ran
+            self.sessions.put(session_id, session)
+        return {"session": session_id, "results": results}
+
+    async def handle_solve(self, body, query):
+        if "expression" in body:
+            if not isinstance(body["expression"], str):
+                raise RequestError(400, "expression must be a string")
+            self.check_expression(body["expression"])
+            session_id = self.session_id(body)
+            async with self.session_lock(session_id):
+                session = self.sessions.get(session_id)
+                state = session.to_dict()
+                self.apply_settings(state, body)
+                result, state = await self.run_in_pool(solve_in_session, state, body["expression"])
+                session.update(state)
+                self.sessions.put(session_id, session)
+            return dict(result, session=session_id)
+
+        eq_type = body.get("eq_type")
+        if eq_type not in EQUATION_TYPES:
+            raise RequestError(400, f"eq_type must be one of {', '.join(EQUATION_TYPES)}")
+        try:
+            return await self.run_in_pool(solve_equations, eq_type, body.get("coefficients"))
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, str(e))
+
+    async def handle_matrix(self, body, query):
+        op = body.get("op")
+        if op not in ("det", "inverse", "solve", "rank"):
+            raise RequestError(400, "op must be det, inverse, solve or rank")
+        matrix = body.get("matrix")
+        store = body.get("store")
+        if isinstance(matrix, str):
+            # A matrix stored in the session earlier
+            if matrix not in MATRIX_NAMES:
+                raise RequestError(400, f"matrix must be one of {', '.join(MATRIX_NAMES)} or a list of rows")
+            session_id = self.session_id(body)
+            session = self.sessions.get(session_id, create=False)
+            if session is None or matrix not in session.matrices:
+                raise RequestError(404, f"No matrix {matrix} in session {session_id!r}")
+            matrix = session.matrices[matrix]
+        elif not (isinstance(matrix, list) and matrix and all(isinstance(row, list) for row in matrix)):
+            raise RequestError(400, "matrix must be a list of rows")
+        rhs = body.get("rhs")
+        if op == "solve" and not (
+            isinstance(rhs, list) and len(rhs) == len(matrix)
+            and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in rhs)
+        ):
+            raise RequestError(400, f"rhs must be a list of {len(matrix)} numbers")
+        if store is not None:
+            if store not in MATRIX_NAMES:
+                raise RequestError(400, f"Cannot store to {store!r}")
+            try:
+                values = np.array(matrix, dtype=float)
+            except (TypeError, ValueError):
+                raise RequestError(400, "matrix must be a rectangular list of numbers")
+            if values.ndim != 2:
+                raise RequestError(400, "matrix must be a rectangular list of numbers")
+            session_id = self.session_id(body)
+            async with self.session_lock(session_id):
+                self.sessions.get(session_id).set_matrix(store, values)
+        try:
+            return await self.run_in_pool(matrix_operation, op, matrix, rhs)
+        except (TypeError, ValueError, ArithmeticError) as e:
+            # numpy's LinAlgError is a ValueError
+            raise RequestError(400, str(e))
+
+    async def handle_session(self, body, query):
+        session_id = query.get("id", ["default"])[0]
+        state = self.sessions.get(session_id, create=False)
+        if state is None:
+            raise RequestError(404, f"No session {session_id!r}")
+        return {
+            "session": session_id,
+            "ans": _number(state.ans),
+            "memories": {name: _number(value) for name, value in state.memories.items()},
+            "angle_mode": state.angle_mode,
+            "complex": state.calculation_mode == "CMPLX",
+            "decimal_places": state.decimal_places,
+            "matrices": {name: values.tolist() for name, values in state.matrices.items()},
+        }
+
+    async def handle_health(self, body, query):
+        return {
+            "status": "ok",
+            "sessions": len(self.sessions),
+            "evictions": self.sessions.evictions,
+            "reloads": self.sessions.reloads,
+            "requests": self.requests,
+        }
+
+    # HTTP
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it, it goes idle or the server stops"""
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while not self.stopping:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                self.busy.add(writer)
+                try:
+                    keep_alive = await self.handle_request(request_line, reader, writer)
+                    await writer.drain()
+                finally:
+                    self.busy.discard(writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+    async def handle_request(self, request_line, reader, writer):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self.respond(writer, 400, {"error": "Malformed request line"}, False)
+            return False
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        # A body that is not read leaves the connection out of step; close it
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            self.respond(writer, 411, {"error": "Send a Content-Length instead of a chunked body"}, False)
+            return False
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY:
+            self.respond(writer, 413, {"error": f"Request bodies are limited to {MAX_BODY} bytes"}, False)
+            return False
+        raw = await reader.readexactly(length) if length else b""
+
+        try:
+            url = urlsplit(target)
+            route = self.routes.get((method, url.path))
+            if route is None:
+                if any(path == url.path for _, path in self.routes):
+                    raise RequestError(405, f"{method} is not supported on {url.path}")
+                raise RequestError(404, f"No endpoint {url.path}")
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                raise RequestError(400, "Body is not valid JSON")
+            if not isinstance(body, dict):
+                raise RequestError(400, "Body must be a JSON object")
+            self.requests += 1
+            status, payload = 200, await route(body, parse_qs(url.query))
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            # No loop signal handlers on Windows: Ctrl+C stops the loop at once
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+        async with server:
+            await stop.wait()
+            server.close()
+            await self.shut_down()
+
+    async def shut_down(self):
+        """Let requests in progress finish, then close the idle connections"""
+        self.stopping = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SHUTDOWN_TIMEOUT
+        while self.busy and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        # An idle handler sees end of input and returns as if the client had left
+        for writer in list(self.connections):
+            if writer not in self.busy:
+                writer.close()
+        tasks = list(self.connections.values())
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(deadline - loop.time(), 1))
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        if self.session_temp is not None:
+            self.session_temp.cleanup()
+        else:
+            # Sessions in a directory of the user's outlive the server
+            self.sessions.flush()
+
+
+def add_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="calculation processes (default: one per core)")
+    parser.add_argument("--session-dir",
+                        help="where idle sessions are kept, and kept after exit (default: a temporary directory)")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_RESIDENT,
+                        help="sessions held in memory before the least recently used go to disk")
+
+
+def main(args=None):
+    if args is None:
+        parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+        add_arguments(parser)
+        args = parser.parse_args()
+    server = CalculatorServer(args.workers, args.session_dir, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
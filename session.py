@@ -0,0 +1,173 @@
+"""Session snapshots: the calculator's whole state saved to one file and restored
+
+A session file is an uncompressed NumPy .npz archive with these members:
+
+    header      JSON as bytes: version, Ans, memories, modes, the input line,
+                stat data and the shape of every matrix register
+    history     the calculation history as an array of strings
+    matrix_A …  one float array per matrix register
+
+Opening a snapshot reads only the header.  The history and each matrix
+are read from the archive the first time they are used, so restoring a
+session costs the same however much it holds.
+"""
+import json
+import os
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from matrix_ops import MatrixRegister
+
+SESSION_VERSION = 1
+# Header fields every session file has, whichever program wrote it
+HEADER_FIELDS = (
+    "ans", "memories", "angle_mode", "calculation_mode", "decimal_places",
+    "complex_format", "base", "input", "stat_data", "matrices",
+)
+# The window's matrix registers; one a file does not hold restores empty
+MATRIX_REGISTERS = ("A", "B", "C")
+
+
+def encode_value(value):
+    """A number as JSON; complex numbers become {"re": …, "im": …}"""
+    if isinstance(value, complex):
+        return {"re": value.real, "im": value.imag}
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        return complex(value["re"], value["im"])
+    return value
+
+
+def write_snapshot(path, header, history=(), matrices=None):
+    """Write a session file from header fields, history entries and name → array matrices"""
+    matrices = matrices or {}
+    header = dict(
+        header,
+        version=SESSION_VERSION,
+        saved=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        matrices={name: list(np.shape(values)) for name, values in matrices.items()},
+    )
+    arrays = {
+        "header": np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        "history": np.array(list(history), dtype=str),
+    }
+    for name, values in matrices.items():
+        arrays[f"matrix_{name}"] = values
+
+    # Written beside the old file and swapped in, so a failed save loses nothing
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def save_snapshot(path, core, matrices=None, stat_data=()):
+    """Write core's state, its history and the matrix registers to path"""
+    header = {
+        "ans": encode_value(core.ans),
+        "memories": {name: encode_value(value) for name, value in core.memories.items()},
+        "angle_mode": core.angle_mode,
+        "calculation_mode": core.calculation_mode,
+        "decimal_places": core.decimal_places,
+        "complex_format": core.complex_format,
+        "base": core.base,
+        "input": core.current_input,
+        "stat_data": list(stat_data),
+    }
+    registers = dict(matrices or {})
+    write_snapshot(path, header, core.history, {name: register.values for name, register in registers.items()})
+
+
+class Snapshot:
+    """An open session file: the header is read at once, everything else on demand"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.archive = np.load(path, allow_pickle=False)
+        except ValueError:
+            raise ValueError("Not a calculator session file")
+        header = None
+        if isinstance(self.archive, np.lib.npyio.NpzFile) and "header" in self.archive.files:
+            try:
+                header = json.loads(self.archive["header"].tobytes())
+            except ValueError:
+                pass
+        if not isinstance(header, dict) or header.get("version") != SESSION_VERSION \
+                or not all(field in header for field in HEADER_FIELDS):
+            self.close()
+            raise ValueError("Not a calculator session file")
+        self.header = header
+
+    def history(self):
+        return self.archive["history"].tolist()
+
+    def matrix(self, name):
+        return self.archive[f"matrix_{name}"]
+
+    def close(self):
+        if isinstance(self.archive, np.lib.npyio.NpzFile):
+            self.archive.close()
+
+
+class LazyMatrices(Mapping):
+    """The matrix registers of a snapshot, each read the first time it is used
+
+    Registers the file does not hold, as in one written by SessionManager
+    for a session without matrices, come back as a new window has them.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.shapes = {name: tuple(shape) for name, shape in snapshot.header["matrices"].items()}
+        self.names = list(self.shapes) + [name for name in MATRIX_REGISTERS if name not in self.shapes]
+        self.loaded = {}
+
+    def __getitem__(self, name):
+        register = self.loaded.get(name)
+        if register is None:
+            if name in self.shapes:
+                register = MatrixRegister(*self.shapes[name])
+                register.assign(self.snapshot.matrix(name))
+            elif name in MATRIX_REGISTERS:
+                # A new window's register: 2×2 zeros
+                register = MatrixRegister(2, 2)
+            else:
+                raise KeyError(name)
+            self.loaded[name] = register
+        return register
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def restore_snapshot(core, snapshot):
+    """Put a snapshot's state into core; returns its matrix registers
+
+    The history and the matrices stay in the file until they are first used.
+    Everything is decoded before core is touched, so a bad value leaves it as
+    it was.
+    """
+    header = snapshot.header
+    ans = decode_value(header["ans"])
+    memories = {name: decode_value(value) for name, value in header["memories"].items()}
+    matrices = LazyMatrices(snapshot)
+    core.ans = ans
+    core.memories.update(memories)
+    core.angle_mode = header["angle_mode"]
+    core.calculation_mode = header["calculation_mode"]
+    core.decimal_places = header["decimal_places"]
+    core.complex_format = header["complex_format"]
+    core.base = header["base"]
+    core.current_input = header["input"]
+    core.result_shown = False
+    core.history_loader = snapshot.history
+    return matrices
@@ -0,0 +1,196 @@
+"""Thousands of independent calculator states in one process
+
+Each session is a CalculatorState: Ans, the memories A–F, M, x, y, the
+modes and the matrix registers.  States are kept small:
+
+* __slots__, so a state is one fixed-size object with no __dict__;
+* a state that never stored a memory or a matrix shares the module's
+  immutable DEFAULT_MEMORIES and NO_MATRICES instead of owning copies;
+* memories and matrices are copy-on-write: a store builds a new mapping,
+  and matrices are read-only arrays, so copies of a state share them.
+
+SessionManager keeps the most recently used states in memory and writes
+the least recently used ones to disk as session files (see session.py)
+once more than max_resident are held.  An evicted session is read back
+the next time it is asked for.
+
+Memory per session (CPython 3.11, 64-bit, python -m benchmarks.sessions),
+counting the state, its id and its place in the manager:
+
+    default state                         ~210 B
+    Ans and a memory stored               ~530 B
+    its own 4×4 matrix                    ~650 B
+    a 4×4 matrix shared with a template   ~210 B
+    the plain dict state used before      ~540 B
+    a whole CalculatorCore                ~18 KB
+
+With 1,000 of 10,000 sessions resident, touching a random one (writing
+the oldest to disk and reading this one back) takes about 1.7 ms, most
+of it the file system's open and rename.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
+from session import Snapshot, decode_value, encode_value, write_snapshot
+
+DEFAULT_MEMORIES = MappingProxyType({"A": 0, "B": 0, "C": 0, "D": 0, "E": 0, "F": 0, "M": 0, "x": 0, "y": 0})
+NO_MATRICES = MappingProxyType({})
+DEFAULT_MAX_RESIDENT = 10000
+
+
+def _read_only(values):
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+class CalculatorState:
+    """One session's calculator state; stores replace mappings instead of changing them"""
+
+    __slots__ = ("ans", "memories", "angle_mode", "calculation_mode", "decimal_places", "matrices")
+
+    def __init__(self):
+        self.ans = 0
+        self.memories = DEFAULT_MEMORIES
+        self.angle_mode = "DEG"
+        self.calculation_mode = "COMP"
+        self.decimal_places = 10
+        self.matrices = NO_MATRICES
+
+    def copy(self):
+        """An independent state that shares the memories and matrices until either stores"""
+        state = CalculatorState()
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        return state
+
+    def set_memory(self, name, value):
+        if name not in DEFAULT_MEMORIES:
+            raise KeyError(name)
+        memories = dict(self.memories)
+        memories[name] = value
+        self.memories = memories
+
+    def set_matrix(self, name, values):
+        """Store a read-only copy of values as matrix name"""
+        matrices = dict(self.matrices)
+        matrices[name] = _read_only(values)
+        self.matrices = matrices
+
+    def to_dict(self):
+        """Ans, memories and modes as the plain dict a CalculatorCore is loaded from"""
+        return {
+            "ans": self.ans,
+            "memories": dict(self.memories),
+            "angle_mode": self.angle_mode,
+            "calculation_mode": self.calculation_mode,
+            "decimal_places": self.decimal_places,
+        }
+
+    def update(self, values):
+        """Take Ans, memories and modes from a dict like to_dict's"""
+        self.ans = values["ans"]
+        memories = values["memories"]
+        self.memories = DEFAULT_MEMORIES if memories == DEFAULT_MEMORIES else dict(memories)
+        self.angle_mode = values["angle_mode"]
+        self.calculation_mode = values["calculation_mode"]
+        self.decimal_places = values["decimal_places"]
+
+
+class SessionManager:
+    """Calculator states by session id, the least recently used ones kept on disk"""
+
+    def __init__(self, directory, max_resident=DEFAULT_MAX_RESIDENT):
+        self.directory = directory
+        self.max_resident = max_resident
+        self.resident = OrderedDict()
+        self.evictions = 0
+        self.reloads = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.resident)
+
+    def path(self, session_id):
+        """Session ids are free text, so files are named by a hash of the id"""
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.npz")
+
+    def get(self, session_id, create=True):
+        """The session's state, read back from disk if it was evicted
+
+        An unknown session is created, or None is returned if create is false.
+        """
+        state = self.resident.get(session_id)
+        if state is not None:
+            self.resident.move_to_end(session_id)
+            return state
+        path = self.path(session_id)
+        if os.path.exists(path):
+            state = self.load(path)
+            os.remove(path)
+            self.reloads += 1
+        elif create:
+            state = CalculatorState()
+        else:
+            return None
+        self.put(session_id, state)
+        return state
+
+    def put(self, session_id, state):
+        """Make state the session's current state, evicting the least recently used"""
+        self.resident[session_id] = state
+        self.resident.move_to_end(session_id)
+        while len(self.resident) > self.max_resident:
+            old_id, old_state = self.resident.popitem(last=False)
+            self.save(old_id, old_state)
+            self.evictions += 1
+
+    def discard(self, session_id):
+        self.resident.pop(session_id, None)
+        path = self.path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def save(self, session_id, state):
+        """Write a state as a session file, which the calculator window can also open"""
+        header = {
+            "session": session_id,
+            "ans": encode_value(state.ans),
+            "memories": {name: encode_value(value) for name, value in state.memories.items()},
+            "angle_mode": state.angle_mode,
+            "calculation_mode": state.calculation_mode,
+            "decimal_places": state.decimal_places,
+            "complex_format": "rect",
+            "base": "DEC",
+            "input": "",
+            "stat_data": [],
+        }
+        write_snapshot(self.path(session_id), header, matrices=state.matrices)
+
+    @staticmethod
+    def load(path):
+        snapshot = Snapshot(path)
+        try:
+            header = snapshot.header
+            state = CalculatorState()
+            state.update(dict(
+                header,
+                ans=decode_value(header["ans"]),
+                memories={name: decode_value(value) for name, value in header["memories"].items()},
+            ))
+            if header["matrices"]:
+                state.matrices = {name: _read_only(snapshot.matrix(name)) for name in header["matrices"]}
+        finally:
+            snapshot.close()
+        return state
+
+    def flush(self):
+        """Write every resident state to disk, as before a shutdown"""
+        for session_id, state in self.resident.items():
+            self.save(session_id, state)
+        self.resident.clear()
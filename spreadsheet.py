@@ -0,0 +1,259 @@
+"""SPREADSHEET mode: cell formulas with dependency-tracked recalculation
+
+Cells are named like A1 or AB120 and store either a number or a formula
+(text starting with "=") evaluated by the expression engine.  Each
+formula is compiled once when it is entered; the sheet keeps, for every
+cell, the set of formulas that read it, so an edit only recalculates the
+cells downstream of it, in topological order.  Cells on a reference
+cycle get a Circular ERROR instead of a value.
+"""
+import ast
+import re
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from expression import build_namespace, compile_expression, parse_expression
+
+# 2000 × 50 = 10^5 cells; the calculator itself has 45 × 5
+SHEET_ROWS = 2000
+SHEET_COLS = 50
+
+_CELL_PATTERN = re.compile(r"([A-Z]{1,3})([1-9][0-9]*)")
+_RANGE_PATTERN = re.compile(r"\b([A-Z]{1,3}[1-9][0-9]*):([A-Z]{1,3}[1-9][0-9]*)\b")
+
+RecalcResult = namedtuple("RecalcResult", "cells seconds")
+
+
+def column_name(col):
+    """0 → A, 25 → Z, 26 → AA"""
+    name = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def cell_name(row, col):
+    return f"{column_name(col)}{row + 1}"
+
+
+def parse_cell(name):
+    """A1 → (0, 0); raises ValueError for anything that is not a cell name"""
+    match = _CELL_PATTERN.fullmatch(name)
+    if match is None:
+        raise ValueError(f"Not a cell: {name}")
+    col = 0
+    for ch in match.group(1):
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return int(match.group(2)) - 1, col - 1
+
+
+def _range_cells(first, last):
+    """Every (row, col) of the rectangle with corners first and last"""
+    (r1, c1), (r2, c2) = first, last
+    return [(r, c) for r in range(min(r1, r2), max(r1, r2) + 1)
+            for c in range(min(c1, c2), max(c1, c2) + 1)]
+
+
+def _mean(values):
+    if len(values) == 0:
+        raise ValueError("Math ERROR")
+    return float(np.mean(values))
+
+
+# Spreadsheet functions taking a range, as on the fx-991EX
+RANGE_FUNCTIONS = {
+    "Sum": lambda values: float(np.sum(values)),
+    "Mean": _mean,
+    "Min": lambda values: float(np.min(values)),
+    "Max": lambda values: float(np.max(values)),
+}
+
+
+@lru_cache(maxsize=None)
+def sheet_namespace(angle_mode):
+    """Calculator namespace plus the range functions, built once per angle mode"""
+    return dict(build_namespace(angle_mode), **RANGE_FUNCTIONS)
+
+
+class Cell:
+    """One non-empty cell: its input text, compiled formula and current value"""
+    __slots__ = ("text", "code", "refs", "ranges", "value", "error")
+
+    def __init__(self, text):
+        self.text = text
+        self.code = None
+        self.refs = ()
+        self.ranges = ()
+        self.value = None
+        self.error = None
+
+
+class Spreadsheet:
+    """A sparse grid of cells with incremental recalculation"""
+
+    def __init__(self, rows=SHEET_ROWS, cols=SHEET_COLS, angle_mode="DEG"):
+        self.rows = rows
+        self.cols = cols
+        self.angle_mode = angle_mode
+        self.cells = {}
+        # cell -> formulas that read it (directly or through a range)
+        self.dependents = {}
+        self.last_recalc = RecalcResult(0, 0.0)
+
+    def _check_bounds(self, key):
+        row, col = key
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise ValueError(f"{cell_name(row, col)} is outside the sheet")
+
+    def _compile(self, cell):
+        """Compile a formula and collect the cells and ranges it reads"""
+        text = cell.text.strip()
+        if not text.startswith("="):
+            cell.value = float(text)
+            return
+        # A1:B3 becomes the single name A1_B3, bound to the range's values
+        source = _RANGE_PATTERN.sub(lambda m: f"{m.group(1)}_{m.group(2)}", text[1:])
+        refs, ranges = set(), {}
+        for node in ast.walk(parse_expression(source)):
+            if not isinstance(node, ast.Name):
+                continue
+            if _CELL_PATTERN.fullmatch(node.id):
+                key = parse_cell(node.id)
+                self._check_bounds(key)
+                refs.add((node.id, key))
+            elif "_" in node.id:
+                first, _, last = node.id.partition("_")
+                if _CELL_PATTERN.fullmatch(first) and _CELL_PATTERN.fullmatch(last):
+                    # Corners first: a typo such as A1:ZZZ999999 would list 10^10 cells
+                    corners = parse_cell(first), parse_cell(last)
+                    for key in corners:
+                        self._check_bounds(key)
+                    ranges[node.id] = _range_cells(*corners)
+        cell.code = compile_expression(source)
+        cell.refs = tuple(refs)
+        cell.ranges = tuple(ranges.items())
+
+    def _precedents(self, cell):
+        keys = {key for _, key in cell.refs}
+        for _, range_keys in cell.ranges:
+            keys.update(range_keys)
+        return keys
+
+    def get(self, key):
+        """Value of a cell (None when empty); raises ValueError for error cells"""
+        cell = self.cells.get(key)
+        if cell is None:
+            return None
+        if cell.error:
+            raise ValueError(cell.error)
+        return cell.value
+
+    def text(self, key):
+        cell = self.cells.get(key)
+        return cell.text if cell is not None else ""
+
+    def set_cell(self, key, text):
+        """Enter a number or =formula and recalculate everything downstream"""
+        self._check_bounds(key)
+        start = time.perf_counter()
+        old = self.cells.pop(key, None)
+        if old is not None:
+            for precedent in self._precedents(old):
+                readers = self.dependents.get(precedent)
+                if readers is not None:
+                    readers.discard(key)
+                    if not readers:
+                        del self.dependents[precedent]
+
+        text = text.strip()
+        if text:
+            cell = Cell(text)
+            try:
+                self._compile(cell)
+            except (SyntaxError, ValueError):
+                cell.error = "Syntax ERROR"
+            self.cells[key] = cell
+            for precedent in self._precedents(cell):
+                self.dependents.setdefault(precedent, set()).add(key)
+
+        count = self._recalculate(self._downstream([key]))
+        self.last_recalc = RecalcResult(count, time.perf_counter() - start)
+        return self.last_recalc
+
+    def clear(self, key):
+        return self.set_cell(key, "")
+
+    def set_angle_mode(self, angle_mode):
+        """Switch the angle unit and recalculate every formula"""
+        self.angle_mode = angle_mode
+        start = time.perf_counter()
+        count = self._recalculate({key for key, cell in self.cells.items() if cell.code is not None})
+        self.last_recalc = RecalcResult(count, time.perf_counter() - start)
+        return self.last_recalc
+
+    def _downstream(self, roots):
+        """Every cell reachable from roots through the dependents graph"""
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            for reader in self.dependents.get(stack.pop(), ()):
+                if reader not in seen:
+                    seen.add(reader)
+                    stack.append(reader)
+        return seen
+
+    def _recalculate(self, affected):
+        """Evaluate the affected cells in topological order (Kahn's algorithm)"""
+        affected = {key for key in affected if key in self.cells}
+        pending = dict.fromkeys(affected, 0)
+        for key in affected:
+            for reader in self.dependents.get(key, ()):
+                if reader in pending:
+                    pending[reader] += 1
+
+        ready = deque(key for key, count in pending.items() if count == 0)
+        evaluated = 0
+        while ready:
+            key = ready.popleft()
+            self._evaluate(self.cells[key])
+            evaluated += 1
+            for reader in self.dependents.get(key, ()):
+                if reader in pending:
+                    pending[reader] -= 1
+                    if pending[reader] == 0:
+                        ready.append(reader)
+            del pending[key]
+
+        # Whatever never became ready sits on (or behind) a cycle
+        for key in pending:
+            cell = self.cells[key]
+            cell.value, cell.error = None, "Circular ERROR"
+        return evaluated + len(pending)
+
+    def _evaluate(self, cell):
+        if cell.code is None:
+            if cell.error != "Syntax ERROR":
+                cell.error = None
+            return
+        variables = {}
+        try:
+            for name, key in cell.refs:
+                value = self.get(key)
+                variables[name] = 0.0 if value is None else value
+            for name, keys in cell.ranges:
+                # Empty cells are skipped, so Mean() averages only entered values
+                values = [self.get(key) for key in keys]
+                variables[name] = np.array([v for v in values if v is not None], dtype=float)
+            value = eval(cell.code, sheet_namespace(self.angle_mode), variables)
+            if isinstance(value, np.ndarray):
+                raise ValueError("Math ERROR")
+            cell.value, cell.error = float(value), None
+        except ValueError as e:
+            cell.value, cell.error = None, str(e) if str(e).endswith("ERROR") else "Math ERROR"
+        except (ZeroDivisionError, OverflowError, TypeError, NameError):
+            cell.value, cell.error = None, "Math ERROR"
@@ -0,0 +1,25 @@
+import pytest
+
+from base_n import evaluate
+
+
+@pytest.mark.parametrize("text, base, expected", [
+    ("0B1", 16, 0xB1),
+    ("0b1+0D", 16, 0xB1 + 0xD),
+    ("0B1", 10, 1),
+    ("0o17", 2, 15),
+    ("0x1F", 8, 31),
+])
+def test_prefixes(text, base, expected):
+    assert evaluate(text, base) == expected
+
+
+def test_octal_prefix_is_not_hex():
+    with pytest.raises(SyntaxError):
+        evaluate("0O7", 16)
+
+
+def test_power_key_is_not_xor():
+    with pytest.raises(SyntaxError):
+        evaluate("2^3", 10)
+    assert evaluate("2 xor 3", 10) == 1
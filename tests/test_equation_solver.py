@@ -0,0 +1,60 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from equation_solver import format_intervals, solve_batch, solve_inequality, solve_quadratic_batch
+
+
+def test_quadratic_batch_degenerate_rows():
+    roots = solve_quadratic_batch(np.array([[1.0, -3, 2], [0, 2, 4], [0, 0, 1], [0, 0, 0]]))
+    assert sorted(roots[0].real) == [1, 2]
+    assert roots[1, 0] == -2 and np.isnan(roots[1, 1])
+    assert np.isnan(roots[2:]).all()
+
+
+@pytest.mark.parametrize("coefficients", [
+    [1, 1e8, 1, 1],
+    [1, 1e6, 1, 1],
+    [1e-10, 1, 1, 1],
+    [1, -6, 11, -6],
+    [2, 0, 0, -16],
+])
+def test_cubic_batch_badly_scaled(coefficients):
+    roots = solve_batch("Cubic", [coefficients])[0]
+    for expected in np.roots(coefficients):
+        assert np.min(np.abs(roots - expected)) <= 1e-9 * abs(expected)
+
+
+def test_cubic_inequality_beside_a_large_root():
+    intervals = solve_inequality(np.poly([-1e8, 0.5, 2]), ">")
+    assert [(interval.low, interval.high) for interval in intervals] == [
+        (pytest.approx(-1e8), pytest.approx(0.5, rel=1e-12)), (pytest.approx(2, rel=1e-12), np.inf)
+    ]
+
+
+def test_system_batch_nearly_singular_rows():
+    rows = [[0.1, 0.3, 1, 0.3, 0.9, 2], [0.1, 0.3, 1, 0.3, 0.9, 3], [1, 1, 3, 1, -1, 1], [0, 0, 0, 0, 0, 0]]
+    solutions = solve_batch("System2", rows)
+    assert np.isnan(solutions[[0, 1, 3]]).all()
+    np.testing.assert_allclose(solutions[2], [2, 1])
+
+    rng = np.random.default_rng(0)
+    matrices = rng.uniform(-10, 10, (2000, 3, 3))
+    matrices[:, 2] = rng.uniform(-3, 3, (2000, 1)) * matrices[:, 0] + rng.uniform(-3, 3, (2000, 1)) * matrices[:, 1]
+    rows = np.concatenate([matrices, rng.uniform(-10, 10, (2000, 3, 1))], axis=2).reshape(2000, 12)
+    assert np.isnan(solve_batch("System3", rows)).all()
+
+
+@pytest.mark.parametrize("coefficients, operator, expected", [
+    ([0, 0, 1], ">", "All real numbers"),
+    ([0, 0, -1], ">", "No solution"),
+    ([0, 0, 0], ">=", "All real numbers"),
+    ([0, 0, 0, 5], "<", "No solution"),
+    ([0, 1, -2], ">=", "2 ≤ x"),
+    ([1, 0, -1], "<", "-1 < x < 1"),
+])
+def test_inequality_of_lower_degree(coefficients, operator, expected):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert format_intervals(solve_inequality(coefficients, operator)) == expected
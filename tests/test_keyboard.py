@@ -0,0 +1,31 @@
+import pytest
+
+from calculator_core import CalculatorCore
+from macros import replay
+
+
+@pytest.mark.parametrize("key, text", [("(", "("), (")", ")"), ("+", "+"), ("×", "×"), ("^", "^(")])
+def test_shift_does_not_change_typed_characters(key, text):
+    # Shift is held to type these, and the physical Shift key turns SHIFT on
+    core = CalculatorCore()
+    core.toggle_shift()
+    core.type_key(key)
+    assert core.current_input == text
+    assert not core.shift_active
+
+
+def test_replayed_typing():
+    core = CalculatorCore()
+    events = []
+    for key in "(2+3)×2^":
+        events += [("key", "SHIFT"), ("type", key)] if key in "()+×^" else [("type", key)]
+    events += [("type", "2"), ("type", ")"), ("type", "=")]
+    replay(core, events)
+    assert core.ans == 20
+
+
+def test_keypad_keeps_shift_functions():
+    core = CalculatorCore()
+    core.button_click("SHIFT")
+    core.button_click("^")
+    assert core.current_input == "log₂("
@@ -0,0 +1,26 @@
+import pytest
+
+from expression import evaluate
+from live_preview import LivePreview
+
+
+@pytest.mark.parametrize("text", ["(2+3", "sin(30", "(2+3)(4"])
+def test_unclosed_parenthesis_has_no_preview(text):
+    with pytest.raises(SyntaxError):
+        evaluate(text)
+    assert LivePreview().value(text) is None
+
+
+@pytest.mark.parametrize("text", ["9^9^9", "9^9^9>1", "[9^9^9]"])
+def test_huge_integer_power_is_not_previewed(text):
+    assert LivePreview().value(text) is None
+
+
+def test_typing_matches_evaluate():
+    preview = LivePreview()
+    for text in ["2", "2^", "2^10", "2^10+(1", "2^10+(1)", "2^10+(1)>3"]:
+        try:
+            expected = evaluate(text)
+        except Exception:
+            expected = None
+        assert preview.value(text) == expected
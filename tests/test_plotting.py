@@ -0,0 +1,21 @@
+import warnings
+
+import pytest
+
+from plotting import FunctionSampler, auto_y_limits, break_jumps
+
+
+@pytest.mark.parametrize("text", ["sinx", "2q", "math.nosuch(x)"])
+def test_unknown_names_are_rejected_up_front(text):
+    with pytest.raises(ValueError):
+        FunctionSampler(text)
+
+
+@pytest.mark.parametrize("text", ["x^1000", "e^(x^3)", "1÷(x−1)"])
+def test_steep_curves_sample_quietly(text):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        xs, ys = FunctionSampler(text, variables={"y": 0}).view(-10, 10)
+        low, high = auto_y_limits(ys)
+        break_jumps(xs, ys, high - low)
+    assert len(xs) == len(ys) > 0
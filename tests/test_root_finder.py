@@ -0,0 +1,29 @@
+import pytest
+
+from root_finder import solve
+
+
+@pytest.mark.parametrize("text, guess", [("1/x", 1), ("1/(x−2)", 1), ("tan(x)", 1.5)])
+def test_sign_change_at_a_pole_is_not_a_root(text, guess):
+    assert not solve(text, guess, angle_mode="RAD").converged
+
+
+@pytest.mark.parametrize("text, guess, root", [("x²−2", 1, 2 ** 0.5), ("x³−x−1", 0, 1.324717957244746), ("tan(x)", 3, 3.141592653589793)])
+def test_roots(text, guess, root):
+    result = solve(text, guess, angle_mode="RAD")
+    assert result.converged
+    assert result.root == pytest.approx(root)
+
+
+@pytest.mark.parametrize("text, guess, angle_mode, root", [
+    ("sin(x)=0.5", 1, "DEG", 30),
+    ("x^5−x−1", 1, "RAD", 1.1673039782614187),
+    ("x^5−x−1", 0, "RAD", 1.1673039782614187),
+    ("cos(x)−x", 0, "RAD", 0.7390851332151607),
+    ("e^(x)−1000000", 0, "RAD", 13.815510557964274),
+])
+def test_simple_roots_converge_in_a_few_iterations(text, guess, angle_mode, root):
+    result = solve(text, guess, angle_mode=angle_mode)
+    assert result.converged
+    assert result.root == pytest.approx(root, rel=1e-13)
+    assert result.iterations <= 10
@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+import pytest
+
+from server import CalculatorServer, RequestError, solve_in_session
+from session_manager import CalculatorState
+
+
+@pytest.fixture
+def server():
+    server = CalculatorServer(workers=1)
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize("expression", ['np.savetxt("{path}",[1])', "stats.norm.cdf(1)", "random.seed(1)"])
+def test_only_calculator_functions_can_be_named(server, tmp_path, expression):
+    path = tmp_path / "written.txt"
+    body = {"expressions": [expression.format(path=path)]}
+    with pytest.raises(RequestError) as error:
+        asyncio.run(server.handle_evaluate(body, {}))
+    assert error.value.status == 400
+    assert not os.path.exists(path)
+
+
+def test_scientific_tab_functions_still_evaluate(server):
+    body = {"expressions": ["math.sinh(0)+random.random()×0", "sin(30)"]}
+    response = asyncio.run(server.handle_evaluate(body, {}))
+    assert [result["result"] for result in response["results"]] == ["0", "0.5"]
+
+
+def test_solve_without_a_root_reports_an_error():
+    state = CalculatorState().to_dict()
+    state["memories"]["x"] = 3
+    result, new_state = solve_in_session(state, "x²=−1")
+    assert result["converged"] is False and "error" in result and "x" not in result
+    assert new_state["memories"]["x"] == 3
+
+    result, new_state = solve_in_session(new_state, "x²=4")
+    assert result["x"] == pytest.approx(2)
+
+
+@pytest.mark.parametrize("rhs", [None, 5, [1], [1, "2"], [1, True], [[1], [2]]])
+def test_matrix_solve_needs_a_matching_rhs(server, rhs):
+    body = {"op": "solve", "matrix": [[2, 0], [0, 4]]}
+    if rhs is not None:
+        body["rhs"] = rhs
+    with pytest.raises(RequestError) as error:
+        asyncio.run(server.handle_matrix(body, {}))
+    assert error.value.status == 400
+
+    body["rhs"] = [2, 8]
+    assert asyncio.run(server.handle_matrix(body, {}))["result"] == [1, 2]
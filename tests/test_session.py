@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from calculator_core import CalculatorCore
+from matrix_ops import MatrixRegister
+from session import Snapshot, restore_snapshot, save_snapshot, write_snapshot
+from session_manager import CalculatorState, SessionManager
+
+
+def test_incomplete_header_is_rejected_before_anything_changes(tmp_path):
+    path = str(tmp_path / "partial.npz")
+    write_snapshot(path, {"ans": 5, "memories": {"A": 1}})
+    core = CalculatorCore()
+    core.ans = 7
+    with pytest.raises(ValueError):
+        restore_snapshot(core, Snapshot(path))
+    assert core.ans == 7 and core.memories["A"] == 0
+
+
+def _restore(path):
+    core = CalculatorCore()
+    matrices = restore_snapshot(core, Snapshot(path))
+    return core, matrices
+
+
+def test_window_round_trip(tmp_path):
+    path = str(tmp_path / "window.npz")
+    core = CalculatorCore({"history_enabled": True})
+    core.ans = 3 + 4j
+    core.memories["B"] = 2.5
+    core.angle_mode = "RAD"
+    core.current_input = "sin(x)"
+    core.add_to_history("1+1 = 2")
+    register = MatrixRegister(2, 3)
+    register.assign(np.arange(6.0).reshape(2, 3))
+    save_snapshot(path, core, {"A": register, "B": MatrixRegister(2, 2)}, stat_data=[1, 2])
+
+    restored, matrices = _restore(path)
+    assert restored.ans == 3 + 4j and restored.memories["B"] == 2.5
+    assert restored.angle_mode == "RAD" and restored.current_input == "sin(x)"
+    assert restored.history == ["1+1 = 2"]
+    assert list(matrices) == ["A", "B", "C"]
+    np.testing.assert_array_equal(matrices["A"].values, register.values)
+    assert matrices["C"].shape == (2, 2)
+
+
+def test_session_manager_round_trip(tmp_path):
+    manager = SessionManager(str(tmp_path))
+    state = CalculatorState()
+    state.ans = 42
+    state.set_memory("M", -1)
+    manager.save("no matrices", state)
+    state.set_matrix("B", np.eye(3))
+    manager.save("matrix B", state)
+
+    core, matrices = _restore(manager.path("no matrices"))
+    assert core.ans == 42 and core.memories["M"] == -1
+    assert [matrices[name].shape for name in "ABC"] == [(2, 2)] * 3
+
+    _, matrices = _restore(manager.path("matrix B"))
+    np.testing.assert_array_equal(matrices["B"].values, np.eye(3))
+    assert matrices["A"].shape == (2, 2)
+    with pytest.raises(KeyError):
+        matrices["D"]
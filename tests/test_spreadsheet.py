@@ -0,0 +1,51 @@
+import time
+
+from spreadsheet import Spreadsheet, parse_cell
+
+
+def _sheet(**cells):
+    sheet = Spreadsheet()
+    for name, text in cells.items():
+        sheet.set_cell(parse_cell(name), text)
+    return sheet
+
+
+def _cell(sheet, name):
+    cell = sheet.cells[parse_cell(name)]
+    return cell.error or cell.value
+
+
+def test_only_downstream_cells_are_recalculated():
+    sheet = _sheet(A1="1", B1="=A1×2", C1="=B1+1", D1="5", E1="=D1+1")
+    result = sheet.set_cell(parse_cell("A1"), "3")
+    assert result.cells == 3
+    assert [_cell(sheet, name) for name in ("B1", "C1", "E1")] == [6, 7, 6]
+
+
+def test_cycle_is_reported_and_recovers():
+    sheet = _sheet(A1="=B1+1", B1="=A1+1", C1="=B1×2")
+    assert [_cell(sheet, name) for name in ("A1", "B1", "C1")] == ["Circular ERROR"] * 3
+    sheet.set_cell(parse_cell("B1"), "2")
+    assert [_cell(sheet, name) for name in ("A1", "B1", "C1")] == [3, 2, 4]
+
+
+def test_range_functions_skip_empty_cells():
+    sheet = _sheet(A1="1", A3="3", B1="=Sum(A1:A5)", B2="=Mean(A1:A5)", B3="=Mean(C1:C5)")
+    assert _cell(sheet, "B1") == 4
+    assert _cell(sheet, "B2") == 2
+    assert _cell(sheet, "B3") == "Math ERROR"
+
+
+def test_errors_pass_to_readers():
+    sheet = _sheet(A1="=1÷0", B1="=A1+1", C1="=Sum(A1:A2)")
+    assert _cell(sheet, "B1") == "Math ERROR" and _cell(sheet, "C1") == "Math ERROR"
+    sheet.set_cell(parse_cell("A1"), "2")
+    assert _cell(sheet, "B1") == 3 and _cell(sheet, "C1") == 2
+
+
+def test_huge_range_is_rejected_without_expanding_it():
+    sheet = Spreadsheet()
+    start = time.perf_counter()
+    sheet.set_cell(parse_cell("A1"), "=Sum(A2:ZZZ999999)")
+    assert time.perf_counter() - start < 1
+    assert _cell(sheet, "A1") == "Syntax ERROR"
@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from themes import load_theme, load_user_themes, palette
+
+
+@pytest.mark.parametrize("content", [
+    [],
+    {"colors": []},
+    {"colors": {"bg_main": 123}},
+    {"colors": {"bg_main": "#gggggg"}},
+    {"name": 5, "colors": {}},
+])
+def test_malformed_themes_raise_value_error(tmp_path, content):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps(content))
+    with pytest.raises(ValueError):
+        load_theme(path)
+
+
+def test_broken_files_are_skipped(tmp_path):
+    (tmp_path / "broken.json").write_text("[]")
+    (tmp_path / "good.json").write_text(json.dumps({"name": "Good", "colors": {"bg_main": "#112233"}}))
+    themes = load_user_themes(tmp_path)
+    assert list(themes) == ["Good"]
+    assert palette(themes["Good"])["bg_main"] == "#112233"
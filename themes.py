@@ -0,0 +1,299 @@
+"""Colour themes and the registry that restyles widgets by role
+
+Every widget registers once, at creation, which theme colour (its role)
+each of its options takes, e.g. bg="bg_number".  Switching themes then
+reconfigures the registered widgets group by group, computing each
+group's options once, instead of rebuilding or reclassifying anything.
+A role may also name a derived colour such as "active:bg_number"; the
+palette of a theme holds all of them and is computed once per theme.
+
+Built-in themes are below; user themes are JSON files in THEME_DIR of
+the form {"name": ..., "colors": {role: "#rrggbb", ...}}.  Roles a user
+theme leaves out are taken from the Default theme.
+"""
+import json
+import os
+import re
+import weakref
+import tkinter as tk
+
+THEME_DIR = "themes"
+HEX_COLOR = re.compile(r"#[0-9A-Fa-f]{6}")
+
+# Built-in themes
+THEMES = {
+    "Default": {
+        "bg_main": "#f0f0f0",
+        "bg_display": "#ffffff",
+        "fg_display": "#000000",
+        "bg_button": "#e0e0e0",
+        "fg_button": "#000000",
+        "bg_number": "#ffffff",
+        "fg_number": "#000000",
+        "bg_function": "#d0d0d0",
+        "fg_function": "#000000",
+        "bg_operator": "#ffcc99",
+        "fg_operator": "#000000",
+        "bg_command": "#b0c4de",
+        "fg_command": "#000000",
+        "bg_equals": "#ff6666",
+        "fg_equals": "#ffffff",
+        "shift_color": "#ff9900",
+        "alpha_color": "#009900"
+    },
+    "Dark": {
+        "bg_main": "#2c2c2c",
+        "bg_display": "#1c1c1c",
+        "fg_display": "#ffffff",
+        "bg_button": "#3c3c3c",
+        "fg_button": "#ffffff",
+        "bg_number": "#4c4c4c",
+        "fg_number": "#ffffff",
+        "bg_function": "#505050",
+        "fg_function": "#ffffff",
+        "bg_operator": "#ff9966",
+        "fg_operator": "#000000",
+        "bg_command": "#6699cc",
+        "fg_command": "#ffffff",
+        "bg_equals": "#cc3333",
+        "fg_equals": "#ffffff",
+        "shift_color": "#ffcc66",
+        "alpha_color": "#99cc99"
+    },
+    "Blue": {
+        "bg_main": "#d4e6f1",
+        "bg_display": "#f5f8fa",
+        "fg_display": "#1a5276",
+        "bg_button": "#d6eaf8",
+        "fg_button": "#1a5276",
+        "bg_number": "#eaf2f8",
+        "fg_number": "#1a5276",
+        "bg_function": "#aed6f1",
+        "fg_function": "#154360",
+        "bg_operator": "#3498db",
+        "fg_operator": "#ffffff",
+        "bg_command": "#2980b9",
+        "fg_command": "#ffffff",
+        "bg_equals": "#2471a3",
+        "fg_equals": "#ffffff",
+        "shift_color": "#f39c12",
+        "alpha_color": "#27ae60"
+    },
+    "Vintage": {
+        "bg_main": "#f5eacb",
+        "bg_display": "#fef9e7",
+        "fg_display": "#784212",
+        "bg_button": "#f8efd4",
+        "fg_button": "#784212",
+        "bg_number": "#fcf3cf",
+        "fg_number": "#784212",
+        "bg_function": "#f5cba7",
+        "fg_function": "#784212",
+        "bg_operator": "#d35400",
+        "fg_operator": "#ffffff",
+        "bg_command": "#b9770e",
+        "fg_command": "#ffffff",
+        "bg_equals": "#a04000",
+        "fg_equals": "#ffffff",
+        "shift_color": "#ba4a00",
+        "alpha_color": "#196f3d"
+    }
+}
+
+# Background and text roles of each main-keypad key type
+KEY_ROLES = {
+    "default": ("bg_button", "fg_button"),
+    "number": ("bg_number", "fg_number"),
+    "function": ("bg_function", "fg_function"),
+    "operator": ("bg_operator", "fg_operator"),
+    "command": ("bg_command", "fg_command"),
+    "equals": ("bg_equals", "fg_equals"),
+    "memory": ("bg_function", "fg_function"),
+}
+
+# Descriptions of the roles, in the order the theme editor lists them
+ROLES = {
+    "bg_main": "Window background",
+    "bg_display": "Display background",
+    "fg_display": "Display text",
+    "bg_button": "Key background",
+    "fg_button": "Key text",
+    "bg_number": "Number key background",
+    "fg_number": "Number key text",
+    "bg_function": "Function key background",
+    "fg_function": "Function key text",
+    "bg_operator": "Operator key background",
+    "fg_operator": "Operator key text",
+    "bg_command": "Command key background",
+    "fg_command": "Command key text",
+    "bg_equals": "= key background",
+    "fg_equals": "= key text",
+    "shift_color": "SHIFT legends",
+    "alpha_color": "ALPHA legends",
+}
+
+
+def _rgb(color):
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def _is_hex(color):
+    return color.startswith("#") and len(color) == 7
+
+
+def active_color(base_color):
+    """Get a slightly darker color for button active state"""
+    if _is_hex(base_color):
+        # Darken by 20%
+        r, g, b = (max(0, int(c * 0.8)) for c in _rgb(base_color))
+        return f"#{r:02x}{g:02x}{b:02x}"
+    return base_color
+
+
+def blend(color, other, amount):
+    """Move color the given fraction of the way towards other"""
+    if not (_is_hex(color) and _is_hex(other)):
+        return color
+    r, g, b = (round(c + (o - c) * amount) for c, o in zip(_rgb(color), _rgb(other)))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+# Derived colours: "<kind>:<role>" is computed from the role's colour
+DERIVED = {
+    "active": lambda color, theme: active_color(color),  # pressed key
+    "hover": lambda color, theme: blend(color, "#ffffff", 0.15),  # pointer over a tab or key
+    "disabled": lambda color, theme: blend(color, theme["bg_main"], 0.6),  # greyed-out text
+}
+
+_palettes = {}
+
+
+def palette(theme):
+    """Every base and derived colour of a theme, computed once per distinct theme"""
+    key = tuple(sorted(theme.items()))
+    colors = _palettes.get(key)
+    if colors is None:
+        colors = dict(theme)
+        for kind, derive in DERIVED.items():
+            for role, color in theme.items():
+                colors[f"{kind}:{role}"] = derive(color, theme)
+        if len(_palettes) >= 32:
+            # Previews in the theme editor make a new palette per colour picked
+            _palettes.clear()
+        _palettes[key] = colors
+    return colors
+
+
+def load_theme(path):
+    """Read a user theme file; returns (name, colors) with missing roles filled in
+
+    Anything but {"name": ..., "colors": {role: "#rrggbb", ...}} raises ValueError.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("colors", {}), dict):
+        raise ValueError("A theme must be an object with a \"colors\" object")
+    name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+    if not isinstance(name, str):
+        raise ValueError(f"Bad theme name: {name!r}")
+    colors = dict(THEMES["Default"])
+    for role, color in data.get("colors", {}).items():
+        if role not in ROLES:
+            raise ValueError(f"Unknown theme role: {role}")
+        if not (isinstance(color, str) and HEX_COLOR.fullmatch(color)):
+            raise ValueError(f"{role} must be a #rrggbb colour, not {color!r}")
+        colors[role] = color
+    return name, colors
+
+
+def load_user_themes(directory=THEME_DIR):
+    """All readable themes in directory by name; broken files are skipped"""
+    themes = {}
+    if not os.path.isdir(directory):
+        return themes
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".json"):
+            try:
+                name, colors = load_theme(os.path.join(directory, filename))
+            except (OSError, ValueError) as e:
+                print(f"Error loading theme {filename}: {e}")
+                continue
+            themes[name] = colors
+    return themes
+
+
+def save_theme(name, colors, directory=THEME_DIR):
+    """Write a theme to directory/<name>.json and return the path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump({"name": name, "colors": colors}, f, indent=2)
+    return path
+
+
+def theme_signature(directory=THEME_DIR):
+    """Names, sizes and modification times of the theme files, to notice edits"""
+    try:
+        entries = sorted(
+            (entry for entry in os.scandir(directory) if entry.name.endswith(".json")), key=lambda entry: entry.name
+        )
+    except OSError:
+        return ()
+    signature = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class ThemeRegistry:
+    """Widgets grouped by the theme roles of their options"""
+
+    def __init__(self, theme):
+        self.palette = palette(theme)
+        # (option, role) pairs → widgets; destroyed widgets drop out by themselves
+        self.groups = {}
+        # (option, role) pairs → option values under the current palette
+        self.resolved = {}
+
+    def color(self, role):
+        return self.palette[role]
+
+    def options(self, roles):
+        options = self.resolved.get(roles)
+        if options is None:
+            options = self.resolved[roles] = {option: self.palette[role] for option, role in roles}
+        return options
+
+    def register(self, widget, **roles):
+        """Style widget from the current theme now and on every switch"""
+        key = tuple(sorted(roles.items()))
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = weakref.WeakSet()
+        group.add(widget)
+        widget.configure(**self.options(key))
+        return widget
+
+    def apply(self, theme):
+        """Restyle every registered widget; returns how many were configured"""
+        self.palette = palette(theme)
+        self.resolved.clear()
+        count = 0
+        for key, group in self.groups.items():
+            options = self.options(key)
+            for widget in list(group):
+                try:
+                    widget.configure(**options)
+                except tk.TclError:
+                    # Destroyed but not yet collected
+                    group.discard(widget)
+                    continue
+                count += 1
+        return count
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups.values())
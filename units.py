@@ -0,0 +1,194 @@
+"""Scientific constants (CONST) and unit conversions (CONV)
+
+Both tables are built once at import.  Conversions between units of the
+same dimension are affine maps value·scale + offset; chains of conv()
+calls with literal unit names are folded into a single map when an
+expression is compiled.
+"""
+import ast
+from collections import namedtuple
+from fractions import Fraction as F
+
+import numpy as np
+
+Constant = namedtuple("Constant", "number symbol name value unit")
+
+# CONST 01–47, CODATA 2018 values
+CONSTANTS = [
+    Constant(1, "mp", "proton mass", 1.67262192369e-27, "kg"),
+    Constant(2, "mn", "neutron mass", 1.67492749804e-27, "kg"),
+    Constant(3, "me", "electron mass", 9.1093837015e-31, "kg"),
+    Constant(4, "mμ", "muon mass", 1.883531627e-28, "kg"),
+    Constant(5, "a0", "Bohr radius", 5.29177210903e-11, "m"),
+    Constant(6, "h", "Planck constant", 6.62607015e-34, "J s"),
+    Constant(7, "μN", "nuclear magneton", 5.0507837461e-27, "J/T"),
+    Constant(8, "μB", "Bohr magneton", 9.2740100783e-24, "J/T"),
+    Constant(9, "ℏ", "reduced Planck constant", 1.054571817e-34, "J s"),
+    Constant(10, "α", "fine-structure constant", 7.2973525693e-3, ""),
+    Constant(11, "re", "classical electron radius", 2.8179403262e-15, "m"),
+    Constant(12, "λc", "Compton wavelength", 2.42631023867e-12, "m"),
+    Constant(13, "γp", "proton gyromagnetic ratio", 2.6752218744e8, "1/(s T)"),
+    Constant(14, "λcp", "proton Compton wavelength", 1.32140985539e-15, "m"),
+    Constant(15, "λcn", "neutron Compton wavelength", 1.31959090581e-15, "m"),
+    Constant(16, "R∞", "Rydberg constant", 10973731.568160, "1/m"),
+    Constant(17, "u", "atomic mass constant", 1.66053906660e-27, "kg"),
+    Constant(18, "μp", "proton magnetic moment", 1.41060679736e-26, "J/T"),
+    Constant(19, "μe", "electron magnetic moment", -9.2847647043e-24, "J/T"),
+    Constant(20, "μn", "neutron magnetic moment", -9.6623651e-27, "J/T"),
+    Constant(21, "μμ", "muon magnetic moment", -4.49044830e-26, "J/T"),
+    Constant(22, "F", "Faraday constant", 96485.33212, "C/mol"),
+    Constant(23, "e", "elementary charge", 1.602176634e-19, "C"),
+    Constant(24, "NA", "Avogadro constant", 6.02214076e23, "1/mol"),
+    Constant(25, "k", "Boltzmann constant", 1.380649e-23, "J/K"),
+    Constant(26, "Vm", "molar volume of ideal gas (273.15 K, 100 kPa)", 22.71095464e-3, "m³/mol"),
+    Constant(27, "R", "molar gas constant", 8.314462618, "J/(mol K)"),
+    Constant(28, "C0", "speed of light in vacuum", 299792458.0, "m/s"),
+    Constant(29, "C1", "first radiation constant", 3.741771852e-16, "W m²"),
+    Constant(30, "C2", "second radiation constant", 1.438776877e-2, "m K"),
+    Constant(31, "σ", "Stefan-Boltzmann constant", 5.670374419e-8, "W/(m² K⁴)"),
+    Constant(32, "ε0", "electric constant", 8.8541878128e-12, "F/m"),
+    Constant(33, "μ0", "magnetic constant", 1.25663706212e-6, "N/A²"),
+    Constant(34, "Φ0", "magnetic flux quantum", 2.067833848e-15, "Wb"),
+    Constant(35, "g", "standard acceleration of gravity", 9.80665, "m/s²"),
+    Constant(36, "G0", "conductance quantum", 7.748091729e-5, "S"),
+    Constant(37, "Z0", "characteristic impedance of vacuum", 376.730313668, "Ω"),
+    Constant(38, "t", "Celsius temperature", 273.15, "K"),
+    Constant(39, "G", "Newtonian constant of gravitation", 6.67430e-11, "m³/(kg s²)"),
+    Constant(40, "atm", "standard atmosphere", 101325.0, "Pa"),
+    Constant(41, "RK", "von Klitzing constant", 25812.80745, "Ω"),
+    Constant(42, "KJ", "Josephson constant", 483597.8484e9, "Hz/V"),
+    Constant(43, "Eh", "Hartree energy", 4.3597447222071e-18, "J"),
+    Constant(44, "mα", "alpha particle mass", 6.6446573357e-27, "kg"),
+    Constant(45, "md", "deuteron mass", 3.3435837724e-27, "kg"),
+    Constant(46, "mτ", "tau mass", 3.16754e-27, "kg"),
+    Constant(47, "Ry", "Rydberg energy", 2.1798723611035e-18, "J"),
+]
+
+CONSTANTS_BY_NUMBER = {c.number: c for c in CONSTANTS}
+CONSTANTS_BY_SYMBOL = {c.symbol: c for c in CONSTANTS}
+
+Unit = namedtuple("Unit", "dimension scale offset")
+
+# Every unit as an affine map to the SI unit of its dimension
+UNITS = {
+    "in": Unit("length", F("0.0254"), 0),
+    "cm": Unit("length", F("0.01"), 0),
+    "ft": Unit("length", F("0.3048"), 0),
+    "m": Unit("length", F("1.0"), 0),
+    "yd": Unit("length", F("0.9144"), 0),
+    "mile": Unit("length", F("1609.344"), 0),
+    "km": Unit("length", F("1000.0"), 0),
+    "nmile": Unit("length", F("1852.0"), 0),
+    "pc": Unit("length", F("3.0856775814913673e16"), 0),
+    "acre": Unit("area", F("4046.8564224"), 0),
+    "m2": Unit("area", F("1.0"), 0),
+    "galUS": Unit("volume", F("3.785411784e-3"), 0),
+    "galUK": Unit("volume", F("4.54609e-3"), 0),
+    "L": Unit("volume", F("1e-3"), 0),
+    "km/h": Unit("speed", F(10, 36), 0),
+    "m/s": Unit("speed", F("1.0"), 0),
+    "oz": Unit("mass", F("28.349523125e-3"), 0),
+    "g": Unit("mass", F("1e-3"), 0),
+    "lb": Unit("mass", F("0.45359237"), 0),
+    "kg": Unit("mass", F("1.0"), 0),
+    "atm": Unit("pressure", F("101325.0"), 0),
+    "Pa": Unit("pressure", F("1.0"), 0),
+    "kPa": Unit("pressure", F("1000.0"), 0),
+    "mmHg": Unit("pressure", F("133.322387415"), 0),
+    "kgf/cm2": Unit("pressure", F("98066.5"), 0),
+    "lbf/in2": Unit("pressure", F("6894.757293168361"), 0),
+    "hp": Unit("power", F("745.6998715822702"), 0),
+    "kW": Unit("power", F("1000.0"), 0),
+    "J": Unit("energy", F("1.0"), 0),
+    "kgfm": Unit("energy", F("9.80665"), 0),
+    "cal": Unit("energy", F("4.184"), 0),
+    "degC": Unit("temperature", F("1.0"), F("273.15")),
+    "degF": Unit("temperature", F(5, 9), F("273.15") - F(160, 9)),
+}
+
+# CONV 01–40 as (from, to) pairs, in the order of the calculator's menu
+CONVERSIONS = [
+    ("in", "cm"), ("cm", "in"), ("ft", "m"), ("m", "ft"), ("yd", "m"),
+    ("m", "yd"), ("mile", "km"), ("km", "mile"), ("nmile", "m"), ("m", "nmile"),
+    ("acre", "m2"), ("m2", "acre"), ("galUS", "L"), ("L", "galUS"), ("galUK", "L"),
+    ("L", "galUK"), ("pc", "km"), ("km", "pc"), ("km/h", "m/s"), ("m/s", "km/h"),
+    ("oz", "g"), ("g", "oz"), ("lb", "kg"), ("kg", "lb"), ("atm", "Pa"),
+    ("Pa", "atm"), ("mmHg", "Pa"), ("Pa", "mmHg"), ("hp", "kW"), ("kW", "hp"),
+    ("kgf/cm2", "Pa"), ("Pa", "kgf/cm2"), ("kgfm", "J"), ("J", "kgfm"), ("lbf/in2", "kPa"),
+    ("kPa", "lbf/in2"), ("degF", "degC"), ("degC", "degF"), ("J", "cal"), ("cal", "J"),
+]
+
+
+def _affine(source, target):
+    try:
+        a, b = UNITS[source], UNITS[target]
+    except KeyError as e:
+        raise ValueError(f"Unknown unit: {e.args[0]}") from None
+    if a.dimension != b.dimension:
+        raise ValueError(f"Cannot convert {a.dimension} ({source}) to {b.dimension} ({target})")
+    # target = (value·a.scale + a.offset - b.offset) / b.scale, kept exact
+    return a.scale / b.scale, (a.offset - b.offset) / b.scale
+
+
+def _rounded(scale, offset):
+    return float(scale), float(offset)
+
+
+# Every CONV menu entry precomputed as (scale, offset), rounded once
+CONVERSION_TABLE = {pair: _rounded(*_affine(*pair)) for pair in CONVERSIONS}
+
+
+def conversion(source, target):
+    """(scale, offset) mapping a value in source units to target units"""
+    return CONVERSION_TABLE.get((source, target)) or _rounded(*_affine(source, target))
+
+
+def const(key):
+    """Value of a constant by CONST number or symbol"""
+    table = CONSTANTS_BY_NUMBER if isinstance(key, (int, float)) else CONSTANTS_BY_SYMBOL
+    try:
+        return table[int(key) if isinstance(key, float) else key].value
+    except KeyError:
+        raise ValueError(f"Unknown constant: {key}") from None
+
+
+def conv(value, source, target):
+    """Convert a value (or a NumPy array, in one vectorized operation) between units"""
+    scale, offset = conversion(source, target)
+    if isinstance(value, (list, tuple)):
+        value = np.asarray(value, dtype=float)
+    return value * scale + offset if offset else value * scale
+
+
+def _literal(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float))
+
+
+def _is_call(node, name, arity):
+    return (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == name
+        and len(node.args) == arity and not node.keywords
+    )
+
+
+class UnitFolder(ast.NodeTransformer):
+    """Fold const() lookups and conv() chains with literal arguments at compile time"""
+
+    def visit_Call(self, node):
+        if _is_call(node, "const", 1) and _literal(node.args[0]):
+            return ast.copy_location(ast.Constant(value=const(node.args[0].value)), node)
+        if _is_call(node, "conv", 3) and _literal(node.args[1]) and _literal(node.args[2]):
+            # Compose nested conversions exactly, then round the single map once
+            scale, offset = _affine(node.args[1].value, node.args[2].value)
+            inner = node.args[0]
+            while _is_call(inner, "conv", 3) and _literal(inner.args[1]) and _literal(inner.args[2]):
+                inner_scale, inner_offset = _affine(inner.args[1].value, inner.args[2].value)
+                scale, offset = scale * inner_scale, scale * inner_offset + offset
+                inner = inner.args[0]
+            scale, offset = _rounded(scale, offset)
+            folded = ast.BinOp(left=self.visit(inner), op=ast.Mult(), right=ast.Constant(value=scale))
+            if offset:
+                folded = ast.BinOp(left=folded, op=ast.Add(), right=ast.Constant(value=offset))
+            return ast.copy_location(folded, node)
+        self.generic_visit(node)
+        return node